@@ -9,40 +9,86 @@ import json
 import os
 import pandas as pd
 from pathlib import Path
-from typing import List, Dict, Any
+from typing import Dict, Optional
 import argparse
 
+SAMPLE_KEYS = ['language', 'encoding', 'payload_size', 'qos', 'scenario', 'network']
+
 
 class ResultsAnalyzer:
     """Analyzer for benchmark results."""
     
-    def __init__(self, results_dir: str = "results"):
+    def __init__(self, results_dir: str = "results", store_dir: Optional[str] = None):
         """
         Initialize the results analyzer.
         
         Args:
             results_dir: Directory containing benchmark results
+            store_dir: Columnar results store (default: <results_dir>/store)
         """
         self.results_dir = Path(results_dir)
-        self.results = []
+        self.store_dir = Path(store_dir) if store_dir else self.results_dir / "store"
+        self.df = pd.DataFrame()
+        self._samples: Optional[pd.DataFrame] = None
+        self.sources: Dict[str, int] = {}
         
+    def _store(self):
+        """Open the columnar store if it has been written to, else None."""
+        if not (self.store_dir / "runs").is_dir():
+            return None
+        # pyarrow is only required once a store exists
+        from results_store import ResultsStore
+        return ResultsStore(str(self.store_dir))
+    
     def load_results(self):
-        """Load all benchmark results from the results directory."""
-        for lang_dir in self.results_dir.iterdir():
-            if lang_dir.is_dir():
-                results_file = lang_dir / "benchmark_results.json"
-                if results_file.exists():
-                    with open(results_file, 'r') as f:
-                        lang_results = json.load(f)
-                        self.results.extend(lang_results)
+        """
+        Load all benchmark runs into one flat DataFrame.
+        
+        Runs come from the columnar store plus any per-language
+        benchmark_results.json not already in it (matched by run_id).
+        Nested fields are flattened into dotted columns.
+        """
+        frames = []
+        store = self._store()
+        if store:
+            runs = store.read_runs()
+            frames.append(runs)
+            self.sources[str(self.store_dir)] = len(runs)
+        stored_ids = set(frames[0]['run_id'].dropna()) if frames and 'run_id' in frames[0] else set()
+        
+        for lang_dir in sorted(self.results_dir.iterdir()):
+            results_file = lang_dir / "benchmark_results.json"
+            if lang_dir.is_dir() and results_file.exists():
+                with open(results_file, 'r') as f:
+                    lang_results = pd.json_normalize(json.load(f))
+                if 'run_id' in lang_results:
+                    lang_results = lang_results[~lang_results['run_id'].isin(stored_ids)]
+                if not lang_results.empty:
+                    frames.append(lang_results)
+                    self.sources[str(results_file)] = len(lang_results)
+        
+        if frames:
+            self.df = pd.concat(frames, ignore_index=True)
+            # Results from before these fields existed
+            for column, default in [('payload_size', 'small'), ('qos', 1), ('scenario', 'throughput'),
+                                    ('network', 'direct')]:
+                if column not in self.df:
+                    self.df[column] = default
+                self.df[column] = self.df[column].fillna(default)
+    
+    def _throughput_runs(self) -> pd.DataFrame:
+        """Direct-network throughput runs, the only ones the comparison tables average."""
+        if self.df.empty:
+            return self.df
+        # Ping-pong, adaptive and impaired-network runs measure something else
+        return self.df[(self.df['scenario'] == 'throughput') & (self.df['network'] == 'direct')]
     
     def create_summary_table(self) -> pd.DataFrame:
-        """Create a summary table of all results."""
-        if not self.results:
+        """Create a summary table of direct throughput runs."""
+        df = self._throughput_runs()
+        if df.empty:
             return pd.DataFrame()
         
-        df = pd.DataFrame(self.results)
-        
         # Create summary statistics
         summary = df.groupby(['language', 'encoding', 'payload_size']).agg({
             'duration': ['mean', 'std'],
@@ -52,68 +98,175 @@ class ResultsAnalyzer:
         
         return summary
     
-    def create_performance_table(self) -> pd.DataFrame:
-        """Create a performance comparison table."""
-        if not self.results:
+    def _compare_by(self, keys) -> pd.DataFrame:
+        """Average throughput metrics of direct throughput runs per group, fastest first."""
+        df = self._throughput_runs()
+        if df.empty:
             return pd.DataFrame()
         
-        df = pd.DataFrame(self.results)
-        
-        # Group by language and encoding, calculate averages
-        performance = df.groupby(['language', 'encoding']).agg({
+        performance = df.groupby(keys).agg({
             'messages_per_second': 'mean',
             'duration': 'mean',
             'bytes_sent': 'mean'
         }).round(2)
         
         # Sort by messages per second
-        performance = performance.sort_values('messages_per_second', ascending=False)
-        
-        return performance
+        return performance.sort_values('messages_per_second', ascending=False)
+    
+    def create_performance_table(self) -> pd.DataFrame:
+        """Create a performance comparison table."""
+        return self._compare_by(['language', 'encoding'])
     
     def create_encoding_comparison(self) -> pd.DataFrame:
         """Create encoding performance comparison."""
-        if not self.results:
+        return self._compare_by('encoding')
+    
+    def create_language_comparison(self) -> pd.DataFrame:
+        """Create language performance comparison."""
+        return self._compare_by('language')
+    
+    def create_latency_table(self) -> pd.DataFrame:
+        """Create a publish-latency percentile table from per-run summaries."""
+        if 'publish_latency_ms.p50' not in self.df.columns:
             return pd.DataFrame()
         
-        df = pd.DataFrame(self.results)
+        df = self.df.dropna(subset=['publish_latency_ms.p50'])
+        # Percentiles don't average meaningfully; report the worst cell per group
+        latency = df.groupby(['language', 'encoding', 'payload_size', 'qos']).agg({
+            'publish_latency_ms.count': 'sum',
+            'publish_latency_ms.p50': 'max',
+            'publish_latency_ms.p90': 'max',
+            'publish_latency_ms.p99': 'max',
+            'publish_latency_ms.p999': 'max',
+            'publish_latency_ms.max': 'max'
+        }).round(3)
+        latency.columns = ['samples', 'p50_ms', 'p90_ms', 'p99_ms', 'p99.9_ms', 'max_ms']
+        
+        return latency
+    
+    def create_saturation_table(self) -> pd.DataFrame:
+        """Create a table of saturation points found by adaptive-rate runs."""
+        if 'saturation_msgs_per_second' not in self.df.columns:
+            return pd.DataFrame()
         
-        # Group by encoding, calculate averages
-        encoding_perf = df.groupby('encoding').agg({
+        df = self.df.dropna(subset=['saturation_msgs_per_second'])
+        saturation = df.groupby(['language', 'encoding', 'payload_size', 'qos']).agg({
+            'saturation_msgs_per_second': ['count', 'mean', 'min', 'max']
+        }).round(1)
+        saturation.columns = ['runs', 'mean_msg_s', 'min_msg_s', 'max_msg_s']
+        
+        return saturation.sort_values('mean_msg_s', ascending=False)
+    
+    def create_network_table(self) -> pd.DataFrame:
+        """Create a throughput/latency table per network profile (empty if every run was direct)."""
+        if (self.df['network'] == 'direct').all():
+            return pd.DataFrame()
+        
+        df = self.df.copy()
+        for column in ['publish_latency_ms.p50', 'publish_latency_ms.p99', 'rtt_ms.p50', 'rtt_ms.p99',
+                       'network_resets', 'messages_completed']:
+            if column not in df:
+                df[column] = float('nan')
+        # Scenarios are kept apart, so each row's latency is either publish latency or
+        # round-trip time (ping-pong), never a mix of the two
+        df['p50_ms'] = df['rtt_ms.p50'].where(df['scenario'] == 'pingpong', df['publish_latency_ms.p50'])
+        df['p99_ms'] = df['rtt_ms.p99'].where(df['scenario'] == 'pingpong', df['publish_latency_ms.p99'])
+        df['completed'] = df['messages_completed'].fillna(df['message_count'])
+        network = df.groupby(['network', 'scenario', 'language', 'encoding', 'qos']).agg({
             'messages_per_second': 'mean',
-            'duration': 'mean',
-            'bytes_sent': 'mean'
-        }).round(2)
+            'p50_ms': 'max',
+            'p99_ms': 'max',
+            'completed': 'sum',
+            'message_count': 'sum',
+            'network_resets': 'sum'
+        })
+        network['completion'] = network['completed'] / network['message_count']
+        network = network.drop(columns=['completed', 'message_count'])
+        network.columns = ['msg_s', 'p50_ms', 'p99_ms', 'resets', 'completion']
         
-        # Sort by messages per second
-        encoding_perf = encoding_perf.sort_values('messages_per_second', ascending=False)
+        return network.round(3)
+    
+    def load_samples(self) -> pd.DataFrame:
+        """Load per-message samples from the store once (empty without a store)."""
+        if self._samples is None:
+            store = self._store()
+            columns = SAMPLE_KEYS + ['pub_ms', 'rtt_ms']
+            self._samples = store.read_samples(columns=columns) if store else pd.DataFrame(columns=columns)
+            # Samples stored before the network axis existed ran direct
+            self._samples['network'] = self._samples['network'].fillna('direct')
+        return self._samples
+    
+    def create_sample_latency_table(self) -> pd.DataFrame:
+        """Create exact latency percentiles over all stored per-message samples."""
+        samples = self.load_samples()
+        if samples.empty:
+            return pd.DataFrame()
         
-        return encoding_perf
+        # One row per sample with whichever latency it carries
+        samples = samples.assign(latency_ms=samples['pub_ms'].fillna(samples['rtt_ms']))
+        grouped = samples.groupby(SAMPLE_KEYS)['latency_ms']
+        table = grouped.quantile([0.5, 0.9, 0.99, 0.999]).unstack()
+        table.columns = ['p50_ms', 'p90_ms', 'p99_ms', 'p99.9_ms']
+        table.insert(0, 'samples', grouped.size())
+        table['max_ms'] = grouped.max()
+        
+        return table.round(3)
     
-    def create_language_comparison(self) -> pd.DataFrame:
-        """Create language performance comparison."""
-        if not self.results:
+    def create_resource_table(self) -> pd.DataFrame:
+        """Create a CPU/memory efficiency comparison table."""
+        if 'client_usage.cpu_user' not in self.df.columns:
             return pd.DataFrame()
         
-        df = pd.DataFrame(self.results)
+        df = self.df.dropna(subset=['client_usage.cpu_user']).copy()
+        df['client_cpu'] = df['client_usage.cpu_user'] + df['client_usage.cpu_system']
+        columns = {
+            'client_cpu': 'mean',
+            'client_usage.peak_rss_kb': 'max',
+            'client_usage.voluntary_ctx_switches': 'mean',
+            'client_usage.involuntary_ctx_switches': 'mean',
+            'messages_per_cpu_second': 'mean',
+            'bytes_per_mb_rss': 'mean'
+        }
+        if 'broker_usage.cpu_user' in df.columns:
+            df['broker_cpu'] = df['broker_usage.cpu_user'] + df['broker_usage.cpu_system']
+            columns['broker_cpu'] = 'mean'
         
-        # Group by language, calculate averages
-        lang_perf = df.groupby('language').agg({
-            'messages_per_second': 'mean',
-            'duration': 'mean',
-            'bytes_sent': 'mean'
-        }).round(2)
+        resources = df.groupby(['language', 'encoding']).agg(columns).round(2)
+        resources = resources.sort_values('messages_per_cpu_second', ascending=False)
         
-        # Sort by messages per second
-        lang_perf = lang_perf.sort_values('messages_per_second', ascending=False)
+        return resources
+    
+    def create_charts(self, charts_dir: str, formats=("svg",)) -> list:
+        """
+        Render throughput-vs-size, scaling and latency CDF charts.
+        
+        Args:
+            charts_dir: Output directory for images
+            formats: Image formats ('svg', 'png')
         
-        return lang_perf
+        Returns:
+            (title, path) pairs, empty if matplotlib is not installed
+        """
+        try:
+            from charts import render_charts
+        except ImportError as e:
+            print(f"⚠ Skipping charts ({e}); install matplotlib to enable them")
+            return []
+        return render_charts(self.df, self.load_samples(), charts_dir, formats)
     
-    def generate_report(self, output_file: str = "docs/benchmark_report.md"):
-        """Generate a comprehensive benchmark report."""
+    def generate_report(self, output_file: str = "docs/benchmark_report.md", charts_dir: Optional[str] = None,
+                        chart_formats=("svg",)):
+        """
+        Generate a comprehensive benchmark report.
+        
+        Args:
+            output_file: Markdown report path
+            charts_dir: If set, render charts here and embed them in the report
+            chart_formats: Image formats for charts
+        """
         self.load_results()
         
-        if not self.results:
+        if self.df.empty:
             print("No benchmark results found.")
             return
         
@@ -123,10 +276,12 @@ class ResultsAnalyzer:
         with open(output_file, 'w') as f:
             f.write("# MQTT Comparison Benchmark Report\n\n")
             f.write("## Overview\n\n")
-            f.write(f"Total benchmark runs: {len(self.results)}\n\n")
+            f.write(f"Total benchmark runs: {len(self.df)}\n\n")
             
             # Performance table
             f.write("## Performance Comparison\n\n")
+            f.write("Throughput runs over a direct connection; ping-pong, adaptive and "
+                    "impaired-network runs are reported in their own sections.\n\n")
             perf_table = self.create_performance_table()
             f.write("### By Language and Encoding\n\n")
             f.write(perf_table.to_markdown())
@@ -144,17 +299,75 @@ class ResultsAnalyzer:
             f.write(lang_table.to_markdown())
             f.write("\n\n")
             
+            # Publish latency distribution
+            latency_table = self.create_latency_table()
+            if not latency_table.empty:
+                f.write("## Publish Latency\n\n")
+                f.write(latency_table.to_markdown())
+                f.write("\n\n")
+            
+            sample_table = self.create_sample_latency_table()
+            if not sample_table.empty:
+                f.write("### From Stored Samples\n\n")
+                f.write(sample_table.to_markdown())
+                f.write("\n\n")
+            
+            network_table = self.create_network_table()
+            if not network_table.empty:
+                f.write("## Network Impairment\n\n")
+                f.write("Runs through the impairment proxy (`benchmark.py --network`); "
+                        "completion is the fraction of messages that finished before the client gave up.\n\n")
+                f.write(network_table.to_markdown())
+                f.write("\n\n")
+            
+            saturation_table = self.create_saturation_table()
+            if not saturation_table.empty:
+                f.write("## Saturation Point\n\n")
+                f.write("Highest sustainable publish rate found by AIMD rate control (`benchmark.py --adaptive`).\n\n")
+                f.write(saturation_table.to_markdown())
+                f.write("\n\n")
+            
+            # Resource efficiency
+            resource_table = self.create_resource_table()
+            if not resource_table.empty:
+                f.write("## Resource Efficiency\n\n")
+                f.write(resource_table.to_markdown())
+                f.write("\n\n")
+            
+            # Charts
+            charts = self.create_charts(charts_dir, chart_formats) if charts_dir else []
+            if charts:
+                f.write("## Charts\n\n")
+                report_dir = os.path.dirname(os.path.abspath(output_file))
+                for title, path in charts:
+                    f.write(f"![{title}]({os.path.relpath(os.path.abspath(path), report_dir)})\n\n")
+            
             # Summary statistics
             f.write("## Summary Statistics\n\n")
             summary_table = self.create_summary_table()
             f.write(summary_table.to_markdown())
             f.write("\n\n")
-            
-            # Raw results
-            f.write("## Raw Results\n\n")
-            f.write("```json\n")
-            f.write(json.dumps(self.results, indent=2))
-            f.write("\n```\n")
+
+            # Profiles captured with --profile
+            profiled = self.df[self.df['profile'].notna()] if 'profile' in self.df else self.df.iloc[0:0]
+            if not profiled.empty:
+                f.write("## Profiles\n\n")
+                f.write("| Language | Encoding | Payload | QoS | Profile |\n")
+                f.write("|---|---|---|---:|---|\n")
+                report_dir = os.path.dirname(os.path.abspath(output_file))
+                for r in profiled.to_dict('records'):
+                    link = os.path.relpath(os.path.abspath(r['profile']), report_dir)
+                    f.write(f"| {r['language']} | {r['encoding']} | {r['payload_size']} | "
+                            f"{r['qos']} | [{os.path.basename(r['profile'])}]({link}) |\n")
+                f.write("\n")
+
+            # Where the raw data lives (no longer inlined)
+            f.write("## Data Sources\n\n")
+            f.write("| Source | Runs |\n")
+            f.write("|---|---:|\n")
+            for source, runs in self.sources.items():
+                f.write(f"| `{source}` | {runs} |\n")
+            f.write("\n")
         
         print(f"Benchmark report generated: {output_file}")
 
@@ -163,12 +376,17 @@ def main():
     """Main entry point."""
     parser = argparse.ArgumentParser(description="Analyze MQTT benchmark results")
     parser.add_argument("--results-dir", default="results", help="Results directory")
+    parser.add_argument("--store", default=None, help="Columnar results store (default: <results-dir>/store)")
     parser.add_argument("--output", default="docs/benchmark_report.md", help="Output file")
+    parser.add_argument("--charts-dir", default="docs/assets/charts",
+                        help="Directory for chart images (empty string disables charts)")
+    parser.add_argument("--chart-formats", nargs="+", choices=["svg", "png"], default=["svg"],
+                        help="Chart image formats")
     
     args = parser.parse_args()
     
-    analyzer = ResultsAnalyzer(args.results_dir)
-    analyzer.generate_report(args.output)
+    analyzer = ResultsAnalyzer(args.results_dir, args.store)
+    analyzer.generate_report(args.output, args.charts_dir or None, args.chart_formats)
 
 
 if __name__ == "__main__":
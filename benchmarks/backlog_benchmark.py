@@ -0,0 +1,434 @@
+#!/usr/bin/env python3
+"""
+Persistent-session backlog drain benchmark.
+
+For each (language, codec, QoS) cell:
+
+1. the subscriber under test starts with a fixed client id and a persistent
+   session (clean start off, session expiry), and is fed probe messages
+   until it reports one, so its subscription is known to be in place;
+2. it is interrupted, leaving the session and subscription on the broker;
+3. a backlog of QoS 1/2 messages is published and acknowledged, so the
+   broker holds all of them for the offline session;
+4. the subscriber restarts with the same client id; the broker replays the
+   backlog, and its ``[Message N]`` lines are timed on a pseudo-terminal.
+
+Reported: time to the first queued message and to catch-up (the whole
+backlog) from process spawn, and the drain rate between the two.
+"""
+
+import argparse
+import json
+import os
+import pty
+import re
+import select
+import statistics
+import subprocess
+import sys
+import threading
+import time
+import uuid
+from dataclasses import asdict, dataclass, field
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+import paho.mqtt.client as mqtt
+from paho.mqtt.packettypes import PacketTypes
+from paho.mqtt.properties import Properties
+
+from startup_benchmark import CLIENTS, JSON_ONLY, LANGUAGES, ROOT, StartupBenchmark, summarize
+
+sys.path.insert(0, str(ROOT / "python" / "src"))
+
+from publisher import parse_payload_size  # noqa: E402
+
+# Subscribers that accept --client-id, --session-expiry and --protocol; the
+# others connect with a fixed client id and a clean session
+SESSION_CLIENTS = {"python"}
+PROTOCOLS = {"3.1.1": mqtt.MQTTv311, "5": mqtt.MQTTv5}
+
+MESSAGE_LINE = re.compile(rb"\[Message\s+(\d+)\s*\]")
+RESUMED = re.compile(rb"Resumed persistent session")
+
+
+@dataclass
+class BacklogResult:
+    """Backlog drain measurements for one (language, encoding, QoS) cell."""
+    language: str
+    encoding: str
+    qos: int
+    backlog: int
+    protocol: str
+    runs: int
+    failures: int
+    messages_delivered: List[int] = field(default_factory=list)
+    enqueue_msgs_per_second: Optional[float] = None
+    drain_msgs_per_second: Optional[float] = None
+    time_to_first_message_ms: Optional[Dict[str, float]] = None
+    time_to_catch_up_ms: Optional[Dict[str, float]] = None
+    sessions_resumed: int = 0
+    scenario: str = "backlog"
+    run_id: str = ""
+    timestamp: str = ""
+
+
+class ClientOutput:
+    """A subscriber process on a pseudo-terminal whose [Message N] lines are timed as they appear."""
+
+    def __init__(self, cmd: List[str], cwd: Path):
+        master, slave = pty.openpty()
+        try:
+            self.start = time.perf_counter()
+            self.proc = subprocess.Popen(cmd, cwd=cwd, stdin=subprocess.DEVNULL, stdout=slave, stderr=slave)
+        finally:
+            os.close(slave)
+        self.master = master
+        self.count = 0
+        self.first_at: Optional[float] = None
+        self.last_at: Optional[float] = None
+        self.resumed = False
+        self.tail = b""
+
+    def read(self, timeout: float) -> bool:
+        """
+        Read whatever output is ready within timeout.
+
+        Returns:
+            False once the process has exited and closed the terminal
+        """
+        if not select.select([self.master], [], [], timeout)[0]:
+            return True
+        try:
+            chunk = os.read(self.master, 65536)
+        except OSError:  # EIO: the client exited and closed the terminal
+            chunk = b""
+        if not chunk:
+            return False
+        now = time.perf_counter()
+        # Keep a short tail so a line split across reads is still matched
+        text = self.tail + chunk
+        self.tail = text[-64:]
+        numbers = MESSAGE_LINE.findall(text)
+        if numbers and int(numbers[-1]) > self.count:
+            self.count = int(numbers[-1])
+            self.first_at = self.first_at or now
+            self.last_at = now
+        self.resumed = self.resumed or bool(RESUMED.search(text))
+        return True
+
+    def output(self) -> str:
+        """The last output seen, for error messages."""
+        return self.tail.decode(errors="replace").strip()
+
+    def stop(self):
+        """Interrupt the subscriber so it disconnects cleanly, leaving its session on the broker."""
+        StartupBenchmark._stop(self.proc, self.master)
+
+
+class BacklogBenchmark:
+    """Runs backlog drain measurements against a broker."""
+
+    def __init__(self, broker: str = "localhost", port: int = 1883, protocol: str = "5",
+                 session_expiry: int = 300, timeout: float = 120.0, idle_timeout: float = 5.0):
+        """
+        Initialize the benchmark.
+
+        Args:
+            broker: MQTT broker hostname
+            port: MQTT broker port
+            protocol: MQTT version for the session ('5' or '3.1.1')
+            session_expiry: Session Expiry Interval in seconds (MQTT 5)
+            timeout: Seconds allowed for startup and for draining the backlog
+            idle_timeout: Seconds without a new message after which a partial drain ends
+        """
+        self.broker = broker
+        self.port = port
+        self.protocol = protocol
+        self.session_expiry = session_expiry
+        self.timeout = timeout
+        self.idle_timeout = idle_timeout
+        self.results: List[BacklogResult] = []
+
+    def _command(self, language: str, encoding: str, qos: int, topic: str, client_id: str) -> Tuple[List[str], Path]:
+        cmd, cwd = CLIENTS[language]["subscriber"]
+        cmd = cmd + ["--broker", self.broker, "--port", str(self.port), "--topic", topic, "--qos", str(qos),
+                     "--client-id", client_id, "--session-expiry", str(self.session_expiry),
+                     "--protocol", self.protocol]
+        if (language, "subscriber") not in JSON_ONLY:
+            cmd += ["--encoding", encoding]
+        return cmd, ROOT / cwd
+
+    def _client(self, client_id: str) -> mqtt.Client:
+        """A harness client with a clean, non-persistent session."""
+        return mqtt.Client(mqtt.CallbackAPIVersion.VERSION2, client_id=client_id, protocol=PROTOCOLS[self.protocol])
+
+    def _connect(self, client: mqtt.Client):
+        if self.protocol == "5":
+            properties = Properties(PacketTypes.CONNECT)
+            properties.SessionExpiryInterval = 0
+            client.connect(self.broker, self.port, 60, clean_start=True, properties=properties)
+        else:
+            client.connect(self.broker, self.port, 60)
+
+    def prime(self, cmd: List[str], cwd: Path, topic: str, payload: bytes, qos: int):
+        """
+        Start the subscriber once so it creates its session and subscription, then take it offline.
+
+        Raises:
+            RuntimeError: If it reports no probe message within the timeout
+        """
+        probe = self._client(f"backlog-probe-{uuid.uuid4().hex[:8]}")
+        self._connect(probe)
+        probe.loop_start()
+        client = ClientOutput(cmd, cwd)
+        try:
+            deadline = client.start + self.timeout
+            while not client.count:
+                if time.perf_counter() > deadline:
+                    raise RuntimeError(f"no probe message within {self.timeout:.0f}s: {client.output()[-200:]}")
+                probe.publish(topic, payload, qos=qos)
+                if not client.read(0.005):
+                    raise RuntimeError(f"exited with code {client.proc.wait()}: {client.output()[-200:]}")
+            # Let probes already in flight arrive now rather than join the backlog
+            settle = time.perf_counter() + 0.5
+            while time.perf_counter() < settle:
+                client.read(0.05)
+        finally:
+            client.stop()
+            probe.loop_stop()
+            probe.disconnect()
+
+    def enqueue(self, topic: str, payload: bytes, count: int, qos: int) -> float:
+        """
+        Publish the backlog and wait until the broker has acknowledged all of it.
+
+        Returns:
+            Seconds from the first publish to the last acknowledgement
+
+        Raises:
+            RuntimeError: If not every message is acknowledged within the timeout
+        """
+        acked = [0]
+        done = threading.Event()
+
+        def on_publish(client, userdata, mid, reason_code, properties):
+            acked[0] += 1
+            if acked[0] >= count:
+                done.set()
+
+        publisher = self._client(f"backlog-pub-{uuid.uuid4().hex[:8]}")
+        publisher.max_inflight_messages_set(1000)
+        publisher.max_queued_messages_set(0)
+        publisher.on_publish = on_publish
+        self._connect(publisher)
+        publisher.loop_start()
+        try:
+            start = time.perf_counter()
+            for _ in range(count):
+                publisher.publish(topic, payload, qos=qos)
+            if not done.wait(self.timeout):
+                raise RuntimeError(f"only {acked[0]}/{count} backlog messages acknowledged")
+            return time.perf_counter() - start
+        finally:
+            publisher.loop_stop()
+            publisher.disconnect()
+
+    def drain(self, cmd: List[str], cwd: Path, backlog: int) -> Dict[str, Any]:
+        """
+        Restart the subscriber on its session and time the replay of the backlog.
+
+        Returns:
+            One sample: delivered count, first-message and catch-up times (ms from spawn),
+            drain rate and whether the session was resumed
+
+        Raises:
+            RuntimeError: If no queued message arrives within the timeout
+        """
+        client = ClientOutput(cmd, cwd)
+        try:
+            deadline = client.start + self.timeout
+            while client.count < backlog and time.perf_counter() < deadline:
+                if not client.read(0.05):
+                    break
+                if client.last_at and time.perf_counter() - client.last_at > self.idle_timeout:
+                    break  # the broker has nothing more queued
+        finally:
+            client.stop()
+        if client.first_at is None:
+            raise RuntimeError(f"no queued message within {self.timeout:.0f}s: {client.output()[-200:]}")
+        span = client.last_at - client.first_at
+        return {"delivered": client.count, "resumed": client.resumed,
+                "first_ms": (client.first_at - client.start) * 1000,
+                "catch_up_ms": (client.last_at - client.start) * 1000,
+                "drain_msgs_per_second": (client.count - 1) / span if span > 0 else 0.0}
+
+    def clear_session(self, client_id: str):
+        """Remove a session left on the broker by connecting with a clean start and no expiry."""
+        client = self._client(client_id)
+        try:
+            self._connect(client)
+            client.loop_start()
+            time.sleep(0.1)
+            client.loop_stop()
+            client.disconnect()
+        except OSError:
+            pass
+
+    def run(self, language: str, encoding: str, qos: int, backlog: int, runs: int,
+            payload: bytes) -> Optional[BacklogResult]:
+        """
+        Measure one cell.
+
+        Args:
+            language: Client language
+            encoding: Encoding format
+            qos: QoS for the subscription and the backlog (1 or 2)
+            backlog: Messages queued while the subscriber is offline
+            runs: Measured offline/reconnect cycles
+            payload: Encoded message published as the backlog
+
+        Returns:
+            BacklogResult, or None if the cell was skipped
+        """
+        if language not in SESSION_CLIENTS:
+            print(f"⚠ {language} subscriber has no persistent-session options; skipping")
+            return None
+        if (language, "subscriber") in JSON_ONLY and encoding != "json":
+            print(f"⚠ {language} subscriber supports only json; skipping {encoding}")
+            return None
+        print(f"\nDraining {backlog} queued messages: {language} subscriber, {encoding}, QoS {qos}...")
+        samples: List[Dict[str, Any]] = []
+        enqueue_rates: List[float] = []
+        failures = 0
+        for i in range(runs):
+            client_id = f"backlog-{language}-{uuid.uuid4().hex[:8]}"
+            topic = f"mqtt-comparison/backlog/{client_id}"
+            cmd, cwd = self._command(language, encoding, qos, topic, client_id)
+            try:
+                self.prime(cmd, cwd, topic, payload, qos)
+                enqueue_seconds = self.enqueue(topic, payload, backlog, qos)
+                sample = self.drain(cmd, cwd, backlog)
+            except FileNotFoundError as e:
+                print(f"  ✗ {language} subscriber not available ({e.filename}); build it first")
+                return None
+            except (RuntimeError, OSError) as e:
+                failures += 1
+                print(f"  ✗ Run {i + 1}: {e}")
+                continue
+            finally:
+                self.clear_session(client_id)
+            enqueue_rates.append(backlog / enqueue_seconds)
+            samples.append(sample)
+            mark = "✓" if sample["delivered"] >= backlog else "⚠"
+            print(f"  {mark} Run {i + 1}: {sample['delivered']}/{backlog} in {sample['catch_up_ms']:.0f}ms "
+                  f"({sample['drain_msgs_per_second']:.0f} msg/s, first after {sample['first_ms']:.0f}ms)"
+                  + ("" if sample["resumed"] else ", session not reported as resumed"))
+
+        result = BacklogResult(
+            language=language,
+            encoding=encoding,
+            qos=qos,
+            backlog=backlog,
+            protocol=self.protocol,
+            runs=len(samples),
+            failures=failures,
+            messages_delivered=[s["delivered"] for s in samples],
+            enqueue_msgs_per_second=statistics.median(enqueue_rates) if enqueue_rates else None,
+            drain_msgs_per_second=(statistics.median(s["drain_msgs_per_second"] for s in samples)
+                                   if samples else None),
+            time_to_first_message_ms=summarize([s["first_ms"] for s in samples]),
+            time_to_catch_up_ms=summarize([s["catch_up_ms"] for s in samples]),
+            sessions_resumed=sum(s["resumed"] for s in samples),
+            run_id=uuid.uuid4().hex[:12],
+            timestamp=datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
+        )
+        if samples:
+            print(f"  ✓ Drain: {result.drain_msgs_per_second:.0f} msg/s, catch-up p50 "
+                  f"{result.time_to_catch_up_ms['p50']:.0f}ms (enqueued at {result.enqueue_msgs_per_second:.0f} msg/s)")
+        self.results.append(result)
+        return result
+
+    def print_summary(self):
+        """Print a table of median drain rates and catch-up times."""
+        if not self.results:
+            print("\nNo backlog results to display")
+            return
+        print("\n" + "=" * 60)
+        print("BACKLOG DRAIN SUMMARY")
+        print("=" * 60)
+        print(f"{'language':<10} {'encoding':<9} {'qos':>3} {'backlog':>8} {'drain/s':>9} {'catch-up':>10} {'lost':>6}")
+        for r in self.results:
+            drain = f"{r.drain_msgs_per_second:.0f}" if r.drain_msgs_per_second else "—"
+            catch_up = f"{r.time_to_catch_up_ms['p50']:.0f}ms" if r.time_to_catch_up_ms else "—"
+            lost = max((r.backlog - d for d in r.messages_delivered), default=0)
+            print(f"{r.language:<10} {r.encoding:<9} {r.qos:>3} {r.backlog:>8} {drain:>9} {catch_up:>10} "
+                  f"{max(lost, 0):>6}")
+
+    def save_results(self, output_file: str):
+        """
+        Save backlog results to a JSON file.
+
+        Args:
+            output_file: Output file path
+        """
+        Path(output_file).parent.mkdir(parents=True, exist_ok=True)
+        with open(output_file, "w") as f:
+            json.dump([asdict(r) for r in self.results], f, indent=2)
+        print(f"\n✓ Results saved to {output_file}")
+
+
+def backlog_payload(encoding: str, payload_size: str) -> bytes:
+    """A valid SensorData message of the given size, built with the Python publisher."""
+    from publisher import SensorDataPublisher
+    publisher = SensorDataPublisher(encoding=encoding)
+    return publisher.encode_message(publisher.create_sensor_data("backlog", payload_size))
+
+
+def main():
+    """Main entry point."""
+    parser = argparse.ArgumentParser(description="Persistent-session backlog drain benchmark")
+    parser.add_argument("--broker", default="localhost", help="MQTT broker hostname")
+    parser.add_argument("--port", type=int, default=1883, help="MQTT broker port")
+    parser.add_argument("--languages", nargs="+", choices=LANGUAGES, default=["python"],
+                        help="Subscriber languages to measure")
+    parser.add_argument("--encodings", nargs="+", default=["json"], help="Encodings to measure")
+    parser.add_argument("--qos", nargs="+", type=int, choices=[1, 2], default=[1, 2],
+                        help="QoS levels (queued delivery needs QoS 1 or 2)")
+    parser.add_argument("--backlog", type=int, default=10000, help="Messages queued while offline")
+    parser.add_argument("--payload", type=parse_payload_size, default="small", help="Payload size variant or target encoded size")
+    parser.add_argument("--runs", type=int, default=3, help="Offline/reconnect cycles per cell")
+    parser.add_argument("--protocol", choices=list(PROTOCOLS), default="5",
+                        help="MQTT version of the session (3.1.1 sessions have no expiry)")
+    parser.add_argument("--session-expiry", type=int, default=300,
+                        help="Session Expiry Interval in seconds (MQTT 5)")
+    parser.add_argument("--timeout", type=float, default=120.0,
+                        help="Seconds allowed for startup and for draining each backlog")
+    parser.add_argument("--output", default="results/backlog_results.json", help="Output file for results")
+
+    args = parser.parse_args()
+
+    print("=" * 60)
+    print("PERSISTENT-SESSION BACKLOG BENCHMARK")
+    print("=" * 60)
+    print(f"Broker: {args.broker}:{args.port} (MQTT {args.protocol})")
+    print(f"Languages: {', '.join(args.languages)}")
+    print(f"Encodings: {', '.join(args.encodings)}")
+    print(f"Backlog: {args.backlog} {args.payload} messages, {args.runs} runs")
+
+    benchmark = BacklogBenchmark(args.broker, args.port, args.protocol, args.session_expiry, args.timeout)
+    try:
+        for language in args.languages:
+            for encoding in args.encodings:
+                payload = backlog_payload(encoding, args.payload)
+                for qos in args.qos:
+                    benchmark.run(language, encoding, qos, args.backlog, args.runs, payload)
+        benchmark.print_summary()
+        benchmark.save_results(args.output)
+    except KeyboardInterrupt:
+        print("\n\n✗ Benchmark interrupted")
+
+
+if __name__ == "__main__":
+    main()
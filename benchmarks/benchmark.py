@@ -7,12 +7,53 @@ Runs performance benchmarks across different languages and encodings.
 
 import argparse
 import json
+import math
+import re
 import subprocess
 import time
+import uuid
+from contextlib import contextmanager
+from datetime import datetime, timezone
 from pathlib import Path
-from typing import Dict, List, Any
+from typing import Dict, List, Any, Optional
 from dataclasses import dataclass, asdict
 
+from netem_proxy import PROFILES as NETWORK_PROFILES, ImpairmentProxy, parse_impairment
+from records import RecordStream
+from resource_usage import ResourceUsage, find_broker_pid, read_proc_usage, run_with_usage, usage_delta
+
+
+PAYLOAD_VARIANTS = ["small", "medium", "large"]
+# Encodings implemented only by the Python clients
+PYTHON_ONLY_ENCODINGS = ["struct"]
+SIZE_UNITS = {"": 1, "b": 1, "kb": 1024, "mb": 1024 ** 2}
+
+
+def parse_size(value: str) -> int:
+    """Parse a byte size such as '64', '64B', '16KB' or '4MB'."""
+    match = re.fullmatch(r"(\d+)\s*([kKmM]?[bB]?)", value.strip())
+    if not match or match.group(2).lower() not in SIZE_UNITS:
+        raise argparse.ArgumentTypeError(f"invalid size {value!r}: expected e.g. 64, 16KB, 4MB")
+    return int(match.group(1)) * SIZE_UNITS[match.group(2).lower()]
+
+
+def sweep_sizes(minimum: int, maximum: int, points: int) -> List[str]:
+    """
+    Log-spaced target payload sizes for a size sweep.
+
+    Args:
+        minimum: Smallest target size in bytes
+        maximum: Largest target size in bytes
+        points: Number of sizes (including both ends)
+
+    Returns:
+        Distinct sizes in bytes as decimal strings, ascending
+    """
+    if points < 2 or minimum >= maximum:
+        return [str(minimum)]
+    ratio = math.log(maximum / minimum) / (points - 1)
+    return [str(size) for size in sorted({round(minimum * math.exp(ratio * i)) for i in range(points)})]
+
 
 @dataclass
 class BenchmarkResult:
@@ -23,24 +64,191 @@ class BenchmarkResult:
     duration: float
     messages_per_second: float
     bytes_sent: int
+    payload_size: str = "small"
+    qos: int = 1
+    profile: Optional[str] = None
+    client_usage: Optional[ResourceUsage] = None
+    broker_usage: Optional[ResourceUsage] = None
+    messages_per_cpu_second: float = 0.0
+    bytes_per_mb_rss: float = 0.0
+    publish_latency_ms: Optional[Dict[str, float]] = None
+    scenario: str = "throughput"
+    rtt_ms: Optional[Dict[str, float]] = None
+    run_id: str = ""
+    timestamp: str = ""
+    protobuf_backend: Optional[str] = None
+    saturation_msgs_per_second: Optional[float] = None
+    network: str = "direct"
+    network_resets: int = 0
+    messages_completed: Optional[int] = None
 
 
 class BenchmarkHarness:
     """Harness for running MQTT benchmarks."""
 
-    def __init__(self, broker: str = "localhost", port: int = 1883):
+    def __init__(self, broker: str = "localhost", port: int = 1883, profile: Optional[str] = None,
+                 profile_dir: str = "results/python/profiles", broker_pid: Optional[int] = None,
+                 samples_dir: Optional[str] = None, store_dir: Optional[str] = None):
         """
         Initialize the benchmark harness.
 
         Args:
             broker: MQTT broker hostname
             port: MQTT broker port
+            profile: Default profiling mode for Python cells ('cprofile', 'sample' or None)
+            profile_dir: Directory for profile output files
+            broker_pid: PID of the broker process to account (auto-detected if None)
+            samples_dir: If set, persist per-message records as JSONL samples here
+            store_dir: If set, append runs and per-message samples to this columnar store
         """
         self.broker = broker
         self.port = port
+        self.profile = profile
+        self.profile_dir = Path(profile_dir)
+        self.broker_pid = broker_pid or find_broker_pid()
+        self.samples_dir = Path(samples_dir) if samples_dir else None
+        self.store_dir = store_dir
+        # Sample columns are buffered until save_results(): a client's ru_maxrss
+        # includes the harness RSS at fork time, so pandas/pyarrow must not be
+        # loaded while clients are still being launched.
+        self.pending_samples: List[Any] = []
         self.results: List[BenchmarkResult] = []
+        self.network = "direct"
+        self.proxy: Optional[ImpairmentProxy] = None
+
+    @contextmanager
+    def impaired(self, spec: str):
+        """
+        Route every client started inside the block through an impairment proxy.
+
+        Args:
+            spec: Network profile name or key=value spec (see netem_proxy.parse_impairment)
+        """
+        impairment = parse_impairment(spec)
+        if impairment.direct:
+            yield None
+            return
+        proxy = ImpairmentProxy(impairment, self.broker, self.port)
+        proxy.start()
+        broker, port = self.broker, self.port
+        self.broker, self.port, self.network, self.proxy = "127.0.0.1", proxy.port, impairment.name, proxy
+        try:
+            yield proxy
+        finally:
+            proxy.stop()
+            self.broker, self.port, self.network, self.proxy = broker, port, "direct", None
+
+    def _measure(self, language: str, cmd: List[str], encoding: str, message_count: int,
+                 payload_size: str, qos: int, cwd: Optional[str] = None,
+                 scenario: str = "throughput") -> BenchmarkResult:
+        """
+        Run a publisher command and build its BenchmarkResult.
+
+        The client's per-message records are streamed through a FIFO into a
+        latency histogram; if it emits none, bytes_sent falls back to an
+        estimate from the payload variant.
+
+        Args:
+            language: Programming language
+            cmd: Publisher command line
+            encoding: Encoding format
+            message_count: Number of messages sent
+            payload_size: Payload size variant
+            qos: Quality of Service level
+            cwd: Working directory for the command
+            scenario: 'throughput' or 'adaptive' (records carry pub_ms) or 'pingpong' (records carry rtt_ms)
 
-    def run_python_benchmark(self, encoding: str, message_count: int, payload_size: str = "small", qos: int = 1) -> BenchmarkResult:
+        Returns:
+            BenchmarkResult object
+        """
+        record_field = "rtt_ms" if scenario == "pingpong" else "pub_ms"
+        run_id = uuid.uuid4().hex[:12]
+        timestamp = datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
+        samples_path = None
+        if self.samples_dir:
+            prefix = "" if scenario == "throughput" else f"{scenario}_"
+            if self.network != "direct":
+                prefix += f"{self.network}_"
+            samples_path = self.samples_dir / language / f"{prefix}{encoding}_qos{qos}_{payload_size}.jsonl"
+        stream = RecordStream(
+            context={"lang": language, "role": "pingpong" if scenario == "pingpong" else "pub",
+                     "enc": encoding, "variant": payload_size, "qos": qos,
+                     "net": self.network, "ts": timestamp},
+            samples_path=samples_path,
+            field=record_field,
+            keep_columns=self.store_dir is not None
+        )
+        cmd = cmd + stream.args()
+        stream.start()
+
+        broker_before = read_proc_usage(self.broker_pid) if self.broker_pid else None
+        resets_before = self.proxy.resets if self.proxy else 0
+        start_time = time.time()
+
+        result, client_usage = run_with_usage(cmd, cwd=cwd)
+
+        duration = time.time() - start_time
+        stream.finish()
+        if self.store_dir and stream.records:
+            self.pending_samples.append((
+                {"language": language, "encoding": encoding, "run_id": run_id, "scenario": scenario,
+                 "payload_size": payload_size, "qos": qos, "network": self.network, "timestamp": timestamp},
+                stream.columns
+            ))
+        broker_after = read_proc_usage(self.broker_pid) if self.broker_pid else None
+        broker_usage = usage_delta(broker_before, broker_after) if broker_before and broker_after else None
+        # Clients that emit records report how many messages actually completed
+        # (a reset link can end a run early)
+        completed = stream.records if stream.records else None
+        messages_per_second = (completed or message_count) / duration if duration > 0 else 0
+
+        # Estimate bytes based on payload size
+        if payload_size.isdigit():
+            avg_message_size = int(payload_size)
+        elif payload_size == "small":
+            avg_message_size = 150 if encoding == "json" else 100
+        elif payload_size == "medium":
+            avg_message_size = 2000 if encoding == "json" else 1500
+        else:  # large
+            avg_message_size = 64000 if encoding == "json" else 50000
+
+        bytes_sent = stream.bytes if stream.records else message_count * avg_message_size
+
+        # Clients report their protobuf runtime (upb/cpp/python for Python) on stdout
+        backend = re.search(r"^Protobuf backend: (\S+)", result.stdout or "", re.MULTILINE)
+        # Adaptive publishers report the rate at which ack latency crossed the target
+        saturation = re.search(r"^✓ Saturation point: ([\d.]+) msg/s", result.stdout or "", re.MULTILINE)
+
+        cpu_seconds = client_usage.cpu_total
+        rss_mb = client_usage.peak_rss_kb / 1024
+
+        return BenchmarkResult(
+            language=language,
+            encoding=encoding,
+            message_count=message_count,
+            duration=duration,
+            messages_per_second=messages_per_second,
+            bytes_sent=bytes_sent,
+            payload_size=payload_size,
+            qos=qos,
+            client_usage=client_usage,
+            broker_usage=broker_usage,
+            messages_per_cpu_second=(completed or message_count) / cpu_seconds if cpu_seconds > 0 else 0,
+            bytes_per_mb_rss=bytes_sent / rss_mb if rss_mb > 0 else 0,
+            publish_latency_ms=stream.latency.summary() if stream.records and record_field == "pub_ms" else None,
+            scenario=scenario,
+            rtt_ms=stream.latency.summary() if stream.records and record_field == "rtt_ms" else None,
+            run_id=run_id,
+            timestamp=timestamp,
+            protobuf_backend=backend.group(1) if backend else None,
+            saturation_msgs_per_second=float(saturation.group(1)) if saturation else None,
+            network=self.network,
+            network_resets=(self.proxy.resets - resets_before) if self.proxy else 0,
+            messages_completed=completed
+        )
+
+    def run_python_benchmark(self, encoding: str, message_count: int, payload_size: str = "small", qos: int = 1,
+                             profile: Optional[str] = None) -> BenchmarkResult:
         """
         Run Python benchmark.
 
@@ -49,14 +257,14 @@ class BenchmarkHarness:
             message_count: Number of messages to send
             payload_size: Payload size variant ('small', 'medium', 'large')
             qos: Quality of Service level
+            profile: Profiling mode for this cell, overriding the harness default
 
         Returns:
             BenchmarkResult object
         """
         print(f"\nRunning Python benchmark with {encoding} encoding, {payload_size} payload, QoS {qos}...")
         
-        start_time = time.time()
-        
+        profile = profile or self.profile
         cmd = [
             "python3",
             "python/src/publisher.py",
@@ -68,30 +276,100 @@ class BenchmarkHarness:
             "--payload", payload_size,
             "--qos", str(qos)
         ]
-        
-        result = subprocess.run(cmd, capture_output=True, text=True)
-        
-        duration = time.time() - start_time
-        messages_per_second = message_count / duration if duration > 0 else 0
-        
-        # Estimate bytes based on payload size
-        if payload_size == "small":
-            avg_message_size = 150 if encoding == "json" else 100
-        elif payload_size == "medium":
-            avg_message_size = 2000 if encoding == "json" else 1500
-        else:  # large
-            avg_message_size = 64000 if encoding == "json" else 50000
-        
-        bytes_sent = message_count * avg_message_size
-        
-        return BenchmarkResult(
-            language="python",
-            encoding=encoding,
-            message_count=message_count,
-            duration=duration,
-            messages_per_second=messages_per_second,
-            bytes_sent=bytes_sent
-        )
+        profile_path = None
+        if profile:
+            # One file per cell on every network, so impaired runs do not overwrite the direct one
+            profile_path = self.profile_dir / f"throughput_{self.network}_{encoding}_qos{qos}_{payload_size}"
+            cmd += ["--profile", profile, "--profile-output", str(profile_path)]
+        
+        result = self._measure("python", cmd, encoding, message_count, payload_size, qos)
+        if profile_path:
+            result.profile = str(profile_path.with_suffix(".txt"))
+        return result
+
+    def run_pingpong_benchmark(self, encoding: str, message_count: int, payload_size: str = "small",
+                               qos: int = 1) -> BenchmarkResult:
+        """
+        Run a Python round-trip (ping-pong) latency benchmark.
+
+        Starts an echo responder, then times each request/reply round trip
+        with the driver's single monotonic clock.
+
+        Args:
+            encoding: Encoding format
+            message_count: Number of measured round trips
+            payload_size: Payload size variant ('small', 'medium', 'large')
+            qos: Quality of Service level
+
+        Returns:
+            BenchmarkResult object with rtt_ms percentiles
+        """
+        print(f"\nRunning Python ping-pong with {encoding} encoding, {payload_size} payload, QoS {qos}...")
+
+        request_topic = f"mqtt-comparison/pingpong/{encoding}/req"
+        reply_topic = f"mqtt-comparison/pingpong/{encoding}/rep"
+        responder = subprocess.Popen([
+            "python3", "python/src/subscriber.py",
+            "--broker", self.broker,
+            "--port", str(self.port),
+            "--encoding", encoding,
+            "--topic", request_topic,
+            "--echo", reply_topic,
+            "--qos", str(qos)
+        ], stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        time.sleep(1)  # Wait for responder to subscribe
+
+        cmd = [
+            "python3",
+            "python/src/pingpong.py",
+            "--broker", self.broker,
+            "--port", str(self.port),
+            "--encoding", encoding,
+            "--topic", request_topic,
+            "--reply-topic", reply_topic,
+            "--count", str(message_count),
+            "--payload", payload_size,
+            "--qos", str(qos)
+        ]
+
+        try:
+            return self._measure("python", cmd, encoding, message_count, payload_size, qos, scenario="pingpong")
+        finally:
+            responder.terminate()
+            responder.wait()
+
+    def run_adaptive_benchmark(self, encoding: str, message_count: int, payload_size: str = "small",
+                               qos: int = 1) -> BenchmarkResult:
+        """
+        Run a Python saturation benchmark.
+
+        The publisher pipelines messages and lets an AIMD controller raise the
+        rate until ack latency crosses its target; the rate at which that
+        happens is reported as saturation_msgs_per_second.
+
+        Args:
+            encoding: Encoding format
+            message_count: Number of messages to send (enough for several back-offs)
+            payload_size: Payload size variant ('small', 'medium', 'large')
+            qos: Quality of Service level
+
+        Returns:
+            BenchmarkResult object with saturation_msgs_per_second and ack latencies
+        """
+        print(f"\nRunning Python adaptive-rate benchmark with {encoding} encoding, {payload_size} payload, QoS {qos}...")
+
+        cmd = [
+            "python3",
+            "python/src/publisher.py",
+            "--broker", self.broker,
+            "--port", str(self.port),
+            "--encoding", encoding,
+            "--count", str(message_count),
+            "--payload", payload_size,
+            "--qos", str(qos),
+            "--adaptive"
+        ]
+        return self._measure("python", cmd, encoding, message_count, payload_size, qos, scenario="adaptive")
 
     def run_rust_benchmark(self, encoding: str, message_count: int, payload_size: str = "small", qos: int = 1) -> BenchmarkResult:
         """
@@ -108,8 +386,6 @@ class BenchmarkHarness:
         """
         print(f"\nRunning Rust benchmark with {encoding} encoding, {payload_size} payload, QoS {qos}...")
         
-        start_time = time.time()
-        
         cmd = [
             "cargo", "run", "--bin", "publisher", "--release", "--",
             "--broker", self.broker,
@@ -121,29 +397,7 @@ class BenchmarkHarness:
             "--qos", str(qos)
         ]
         
-        result = subprocess.run(cmd, capture_output=True, text=True, cwd="rust")
-        
-        duration = time.time() - start_time
-        messages_per_second = message_count / duration if duration > 0 else 0
-        
-        # Estimate bytes based on payload size
-        if payload_size == "small":
-            avg_message_size = 150 if encoding == "json" else 100
-        elif payload_size == "medium":
-            avg_message_size = 2000 if encoding == "json" else 1500
-        else:  # large
-            avg_message_size = 64000 if encoding == "json" else 50000
-        
-        bytes_sent = message_count * avg_message_size
-        
-        return BenchmarkResult(
-            language="rust",
-            encoding=encoding,
-            message_count=message_count,
-            duration=duration,
-            messages_per_second=messages_per_second,
-            bytes_sent=bytes_sent
-        )
+        return self._measure("rust", cmd, encoding, message_count, payload_size, qos, cwd="rust")
 
     def run_c_benchmark(self, encoding: str, message_count: int, payload_size: str = "small", qos: int = 1) -> BenchmarkResult:
         """
@@ -160,8 +414,6 @@ class BenchmarkHarness:
         """
         print(f"\nRunning C benchmark with {encoding} encoding, {payload_size} payload, QoS {qos}...")
         
-        start_time = time.time()
-        
         cmd = [
             "./c/bin/publisher",
             "--broker", self.broker,
@@ -172,29 +424,7 @@ class BenchmarkHarness:
             "--qos", str(qos)
         ]
         
-        result = subprocess.run(cmd, capture_output=True, text=True)
-        
-        duration = time.time() - start_time
-        messages_per_second = message_count / duration if duration > 0 else 0
-        
-        # Estimate bytes based on payload size
-        if payload_size == "small":
-            avg_message_size = 150 if encoding == "json" else 100
-        elif payload_size == "medium":
-            avg_message_size = 2000 if encoding == "json" else 1500
-        else:  # large
-            avg_message_size = 64000 if encoding == "json" else 50000
-        
-        bytes_sent = message_count * avg_message_size
-        
-        return BenchmarkResult(
-            language="c",
-            encoding=encoding,
-            message_count=message_count,
-            duration=duration,
-            messages_per_second=messages_per_second,
-            bytes_sent=bytes_sent
-        )
+        return self._measure("c", cmd, encoding, message_count, payload_size, qos)
 
     def run_cpp_benchmark(self, encoding: str, message_count: int, payload_size: str = "small", qos: int = 1) -> BenchmarkResult:
         """
@@ -211,8 +441,6 @@ class BenchmarkHarness:
         """
         print(f"\nRunning C++ benchmark with {encoding} encoding, {payload_size} payload, QoS {qos}...")
         
-        start_time = time.time()
-        
         cmd = [
             "./cpp/bin/publisher",
             "--broker", self.broker,
@@ -223,29 +451,7 @@ class BenchmarkHarness:
             "--qos", str(qos)
         ]
         
-        result = subprocess.run(cmd, capture_output=True, text=True)
-        
-        duration = time.time() - start_time
-        messages_per_second = message_count / duration if duration > 0 else 0
-        
-        # Estimate bytes based on payload size
-        if payload_size == "small":
-            avg_message_size = 150 if encoding == "json" else 100
-        elif payload_size == "medium":
-            avg_message_size = 2000 if encoding == "json" else 1500
-        else:  # large
-            avg_message_size = 64000 if encoding == "json" else 50000
-        
-        bytes_sent = message_count * avg_message_size
-        
-        return BenchmarkResult(
-            language="cpp",
-            encoding=encoding,
-            message_count=message_count,
-            duration=duration,
-            messages_per_second=messages_per_second,
-            bytes_sent=bytes_sent
-        )
+        return self._measure("cpp", cmd, encoding, message_count, payload_size, qos)
 
     def run_julia_benchmark(self, encoding: str, message_count: int, payload_size: str = "small", qos: int = 1) -> BenchmarkResult:
         """
@@ -262,8 +468,6 @@ class BenchmarkHarness:
         """
         print(f"\nRunning Julia benchmark with {encoding} encoding, {payload_size} payload, QoS {qos}...")
         
-        start_time = time.time()
-        
         cmd = [
             "julia", "--project=.", "src/publisher.jl",
             "--broker", self.broker,
@@ -274,29 +478,7 @@ class BenchmarkHarness:
             "--qos", str(qos)
         ]
         
-        result = subprocess.run(cmd, capture_output=True, text=True, cwd="julia")
-        
-        duration = time.time() - start_time
-        messages_per_second = message_count / duration if duration > 0 else 0
-        
-        # Estimate bytes based on payload size
-        if payload_size == "small":
-            avg_message_size = 150 if encoding == "json" else 100
-        elif payload_size == "medium":
-            avg_message_size = 2000 if encoding == "json" else 1500
-        else:  # large
-            avg_message_size = 64000 if encoding == "json" else 50000
-        
-        bytes_sent = message_count * avg_message_size
-        
-        return BenchmarkResult(
-            language="julia",
-            encoding=encoding,
-            message_count=message_count,
-            duration=duration,
-            messages_per_second=messages_per_second,
-            bytes_sent=bytes_sent
-        )
+        return self._measure("julia", cmd, encoding, message_count, payload_size, qos, cwd="julia")
 
     def run_r_benchmark(self, encoding: str, message_count: int, payload_size: str = "small", qos: int = 1) -> BenchmarkResult:
         """
@@ -313,8 +495,6 @@ class BenchmarkHarness:
         """
         print(f"\nRunning R benchmark with {encoding} encoding, {payload_size} payload, QoS {qos}...")
         
-        start_time = time.time()
-        
         cmd = [
             "Rscript", "publisher.R",
             "--broker", self.broker,
@@ -325,29 +505,7 @@ class BenchmarkHarness:
             "--qos", str(qos)
         ]
         
-        result = subprocess.run(cmd, capture_output=True, text=True, cwd="r")
-        
-        duration = time.time() - start_time
-        messages_per_second = message_count / duration if duration > 0 else 0
-        
-        # Estimate bytes based on payload size
-        if payload_size == "small":
-            avg_message_size = 150 if encoding == "json" else 100
-        elif payload_size == "medium":
-            avg_message_size = 2000 if encoding == "json" else 1500
-        else:  # large
-            avg_message_size = 64000 if encoding == "json" else 50000
-        
-        bytes_sent = message_count * avg_message_size
-        
-        return BenchmarkResult(
-            language="r",
-            encoding=encoding,
-            message_count=message_count,
-            duration=duration,
-            messages_per_second=messages_per_second,
-            bytes_sent=bytes_sent
-        )
+        return self._measure("r", cmd, encoding, message_count, payload_size, qos, cwd="r")
 
     def run_csharp_benchmark(self, encoding: str, message_count: int, payload_size: str = "small", qos: int = 1) -> BenchmarkResult:
         """
@@ -364,8 +522,6 @@ class BenchmarkHarness:
         """
         print(f"\nRunning C# benchmark with {encoding} encoding, {payload_size} payload, QoS {qos}...")
         
-        start_time = time.time()
-        
         cmd = [
             "dotnet", "run", "--project", "MQTTComparison.csproj", "--",
             "--publisher",
@@ -377,29 +533,7 @@ class BenchmarkHarness:
             "--qos", str(qos)
         ]
         
-        result = subprocess.run(cmd, capture_output=True, text=True, cwd="csharp")
-        
-        duration = time.time() - start_time
-        messages_per_second = message_count / duration if duration > 0 else 0
-        
-        # Estimate bytes based on payload size
-        if payload_size == "small":
-            avg_message_size = 150 if encoding == "json" else 100
-        elif payload_size == "medium":
-            avg_message_size = 2000 if encoding == "json" else 1500
-        else:  # large
-            avg_message_size = 64000 if encoding == "json" else 50000
-        
-        bytes_sent = message_count * avg_message_size
-        
-        return BenchmarkResult(
-            language="csharp",
-            encoding=encoding,
-            message_count=message_count,
-            duration=duration,
-            messages_per_second=messages_per_second,
-            bytes_sent=bytes_sent
-        )
+        return self._measure("csharp", cmd, encoding, message_count, payload_size, qos, cwd="csharp")
 
     def run_java_benchmark(self, encoding: str, message_count: int, payload_size: str = "small", qos: int = 1) -> BenchmarkResult:
         """
@@ -416,8 +550,6 @@ class BenchmarkHarness:
         """
         print(f"\nRunning Java benchmark with {encoding} encoding, {payload_size} payload, QoS {qos}...")
         
-        start_time = time.time()
-        
         cmd = [
             "java", "-jar", "target/mqtt-java-1.0.0.jar", "publisher",
             "--broker", self.broker,
@@ -429,31 +561,10 @@ class BenchmarkHarness:
             "--encoding", encoding
         ]
         
-        result = subprocess.run(cmd, capture_output=True, text=True, cwd="java")
-        
-        duration = time.time() - start_time
-        messages_per_second = message_count / duration if duration > 0 else 0
-        
-        # Estimate bytes based on payload size
-        if payload_size == "small":
-            avg_message_size = 150 if encoding == "json" else 100
-        elif payload_size == "medium":
-            avg_message_size = 2000 if encoding == "json" else 1500
-        else:  # large
-            avg_message_size = 64000 if encoding == "json" else 50000
-        
-        bytes_sent = message_count * avg_message_size
-        
-        return BenchmarkResult(
-            language="java",
-            encoding=encoding,
-            message_count=message_count,
-            duration=duration,
-            messages_per_second=messages_per_second,
-            bytes_sent=bytes_sent
-        )
+        return self._measure("java", cmd, encoding, message_count, payload_size, qos, cwd="java")
 
-    def run_benchmark(self, language: str, encoding: str, message_count: int, payload_size: str = "small", qos: int = 1):
+    def run_benchmark(self, language: str, encoding: str, message_count: int, payload_size: str = "small", qos: int = 1,
+                      profile: Optional[str] = None):
         """
         Run benchmark for specified language and encoding.
 
@@ -463,9 +574,18 @@ class BenchmarkHarness:
             message_count: Number of messages
             payload_size: Payload size variant
             qos: Quality of Service level
+            profile: Profiling mode for this cell, overriding the harness default
         """
+        if encoding in PYTHON_ONLY_ENCODINGS and language != "python":
+            print(f"⚠ {encoding} encoding is only implemented for Python, skipping {language}")
+            return
+        if payload_size not in PAYLOAD_VARIANTS and language != "python":
+            print(f"⚠ Sized payloads are only supported for Python, skipping {language} at {payload_size} bytes")
+            return
+        if (profile or self.profile) and language != "python":
+            print(f"⚠ Profiling is only supported for Python, running {language} unprofiled")
         if language == "python":
-            result = self.run_python_benchmark(encoding, message_count, payload_size, qos)
+            result = self.run_python_benchmark(encoding, message_count, payload_size, qos, profile)
             self.results.append(result)
             self.print_result(result)
         elif language == "rust":
@@ -499,22 +619,97 @@ class BenchmarkHarness:
         else:
             print(f"⚠ Benchmark for {language} not yet implemented")
 
+    def run_pingpong(self, language: str, encoding: str, message_count: int, payload_size: str = "small", qos: int = 1):
+        """
+        Run a round-trip latency benchmark for specified language and encoding.
+
+        Args:
+            language: Programming language
+            encoding: Encoding format
+            message_count: Number of round trips
+            payload_size: Payload size variant
+            qos: Quality of Service level
+        """
+        if language == "python":
+            result = self.run_pingpong_benchmark(encoding, message_count, payload_size, qos)
+            self.results.append(result)
+            self.print_result(result)
+        else:
+            print(f"⚠ Ping-pong benchmark for {language} not yet implemented")
+
+    def run_adaptive(self, language: str, encoding: str, message_count: int, payload_size: str = "small",
+                     qos: int = 1):
+        """
+        Run a saturation-point benchmark for specified language and encoding.
+
+        Args:
+            language: Programming language
+            encoding: Encoding format
+            message_count: Number of messages
+            payload_size: Payload size variant
+            qos: Quality of Service level
+        """
+        if language == "python":
+            result = self.run_adaptive_benchmark(encoding, message_count, payload_size, qos)
+            self.results.append(result)
+            self.print_result(result)
+        else:
+            print(f"⚠ Adaptive-rate benchmark for {language} not yet implemented")
+
     def print_result(self, result: BenchmarkResult):
         """Print benchmark result."""
+        if result.network != "direct":
+            print(f"  ✓ Network: {result.network} ({result.network_resets} connection resets)")
+        if result.messages_completed is not None and result.messages_completed < result.message_count:
+            print(f"  ⚠ Completed {result.messages_completed}/{result.message_count} messages")
         print(f"  ✓ Duration: {result.duration:.2f}s")
         print(f"  ✓ Messages/sec: {result.messages_per_second:.2f}")
         print(f"  ✓ Bytes sent: {result.bytes_sent}")
+        if result.client_usage:
+            usage = result.client_usage
+            print(f"  ✓ CPU: {usage.cpu_user:.2f}s user, {usage.cpu_system:.2f}s sys "
+                  f"({result.messages_per_cpu_second:.0f} msg/CPU-s)")
+            print(f"  ✓ Peak RSS: {usage.peak_rss_kb / 1024:.1f} MB")
+            print(f"  ✓ Context switches: {usage.voluntary_ctx_switches} voluntary, "
+                  f"{usage.involuntary_ctx_switches} involuntary")
+        if result.publish_latency_ms:
+            latency = result.publish_latency_ms
+            print(f"  ✓ Publish latency: p50 {latency['p50']:.2f}ms, p99 {latency['p99']:.2f}ms, "
+                  f"max {latency['max']:.2f}ms")
+        if result.rtt_ms:
+            rtt = result.rtt_ms
+            print(f"  ✓ Round trip: p50 {rtt['p50']:.3f}ms, p99 {rtt['p99']:.3f}ms, max {rtt['max']:.3f}ms")
+        if result.saturation_msgs_per_second:
+            print(f"  ✓ Saturation point: {result.saturation_msgs_per_second:.0f} msg/s")
+        elif result.scenario == "adaptive":
+            print("  ⚠ Saturation point not reached")
+        if result.broker_usage:
+            print(f"  ✓ Broker CPU: {result.broker_usage.cpu_total:.2f}s")
+        if result.protobuf_backend:
+            print(f"  ✓ Protobuf backend: {result.protobuf_backend}")
+        if result.profile:
+            print(f"  ✓ Profile: {result.profile}")
 
     def save_results(self, output_file: str):
         """
-        Save benchmark results to JSON file.
+        Save benchmark results to JSON file (and append them to the store, if any).
 
         Args:
             output_file: Output file path
         """
+        Path(output_file).parent.mkdir(parents=True, exist_ok=True)
+        results = [asdict(r) for r in self.results]
         with open(output_file, 'w') as f:
-            json.dump([asdict(r) for r in self.results], f, indent=2)
+            json.dump(results, f, indent=2)
         print(f"\n✓ Results saved to {output_file}")
+        if self.store_dir:
+            from results_store import ResultsStore
+            store = ResultsStore(self.store_dir)
+            parts = store.append_runs(results)
+            for context, columns in self.pending_samples:
+                parts += store.append_samples(context, columns)
+            self.pending_samples = []
+            print(f"✓ Appended {len(results)} runs to {self.store_dir} ({len(parts)} part files)")
 
     def print_summary(self):
         """Print summary of all benchmark results."""
@@ -527,11 +722,30 @@ class BenchmarkHarness:
         print("="*60)
         
         for result in self.results:
-            print(f"\n{result.language.upper()} ({result.encoding})")
-            print(f"  Messages: {result.message_count}")
+            backend = f", {result.protobuf_backend} backend" if result.protobuf_backend else ""
+            network = f", {result.network} network" if result.network != "direct" else ""
+            print(f"\n{result.language.upper()} ({result.encoding}{backend}{network})")
+            if result.messages_completed is not None and result.messages_completed < result.message_count:
+                print(f"  Messages: {result.messages_completed}/{result.message_count} completed "
+                      f"({result.network_resets} connection resets)")
+            else:
+                print(f"  Messages: {result.message_count}")
             print(f"  Duration: {result.duration:.2f}s")
             print(f"  Throughput: {result.messages_per_second:.2f} msg/s")
             print(f"  Bytes: {result.bytes_sent}")
+            if result.publish_latency_ms:
+                latency = result.publish_latency_ms
+                print(f"  Publish latency: p50 {latency['p50']:.2f}ms, p90 {latency['p90']:.2f}ms, "
+                      f"p99 {latency['p99']:.2f}ms, p99.9 {latency['p999']:.2f}ms")
+            if result.rtt_ms:
+                rtt = result.rtt_ms
+                print(f"  Round trip: p50 {rtt['p50']:.3f}ms, p90 {rtt['p90']:.3f}ms, "
+                      f"p99 {rtt['p99']:.3f}ms, p99.9 {rtt['p999']:.3f}ms")
+            if result.saturation_msgs_per_second:
+                print(f"  Saturation point: {result.saturation_msgs_per_second:.0f} msg/s (QoS {result.qos})")
+            if result.client_usage:
+                print(f"  CPU: {result.client_usage.cpu_total:.2f}s ({result.messages_per_cpu_second:.0f} msg/CPU-s)")
+                print(f"  Peak RSS: {result.client_usage.peak_rss_kb / 1024:.1f} MB")
 
 
 def main():
@@ -546,15 +760,41 @@ def main():
     parser.add_argument("--encodings", nargs="+", default=["json", "msgpack", "cbor", "protobuf"],
                         help="Encodings to benchmark")
     parser.add_argument("--payloads", nargs="+", default=["small"],
-                        help="Payload sizes to benchmark")
+                        help="Payload size variants (small, medium, large) or target sizes (e.g. 512, 64KB)")
+    parser.add_argument("--size-sweep", nargs=3, metavar=("MIN", "MAX", "POINTS"), default=None,
+                        help="Replace --payloads with POINTS log-spaced sizes from MIN to MAX (e.g. 64B 4MB 17)")
     parser.add_argument("--qos", nargs="+", type=int, default=[1],
                         help="QoS levels to benchmark")
     parser.add_argument("--count", type=int, default=100,
                         help="Number of messages per benchmark")
     parser.add_argument("--output", default="results/python/benchmark_results.json",
                         help="Output file for results")
+    parser.add_argument("--profile", choices=["cprofile", "sample"], default=None,
+                        help="Profile each Python cell (saved under <output dir>/profiles)")
+    parser.add_argument("--broker-pid", type=int, default=None,
+                        help="Broker PID for resource accounting (default: find a local mosquitto)")
+    parser.add_argument("--pingpong", action="store_true",
+                        help="Measure round-trip latency against an echo responder instead of throughput")
+    parser.add_argument("--network", nargs="+", default=["direct"], metavar="PROFILE",
+                        help=f"Network profiles to run every cell through ({', '.join(NETWORK_PROFILES)}, "
+                             "or e.g. latency=50,jitter=10,bandwidth=1000,resets=1)")
+    parser.add_argument("--adaptive", action="store_true",
+                        help="Find each cell's saturation point with AIMD rate control instead of a fixed interval")
+    parser.add_argument("--save-samples", action="store_true",
+                        help="Persist per-message records as results/<lang>/<enc>_qos<q>_<payload>.jsonl")
+    parser.add_argument("--store", default=None, metavar="DIR",
+                        help="Append runs and per-message samples to a columnar Parquet store (e.g. results/store)")
 
     args = parser.parse_args()
+    try:
+        if args.size_sweep:
+            minimum, maximum, points = args.size_sweep
+            args.payloads = sweep_sizes(parse_size(minimum), parse_size(maximum), int(points))
+        args.payloads = [p if p in PAYLOAD_VARIANTS else str(parse_size(p)) for p in args.payloads]
+        for spec in args.network:
+            parse_impairment(spec)
+    except (argparse.ArgumentTypeError, ValueError) as e:
+        parser.error(str(e))
 
     print("="*60)
     print("MQTT COMPARISON BENCHMARK HARNESS")
@@ -565,15 +805,29 @@ def main():
     print(f"Payloads: {', '.join(args.payloads)}")
     print(f"QoS: {', '.join(map(str, args.qos))}")
     print(f"Message count: {args.count}")
+    if args.network != ["direct"]:
+        print(f"Networks: {', '.join(args.network)}")
+    if args.profile:
+        print(f"Profile: {args.profile}")
 
-    harness = BenchmarkHarness(args.broker, args.port)
+    harness = BenchmarkHarness(args.broker, args.port, args.profile, str(Path(args.output).parent / "profiles"),
+                               args.broker_pid, "results" if args.save_samples else None, args.store)
+    if harness.broker_pid:
+        print(f"Broker PID: {harness.broker_pid}")
 
     try:
-        for language in args.languages:
-            for encoding in args.encodings:
-                for payload in args.payloads:
-                    for qos in args.qos:
-                        harness.run_benchmark(language, encoding, args.count, payload, qos)
+        for network in args.network:
+            with harness.impaired(network):
+                for language in args.languages:
+                    for encoding in args.encodings:
+                        for payload in args.payloads:
+                            for qos in args.qos:
+                                if args.pingpong:
+                                    harness.run_pingpong(language, encoding, args.count, payload, qos)
+                                elif args.adaptive:
+                                    harness.run_adaptive(language, encoding, args.count, payload, qos)
+                                else:
+                                    harness.run_benchmark(language, encoding, args.count, payload, qos)
 
         harness.print_summary()
         harness.save_results(args.output)
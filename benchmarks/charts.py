@@ -0,0 +1,228 @@
+#!/usr/bin/env python3
+"""
+Static charts for benchmark results.
+
+All series are computed with NumPy/pandas over whole columns (one sort per
+CDF, one group-by per chart) and rendered headless with matplotlib to SVG
+or PNG, suitable for embedding in the mkdocs site.
+"""
+
+from pathlib import Path
+from typing import Dict, Iterable, List, Sequence, Tuple
+
+import matplotlib
+
+matplotlib.use("Agg")
+
+import matplotlib.pyplot as plt
+import numpy as np
+from matplotlib.ticker import FuncFormatter, NullFormatter
+import pandas as pd
+
+CDF_POINTS = 512
+DEFAULT_FORMATS = ("svg",)
+
+
+def cdf(values: Iterable[float], points: int = CDF_POINTS) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Empirical CDF of a sample, downsampled to at most `points` steps.
+
+    Args:
+        values: Sample values
+        points: Maximum number of points to return
+
+    Returns:
+        (x, y) arrays with y in (0, 1]
+    """
+    xs = np.sort(np.asarray(values, dtype=float))
+    n = len(xs)
+    if n == 0:
+        return xs, xs
+    index = np.unique(np.linspace(0, n - 1, min(n, points)).astype(np.int64))
+    return xs[index], (index + 1) / n
+
+
+def _log_axes(ax, y: bool = True):
+    """
+    Log scale with plain-number tick labels; call after plotting.
+
+    Minor ticks are labelled only when an axis spans less than a decade,
+    where there would otherwise be no labels at all.
+    """
+    plain = FuncFormatter(lambda value, _: f"{value:g}")
+    ax.set_xscale("log")
+    axes = [(ax.xaxis, ax.get_xlim())]
+    if y:
+        ax.set_yscale("log")
+        axes.append((ax.yaxis, ax.get_ylim()))
+    for axis, (low, high) in axes:
+        axis.set_major_formatter(plain)
+        axis.set_minor_formatter(plain if low > 0 and high / low < 10 else NullFormatter())
+
+
+def _save(fig, out_dir: Path, name: str, formats: Sequence[str]) -> List[Path]:
+    out_dir.mkdir(parents=True, exist_ok=True)
+    paths = []
+    for fmt in formats:
+        path = out_dir / f"{name}.{fmt}"
+        fig.savefig(path, bbox_inches="tight", dpi=120)
+        paths.append(path)
+    plt.close(fig)
+    return paths
+
+
+def plot_cdfs(series: Dict[str, Iterable[float]], out_dir: Path, name: str, title: str,
+              xlabel: str = "latency (ms)", formats: Sequence[str] = DEFAULT_FORMATS) -> List[Path]:
+    """
+    Plot one CDF line per labelled sample on a log x-axis.
+
+    Args:
+        series: Mapping of line label to sample values
+        out_dir: Output directory
+        name: File name without extension
+        title: Chart title
+        xlabel: X-axis label
+        formats: Image formats to write ('svg', 'png')
+
+    Returns:
+        Paths written
+    """
+    fig, ax = plt.subplots(figsize=(8, 5))
+    for label, values in sorted(series.items()):
+        x, y = cdf(values)
+        if len(x):
+            ax.step(x, y, where="post", label=f"{label} (n={len(values)})")
+    _log_axes(ax, y=False)
+    ax.set_ylim(0, 1)
+    ax.set_xlabel(xlabel)
+    ax.set_ylabel("fraction of messages")
+    ax.set_title(title)
+    ax.grid(True, which="both", alpha=0.3)
+    ax.legend(fontsize="small")
+    return _save(fig, out_dir, name, formats)
+
+
+def latency_cdf_charts(samples: pd.DataFrame, out_dir: Path,
+                       formats: Sequence[str] = DEFAULT_FORMATS) -> List[Tuple[str, Path]]:
+    """
+    Latency CDFs from per-message samples, one chart per (scenario, network, payload, QoS).
+
+    Args:
+        samples: Samples with language, encoding, payload_size, qos, scenario,
+                 network, pub_ms and rtt_ms columns
+        out_dir: Output directory
+        formats: Image formats to write
+
+    Returns:
+        (title, path) for each chart's first format
+    """
+    if samples.empty:
+        return []
+    samples = samples.assign(latency_ms=samples["pub_ms"].fillna(samples["rtt_ms"])).dropna(subset=["latency_ms"])
+    charts = []
+    if "network" not in samples:
+        samples = samples.assign(network="direct")
+    for (scenario, network, payload, qos), chart in samples.groupby(["scenario", "network", "payload_size", "qos"]):
+        series = {f"{lang}/{enc}": group.to_numpy()
+                  for (lang, enc), group in chart.groupby(["language", "encoding"])["latency_ms"]}
+        kind = "round-trip" if scenario == "pingpong" else "publish"
+        title = f"{kind.capitalize()} latency CDF: {payload} payload, QoS {qos}"
+        name = f"latency_cdf_{scenario}_{payload}_qos{qos}"
+        if network != "direct":
+            title += f", {network} network"
+            name += f"_{network}"
+        paths = plot_cdfs(series, out_dir, name, title,
+                          xlabel=f"{kind} latency (ms)", formats=formats)
+        charts.append((title, paths[0]))
+    return charts
+
+
+def size_curves(runs: pd.DataFrame) -> pd.DataFrame:
+    """
+    Mean throughput per (language, encoding, QoS, payload) with bytes per message.
+
+    Args:
+        runs: Runs with message_count, duration, bytes_sent, messages_per_second
+
+    Returns:
+        DataFrame sorted by message size with msg_bytes, messages_per_second, mb_per_second
+    """
+    if "scenario" in runs:
+        runs = runs[runs["scenario"].fillna("throughput") == "throughput"]
+    if "network" in runs:
+        runs = runs[runs["network"].fillna("direct") == "direct"]
+    runs = runs[(runs["message_count"] > 0) & (runs["duration"] > 0)]
+    runs = runs.assign(msg_bytes=runs["bytes_sent"] / runs["message_count"],
+                       mb_per_second=runs["bytes_sent"] / runs["duration"] / 1e6)
+    curves = (runs.groupby(["language", "encoding", "qos", "payload_size"], as_index=False)
+              [["msg_bytes", "messages_per_second", "mb_per_second"]].mean())
+    return curves.sort_values("msg_bytes")
+
+
+def throughput_vs_size_charts(runs: pd.DataFrame, out_dir: Path,
+                              formats: Sequence[str] = DEFAULT_FORMATS) -> List[Tuple[str, Path]]:
+    """
+    Throughput against encoded message size, one chart per QoS plus one per language.
+
+    Args:
+        runs: Runs table (see size_curves())
+        out_dir: Output directory
+        formats: Image formats to write
+
+    Returns:
+        (title, path) for each chart's first format
+    """
+    if runs.empty:
+        return []
+    curves = size_curves(runs)
+    charts = []
+
+    for qos, chart in curves.groupby("qos"):
+        fig, ax = plt.subplots(figsize=(8, 5))
+        for (lang, enc), line in chart.groupby(["language", "encoding"]):
+            ax.plot(line["msg_bytes"], line["messages_per_second"], marker="o", label=f"{lang}/{enc}")
+        _log_axes(ax)
+        ax.set_xlabel("encoded message size (bytes)")
+        ax.set_ylabel("messages/second")
+        title = f"Throughput vs message size: QoS {qos}"
+        ax.set_title(title)
+        ax.grid(True, which="both", alpha=0.3)
+        ax.legend(fontsize="small")
+        charts.append((title, _save(fig, out_dir, f"throughput_vs_size_qos{qos}", formats)[0]))
+
+    # Per-language scaling: message rate and byte rate side by side
+    for lang, chart in curves.groupby("language"):
+        fig, (rate, volume) = plt.subplots(1, 2, figsize=(11, 4.5))
+        for (enc, qos), line in chart.groupby(["encoding", "qos"]):
+            label = f"{enc} QoS {qos}"
+            rate.plot(line["msg_bytes"], line["messages_per_second"], marker="o", label=label)
+            volume.plot(line["msg_bytes"], line["mb_per_second"], marker="o", label=label)
+        for ax, ylabel in ((rate, "messages/second"), (volume, "MB/second")):
+            _log_axes(ax)
+            ax.set_xlabel("encoded message size (bytes)")
+            ax.set_ylabel(ylabel)
+            ax.grid(True, which="both", alpha=0.3)
+        rate.legend(fontsize="small")
+        title = f"{lang} scaling with message size"
+        fig.suptitle(title)
+        charts.append((title, _save(fig, out_dir, f"scaling_{lang}", formats)[0]))
+
+    return charts
+
+
+def render_charts(runs: pd.DataFrame, samples: pd.DataFrame, out_dir: str,
+                  formats: Sequence[str] = DEFAULT_FORMATS) -> List[Tuple[str, Path]]:
+    """
+    Render every chart for a results set.
+
+    Args:
+        runs: Flattened runs table
+        samples: Per-message samples table (may be empty)
+        out_dir: Output directory (e.g. docs/assets/charts)
+        formats: Image formats to write
+
+    Returns:
+        (title, path) for each chart
+    """
+    out = Path(out_dir)
+    return throughput_vs_size_charts(runs, out, formats) + latency_cdf_charts(samples, out, formats)
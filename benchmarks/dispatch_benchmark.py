@@ -0,0 +1,164 @@
+#!/usr/bin/env python3
+"""
+Topic dispatch cost for subscribers with many subscription patterns.
+
+Builds P patterns over a plant/line/sensor/metric hierarchy (mostly exact
+filters, some `+` and `#` wildcards) and times finding the handlers of a
+topic three ways, in-process and without a broker:
+
+- trie: topic_router.TopicRouter, used by SensorDataSubscriber.route();
+- linear: one precompiled regular expression per pattern, all tested in
+  turn, i.e. string matching per handler;
+- paho: paho's own MQTTMatcher (recursive generators), which backs
+  Client.message_callback_add().
+
+All three are checked against paho's topic_matches_sub() before timing.
+"""
+
+import argparse
+import json
+import random
+import re
+import sys
+import time
+from pathlib import Path
+from typing import Callable, Dict, List, Tuple
+
+from paho.mqtt.client import topic_matches_sub
+from paho.mqtt.matcher import MQTTMatcher
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT / "python" / "src"))
+
+from topic_router import TopicRouter  # noqa: E402
+
+METRICS = ["temperature", "humidity", "pressure", "vibration", "status"]
+
+
+def workload(patterns: int, topics: int, seed: int = 0) -> Tuple[List[str], List[str]]:
+    """
+    Generate subscription patterns and published topics.
+
+    Args:
+        patterns: Number of distinct patterns (70% exact, 20% +, 10% #)
+        topics: Number of topics to dispatch; about half match an exact pattern
+
+    Returns:
+        (patterns, topics)
+    """
+    rnd = random.Random(seed)
+    plants = max(2, int(patterns ** 0.25))
+    sensors = max(10, patterns // plants)
+
+    def topic() -> List[str]:
+        return ["plant", str(rnd.randrange(plants)), "line", str(rnd.randrange(8)),
+                "sensor", f"s{rnd.randrange(sensors)}", rnd.choice(METRICS)]
+
+    found = set()
+    while len(found) < patterns:
+        levels = topic()
+        kind = rnd.random()
+        if kind < 0.2:
+            for i in rnd.sample([1, 3, 5, 6], rnd.randint(1, 2)):
+                levels[i] = "+"
+        elif kind < 0.3:
+            levels = levels[:rnd.choice([2, 4, 6])] + ["#"]
+        found.add("/".join(levels))
+    pattern_list = sorted(found)
+    exact = [p for p in pattern_list if "+" not in p and "#" not in p]
+    topic_list = [rnd.choice(exact) if exact and rnd.random() < 0.5 else "/".join(topic()) for _ in range(topics)]
+    return pattern_list, topic_list
+
+
+def pattern_regex(pattern: str) -> "re.Pattern":
+    """Compile a topic filter to an equivalent regular expression (for fullmatch)."""
+    levels = pattern.split("/")
+    wildcard_levels = levels[:-1] if levels[-1] == "#" else levels
+    body = "/".join("[^/]*" if level == "+" else re.escape(level) for level in wildcard_levels)
+    if levels[-1] == "#":
+        body = f"{body}(/.*)?" if wildcard_levels else ".*"
+    # As in MQTT, a wildcard first level does not match $-topics
+    return re.compile((r"(?!\$)" if levels[0] in ("+", "#") else "") + body)
+
+
+def dispatchers(patterns: List[str]) -> Dict[str, Callable[[str], List[int]]]:
+    """Build each dispatcher over the patterns, with the pattern index as handler."""
+    router = TopicRouter()
+    matcher = MQTTMatcher()
+    for i, pattern in enumerate(patterns):
+        router.add(pattern, i)
+        matcher[pattern] = i
+    compiled = [(i, pattern_regex(pattern).fullmatch) for i, pattern in enumerate(patterns)]
+    return {
+        "trie": router.match,
+        "linear": lambda topic: [i for i, fullmatch in compiled if fullmatch(topic)],
+        "paho": lambda topic: list(matcher.iter_match(topic)),
+    }
+
+
+def measure(patterns: int, topics: int, repeat: int, linear_budget: int) -> Dict[str, float]:
+    """
+    Time each dispatcher for one pattern count.
+
+    Args:
+        patterns: Number of subscription patterns
+        topics: Topics dispatched per timing
+        repeat: Timings per dispatcher (best is kept)
+        linear_budget: Cap on pattern tests per linear timing (it is O(patterns))
+
+    Returns:
+        Per-dispatch microseconds for each dispatcher, plus mean handlers matched
+
+    Raises:
+        AssertionError: If the dispatchers disagree on any topic
+    """
+    pattern_list, topic_list = workload(patterns, topics)
+    fns = dispatchers(pattern_list)
+    for topic in topic_list[:20]:
+        expected = [i for i, pattern in enumerate(pattern_list) if topic_matches_sub(pattern, topic)]
+        for name, fn in fns.items():
+            assert sorted(fn(topic)) == expected, f"{name} disagrees on {topic}"
+
+    row = {"patterns": patterns, "matches": sum(len(fns["trie"](t)) for t in topic_list) / len(topic_list)}
+    for name, fn in fns.items():
+        sample = topic_list[:max(20, linear_budget // patterns)] if name == "linear" else topic_list
+        best = float("inf")
+        for _ in range(repeat):
+            start = time.perf_counter()
+            for topic in sample:
+                fn(topic)
+            best = min(best, (time.perf_counter() - start) / len(sample))
+        row[name] = best * 1e6
+    return row
+
+
+def main():
+    """Main entry point."""
+    parser = argparse.ArgumentParser(description="Measure topic dispatch cost for many subscription patterns")
+    parser.add_argument("--patterns", nargs="+", type=int, default=[10, 100, 1000, 10000],
+                        help="Pattern counts to measure")
+    parser.add_argument("--topics", type=int, default=5000, help="Topics dispatched per timing")
+    parser.add_argument("--repeat", type=int, default=5, help="Timings per dispatcher (best is kept)")
+    parser.add_argument("--linear-budget", type=int, default=1000000,
+                        help="Pattern tests per linear timing (fewer topics at large pattern counts)")
+    parser.add_argument("--output", default=None, help="Write results as JSON to this file")
+
+    args = parser.parse_args()
+
+    results = [measure(p, args.topics, args.repeat, args.linear_budget) for p in args.patterns]
+
+    print("Per-dispatch time in µs (speedup of the trie in parentheses)\n")
+    print(f"{'patterns':>8} {'matches':>8} {'trie':>8} {'paho':>18} {'linear':>20}")
+    for r in results:
+        print(f"{r['patterns']:>8} {r['matches']:>8.2f} {r['trie']:>8.2f} "
+              f"{r['paho']:>8.2f} ({r['paho'] / r['trie']:>5.1f}x) {r['linear']:>10.2f} ({r['linear'] / r['trie']:>5.0f}x)")
+
+    if args.output:
+        Path(args.output).parent.mkdir(parents=True, exist_ok=True)
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"\n✓ Results saved to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,446 @@
+#!/usr/bin/env python3
+"""
+Fan-out and fan-in broker scaling benchmark.
+
+- fanout: one publisher, N subscribers on the same topic; every message is
+  delivered N times;
+- fanin: N publishers (one subtopic each), one subscriber on the wildcard.
+
+Clients are the Python SensorDataPublisher/SensorDataSubscriber classes. To
+reach thousands of connections without a network thread per client, each
+worker process drives its share of the clients from one selector loop using
+paho's external-loop callbacks. Reported per cell: aggregate delivered
+msg/s (first publish to last delivery), delivery ratio, end-to-end latency
+over all deliveries, the spread of per-subscriber p50/p99, and broker CPU.
+"""
+
+import argparse
+import heapq
+import json
+import multiprocessing
+import os
+import queue
+import resource
+import selectors
+import sys
+import time
+import uuid
+from dataclasses import asdict, dataclass
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT / "python" / "src"))
+
+from histogram import LatencyHistogram  # noqa: E402
+from publisher import SensorDataPublisher, parse_payload_size  # noqa: E402
+from resource_usage import ResourceUsage, find_broker_pid, read_proc_usage, usage_delta  # noqa: E402
+from subscriber import SensorDataSubscriber  # noqa: E402
+
+ENCODINGS = ["json", "msgpack", "cbor", "protobuf", "struct"]
+
+
+@dataclass
+class FanResult:
+    """Result of one fan-out or fan-in cell."""
+    scenario: str
+    encoding: str
+    qos: int
+    payload_size: str
+    clients: int
+    publishers: int
+    subscribers: int
+    messages_published: int
+    messages_expected: int
+    messages_delivered: int
+    delivery_ratio: float
+    duration: float
+    delivered_msgs_per_second: float
+    connect_seconds: float
+    latency_ms: Optional[Dict[str, float]] = None
+    subscriber_p50_ms: Optional[Dict[str, float]] = None
+    subscriber_p99_ms: Optional[Dict[str, float]] = None
+    broker_usage: Optional[ResourceUsage] = None
+    run_id: str = ""
+    timestamp: str = ""
+
+
+class ClientLoop:
+    """Drives many paho clients from one thread via paho's external-loop socket callbacks."""
+
+    def __init__(self):
+        self.selector = selectors.DefaultSelector()
+        self.clients = []
+        self._last_misc = time.monotonic()
+
+    def add(self, client):
+        """Take over a client's network I/O (call before connect())."""
+        client.on_socket_open = self._open
+        client.on_socket_close = self._close
+        client.on_socket_register_write = self._want_write
+        client.on_socket_unregister_write = self._written
+        self.clients.append(client)
+
+    def _open(self, client, userdata, sock):
+        self.selector.register(sock, selectors.EVENT_READ, client)
+
+    def _close(self, client, userdata, sock):
+        try:
+            self.selector.unregister(sock)
+        except (KeyError, ValueError):
+            pass
+
+    def _want_write(self, client, userdata, sock):
+        self.selector.modify(sock, selectors.EVENT_READ | selectors.EVENT_WRITE, client)
+
+    def _written(self, client, userdata, sock):
+        try:
+            self.selector.modify(sock, selectors.EVENT_READ, client)
+        except (KeyError, ValueError):
+            pass  # unregistered on close
+
+    def poll(self, timeout: float):
+        """Handle ready sockets, then keepalives once a second."""
+        for key, events in self.selector.select(timeout):
+            client = key.data
+            if events & selectors.EVENT_READ:
+                client.loop_read()
+            if events & selectors.EVENT_WRITE and client.socket() is not None:
+                client.loop_write()
+        now = time.monotonic()
+        if now - self._last_misc >= 1.0:
+            self._last_misc = now
+            for client in self.clients:
+                client.loop_misc()
+
+    def run_until(self, done, timeout: float) -> bool:
+        """Poll until done() is true or the timeout expires; returns done()."""
+        deadline = time.monotonic() + timeout
+        while not done() and time.monotonic() < deadline:
+            self.poll(0.05)
+        return done()
+
+
+def raise_fd_limit():
+    """Allow as many sockets as the hard limit permits."""
+    soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+    if soft < hard:
+        resource.setrlimit(resource.RLIMIT_NOFILE, (hard, hard))
+
+
+def subscriber_worker(config: Dict[str, Any], count: int, topic: str, expected: int, ready, stop, results):
+    """
+    Host `count` subscribers until each has `expected` messages or `stop` is set.
+
+    Puts ('ready', n) once all subscriptions are acknowledged, then
+    ('subscribers', counts, p50s, p99s, merged histogram, last delivery time).
+    """
+    raise_fd_limit()
+    loop = ClientLoop()
+    subscribers = []
+    acked = [0]
+    last_delivery = [0.0]
+
+    def on_subscribe(client, userdata, mid, reason_codes, properties):
+        acked[0] += 1
+
+    for _ in range(count):
+        subscriber = SensorDataSubscriber(config["broker"], config["port"], config["encoding"], config["qos"],
+                                          quiet=True)
+        handle = subscriber._on_message
+
+        def on_message(client, userdata, msg, handle=handle):
+            handle(client, userdata, msg)
+            last_delivery[0] = time.time()
+
+        subscriber.client.on_message = on_message
+        subscriber.client.on_subscribe = on_subscribe
+        subscriber.client.on_connect = None  # only prints; SUBACKs confirm the connection
+        loop.add(subscriber.client)
+        subscriber.client.connect(config["broker"], config["port"], 60)
+        subscriber.client.subscribe(topic, qos=config["qos"])
+        subscribers.append(subscriber)
+        loop.poll(0)  # keep earlier handshakes moving while the rest connect
+    loop.run_until(lambda: acked[0] >= count, config["connect_timeout"])
+    ready.put(("ready", acked[0]))
+
+    loop.run_until(lambda: stop.is_set() or all(s.message_count >= expected for s in subscribers),
+                   config["run_timeout"])
+    merged = LatencyHistogram()
+    p50s, p99s = [], []
+    for subscriber in subscribers:
+        histogram = LatencyHistogram()
+        for latency in subscriber.receive_times:
+            histogram.record(latency * 1000)
+        if histogram.count:
+            p50s.append(histogram.percentile(50))
+            p99s.append(histogram.percentile(99))
+        merged.merge(histogram)
+        subscriber.client.disconnect()
+    loop.poll(0)
+    results.put(("subscribers", [s.message_count for s in subscribers], p50s, p99s, merged, last_delivery[0]))
+
+
+def publisher_worker(config: Dict[str, Any], first: int, count: int, topic: str, fan_in: bool, results):
+    """
+    Host `count` publishers (numbered from `first`); each sends config['count'] messages at config['rate'].
+
+    Puts ('publishers', sent, acked, first send time).
+    """
+    raise_fd_limit()
+    loop = ClientLoop()
+    publishers = []
+    acked = [0]
+
+    def on_ack(mid):
+        acked[0] += 1
+
+    for _ in range(count):
+        publisher = SensorDataPublisher(config["broker"], config["port"], config["encoding"], config["qos"])
+        publisher.on_ack = on_ack
+        # Same as _on_connect without the per-client print, which would flood the output at large N
+        publisher.client.on_connect = (lambda client, userdata, flags, reason_code, properties, p=publisher:
+                                       reason_code == 0 and p._connected.set())
+        loop.add(publisher.client)
+        publisher.client.connect(config["broker"], config["port"], 60)
+        publishers.append(publisher)
+        loop.poll(0)
+    loop.run_until(lambda: all(p._connected.is_set() for p in publishers), config["connect_timeout"])
+
+    interval = 1.0 / config["rate"]
+    start = time.monotonic()
+    # Stagger publishers across the first interval so sends do not arrive in bursts
+    due = [(start + interval * i / count, i, 0) for i in range(count)]
+    heapq.heapify(due)
+    sent = 0
+    first_send = None
+    while due:
+        when, i, n = due[0]
+        now = time.monotonic()
+        if when > now:
+            loop.poll(min(when - now, 0.05))
+            continue
+        heapq.heapreplace(due, (when + interval, i, n + 1)) if n + 1 < config["count"] else heapq.heappop(due)
+        publisher = publishers[i]
+        data = publisher.create_sensor_data(f"sensor_{first + i:05d}", config["payload"])
+        publisher.publish_async(f"{topic}/{first + i}" if fan_in else topic, data)
+        first_send = first_send or time.time()
+        sent += 1
+        loop.poll(0)
+    loop.run_until(lambda: acked[0] >= sent, config["drain_timeout"])
+    for publisher in publishers:
+        publisher.client.disconnect()
+    loop.poll(0)
+    results.put(("publishers", sent, acked[0], first_send))
+
+
+def split(total: int, parts: int) -> List[int]:
+    """Divide total into at most `parts` near-equal positive shares."""
+    parts = max(1, min(parts, total))
+    return [total // parts + (1 if i < total % parts else 0) for i in range(parts)]
+
+
+def summarize(values: List[float]) -> Optional[Dict[str, float]]:
+    """Median and worst of a per-subscriber statistic."""
+    if not values:
+        return None
+    values = sorted(values)
+    return {"median": round(values[len(values) // 2], 3), "max": round(values[-1], 3)}
+
+
+def run_cell(scenario: str, clients: int, encoding: str, qos: int, args, broker_pid: Optional[int]) -> FanResult:
+    """
+    Run one fan-out or fan-in cell.
+
+    Args:
+        scenario: 'fanout' or 'fanin'
+        clients: N, the number of subscribers (fanout) or publishers (fanin)
+        encoding: Encoding format
+        qos: QoS level for publishers and subscribers
+        args: Parsed command-line arguments
+        broker_pid: Broker PID for CPU accounting, or None
+
+    Returns:
+        FanResult for the cell
+    """
+    run_id = uuid.uuid4().hex[:12]
+    topic = f"mqtt-comparison/{scenario}/{run_id}"
+    publishers, subscribers = (1, clients) if scenario == "fanout" else (clients, 1)
+    config = {"broker": args.broker, "port": args.port, "encoding": encoding, "qos": qos,
+              "count": args.count, "rate": args.rate, "payload": args.payload,
+              "connect_timeout": args.connect_timeout, "run_timeout": args.timeout + args.count / args.rate * 2,
+              "drain_timeout": args.timeout}
+    published = publishers * args.count
+    per_subscriber = published  # every subscriber sees every message in both scenarios
+    results = multiprocessing.Queue()
+    ready = multiprocessing.Queue()
+    stop = multiprocessing.Event()
+
+    connect_start = time.time()
+    subscriber_shares = split(subscribers, args.processes)
+    subscriber_procs = [multiprocessing.Process(
+        target=subscriber_worker,
+        args=(config, share, f"{topic}/#" if scenario == "fanin" else topic, per_subscriber, ready, stop, results))
+        for share in subscriber_shares]
+    for proc in subscriber_procs:
+        proc.start()
+    subscribed = 0
+    try:
+        for _ in subscriber_procs:
+            subscribed += ready.get(timeout=args.connect_timeout + 30)[1]
+    except queue.Empty:
+        stop.set()
+        for proc in subscriber_procs:
+            proc.kill()
+        raise RuntimeError(f"only {subscribed}/{subscribers} subscribers ready after {args.connect_timeout:g}s")
+    if subscribed < subscribers:
+        print(f"  ⚠ {subscribed}/{subscribers} subscriptions acknowledged")
+    connect_seconds = time.time() - connect_start
+
+    broker_before = read_proc_usage(broker_pid) if broker_pid else None
+    publisher_procs = []
+    first = 0
+    for share in split(publishers, args.processes):
+        publisher_procs.append(multiprocessing.Process(
+            target=publisher_worker, args=(config, first, share, topic, scenario == "fanin", results)))
+        first += share
+    for proc in publisher_procs:
+        proc.start()
+
+    sent, first_send = 0, None
+    delivered, p50s, p99s = 0, [], []
+    merged = LatencyHistogram()
+    last_delivery = 0.0
+    pending = len(publisher_procs) + len(subscriber_procs)
+    publishers_done = 0
+    stop_at = None
+    while pending:
+        try:
+            message = results.get(timeout=1.0)
+        except queue.Empty:
+            if stop_at is not None and time.time() > stop_at:
+                stop.set()
+            if not any(p.is_alive() for p in publisher_procs + subscriber_procs):
+                break  # a worker died without reporting
+            continue
+        pending -= 1
+        if message[0] == "publishers":
+            sent += message[1]
+            if message[3]:
+                first_send = min(first_send or message[3], message[3])
+            publishers_done += 1
+            if publishers_done == len(publisher_procs):
+                # Subscribers finish on their own once everything arrived; this bounds the wait for losses
+                stop_at = time.time() + args.timeout
+        else:
+            _, counts, sub_p50s, sub_p99s, histogram, last = message
+            delivered += sum(counts)
+            p50s += sub_p50s
+            p99s += sub_p99s
+            merged.merge(histogram)
+            last_delivery = max(last_delivery, last)
+    stop.set()
+    for proc in publisher_procs + subscriber_procs:
+        proc.join(5)
+        if proc.is_alive():
+            proc.kill()
+    broker_after = read_proc_usage(broker_pid) if broker_pid else None
+
+    duration = (last_delivery - first_send) if first_send and last_delivery > first_send else 0.0
+    expected = sent * (subscribers if scenario == "fanout" else 1)
+    return FanResult(
+        scenario=scenario, encoding=encoding, qos=qos, payload_size=args.payload, clients=clients,
+        publishers=publishers, subscribers=subscribers, messages_published=sent, messages_expected=expected,
+        messages_delivered=delivered, delivery_ratio=delivered / expected if expected else 0.0,
+        duration=duration, delivered_msgs_per_second=delivered / duration if duration > 0 else 0.0,
+        connect_seconds=connect_seconds,
+        latency_ms=merged.summary() if merged.count else None,
+        subscriber_p50_ms=summarize(p50s), subscriber_p99_ms=summarize(p99s),
+        broker_usage=usage_delta(broker_before, broker_after) if broker_before and broker_after else None,
+        run_id=run_id, timestamp=datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ"))
+
+
+def print_result(result: FanResult):
+    """Print one cell's result."""
+    mark = "✓" if result.delivery_ratio >= 0.999 else "⚠"
+    print(f"  {mark} Delivered {result.messages_delivered}/{result.messages_expected} "
+          f"({result.delivery_ratio:.1%}) at {result.delivered_msgs_per_second:.0f} msg/s "
+          f"over {result.duration:.2f}s (connect {result.connect_seconds:.2f}s)")
+    if result.latency_ms:
+        latency = result.latency_ms
+        print(f"  ✓ Latency: p50 {latency['p50']:.2f}ms, p99 {latency['p99']:.2f}ms, max {latency['max']:.2f}ms")
+    if result.subscriber_p99_ms and result.subscribers > 1:
+        print(f"  ✓ Per-subscriber p99: median {result.subscriber_p99_ms['median']:.2f}ms, "
+              f"worst {result.subscriber_p99_ms['max']:.2f}ms")
+    if result.broker_usage:
+        print(f"  ✓ Broker CPU: {result.broker_usage.cpu_total:.2f}s")
+
+
+def main():
+    """Main entry point."""
+    parser = argparse.ArgumentParser(description="Fan-out / fan-in broker scaling benchmark")
+    parser.add_argument("--scenarios", nargs="+", choices=["fanout", "fanin"], default=["fanout", "fanin"],
+                        help="Scenarios to run")
+    parser.add_argument("--clients", nargs="+", type=int, default=[1, 10, 100, 1000],
+                        help="N: subscribers for fanout, publishers for fanin")
+    parser.add_argument("--encodings", nargs="+", choices=ENCODINGS, default=["json"], help="Encodings")
+    parser.add_argument("--qos", nargs="+", type=int, choices=[0, 1, 2], default=[1], help="QoS levels")
+    parser.add_argument("--count", type=int, default=100, help="Messages per publisher")
+    parser.add_argument("--rate", type=float, default=50.0, help="Messages per second per publisher")
+    parser.add_argument("--payload", type=parse_payload_size, default="small",
+                        help="Payload size variant or target encoded size")
+    parser.add_argument("--processes", type=int, default=os.cpu_count() or 1,
+                        help="Worker processes the clients are spread over")
+    parser.add_argument("--broker", default="localhost", help="MQTT broker hostname")
+    parser.add_argument("--port", type=int, default=1883, help="MQTT broker port")
+    parser.add_argument("--broker-pid", type=int, default=None,
+                        help="Broker PID for CPU accounting (default: find a local mosquitto)")
+    parser.add_argument("--connect-timeout", type=float, default=60.0,
+                        help="Seconds allowed for all clients to connect and subscribe")
+    parser.add_argument("--timeout", type=float, default=10.0,
+                        help="Seconds to wait for deliveries after the last publish")
+    parser.add_argument("--output", default="results/fanout_results.json", help="Output file for results")
+
+    args = parser.parse_args()
+    broker_pid = args.broker_pid or find_broker_pid()
+
+    print("=" * 60)
+    print("FAN-OUT / FAN-IN BENCHMARK")
+    print("=" * 60)
+    print(f"Broker: {args.broker}:{args.port}" + (f" (PID {broker_pid})" if broker_pid else ""))
+    print(f"Clients: {', '.join(map(str, args.clients))} over {args.processes} processes")
+    print(f"Per publisher: {args.count} messages at {args.rate:g} msg/s")
+
+    results: List[FanResult] = []
+    try:
+        for scenario in args.scenarios:
+            for clients in args.clients:
+                for encoding in args.encodings:
+                    for qos in args.qos:
+                        print(f"\nRunning {scenario} with N={clients}, {encoding} encoding, QoS {qos}...")
+                        try:
+                            result = run_cell(scenario, clients, encoding, qos, args, broker_pid)
+                        except Exception as e:
+                            print(f"  ✗ {e}")
+                            continue
+                        results.append(result)
+                        print_result(result)
+    except KeyboardInterrupt:
+        print("\n\n✗ Benchmark interrupted")
+
+    if results:
+        print(f"\n{'scenario':<8} {'N':>6} {'enc':<9} {'qos':>3} {'msg/s':>9} {'delivered':>9} "
+              f"{'p50 ms':>8} {'p99 ms':>8}")
+        for r in results:
+            latency = r.latency_ms or {"p50": 0.0, "p99": 0.0}
+            print(f"{r.scenario:<8} {r.clients:>6} {r.encoding:<9} {r.qos:>3} {r.delivered_msgs_per_second:>9.0f} "
+                  f"{r.delivery_ratio:>9.1%} {latency['p50']:>8.2f} {latency['p99']:>8.2f}")
+        Path(args.output).parent.mkdir(parents=True, exist_ok=True)
+        with open(args.output, "w") as f:
+            json.dump([asdict(r) for r in results], f, indent=2)
+        print(f"\n✓ Results saved to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,243 @@
+#!/usr/bin/env python3
+"""
+PUBLISH header overhead and MQTT 5 topic aliases.
+
+Every PUBLISH repeats its topic name, which on small payloads is a large
+share of the bytes on the wire. This benchmark publishes the same messages
+with SensorDataPublisher in three modes:
+
+- 3.1.1: full topic on every PUBLISH;
+- 5: MQTT 5 without aliases (adds a one-byte empty property length);
+- 5+alias: MQTT 5, topic sent once, then only its topic alias.
+
+and reports, per payload size:
+
+- bytes per message, as computed by the publisher from each PUBLISH and as
+  counted on the wire (a sample is sent through a pass-through netem_proxy,
+  which counts the bytes each way);
+- header bytes (everything but the payload) and their share of the packet;
+- throughput: messages pipelined to the broker directly and acknowledged.
+
+Aliases need a broker that grants a Topic Alias Maximum in CONNACK
+(Mosquitto defaults to 10); with --topics above that maximum the excess
+topics are sent in full.
+"""
+
+import argparse
+import json
+import statistics
+import sys
+import time
+import uuid
+from dataclasses import asdict, dataclass
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import paho.mqtt.client as mqtt
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT / "python" / "src"))
+
+from netem_proxy import ImpairmentProxy, Impairment  # noqa: E402
+from publisher import SensorDataPublisher, parse_payload_size  # noqa: E402
+
+# paho's DISCONNECT (no reason code or properties), counted after the sample
+DISCONNECT_BYTES = 2
+
+MODES = {
+    "3.1.1": {"protocol": mqtt.MQTTv311},
+    "5": {"protocol": mqtt.MQTTv5},
+    "5+alias": {"protocol": mqtt.MQTTv5, "topic_alias": True},
+}
+
+
+@dataclass
+class HeaderResult:
+    """Size and throughput measurements for one mode and payload size."""
+    mode: str
+    encoding: str
+    payload_size: str
+    qos: int
+    topics: int
+    messages: int
+    payload_bytes: float
+    packet_bytes: float
+    header_bytes: float
+    header_share: float
+    wire_bytes: Optional[float] = None
+    aliased_topics: int = 0
+    msgs_per_second: Optional[float] = None
+    wire_mb_per_second: Optional[float] = None
+    scenario: str = "header"
+    run_id: str = ""
+    timestamp: str = ""
+
+
+def make_publisher(mode: str, args, port: int) -> SensorDataPublisher:
+    """
+    Connect a publisher for one mode.
+
+    Raises:
+        RuntimeError: If the broker does not accept the connection (e.g. no MQTT 5)
+    """
+    publisher = SensorDataPublisher(args.broker, port, args.encoding, args.qos, **MODES[mode])
+    publisher.client.max_inflight_messages_set(args.max_inflight)
+    publisher.connect()
+    if not publisher.client.is_connected():
+        publisher.disconnect()
+        raise RuntimeError(f"broker did not accept the {mode} connection")
+    return publisher
+
+
+def publish_pipelined(publisher: SensorDataPublisher, messages, timeout: float) -> float:
+    """
+    Publish (topic, sensor data) pairs pipelined and wait for every acknowledgement.
+
+    Returns:
+        Seconds from the first publish to the last acknowledgement
+
+    Raises:
+        RuntimeError: If not everything is acknowledged within the timeout
+    """
+    acked = [0]
+    publisher.on_ack = lambda mid: acked.__setitem__(0, acked[0] + 1)
+    start = time.perf_counter()
+    for topic, data in messages:
+        publisher.publish_async(topic, data)
+    deadline = time.time() + timeout
+    while acked[0] < len(messages) and time.time() < deadline:
+        time.sleep(0.001)
+    if acked[0] < len(messages):
+        raise RuntimeError(f"only {acked[0]}/{len(messages)} publishes acknowledged")
+    return time.perf_counter() - start
+
+
+def run_cell(mode: str, payload_size: str, args) -> HeaderResult:
+    """
+    Measure one mode at one payload size.
+
+    Args:
+        mode: Key of MODES
+        payload_size: Payload size variant or target size
+        args: Parsed command-line arguments
+
+    Returns:
+        HeaderResult for the cell
+    """
+    topics = ([args.topic] if args.topics == 1 else
+              [f"{args.topic}/sensor_{i:05d}" for i in range(args.topics)])
+    factory = SensorDataPublisher(encoding=args.encoding)
+    messages = [(topics[i % len(topics)], factory.create_sensor_data(f"sensor_{i % len(topics):05d}", payload_size))
+                for i in range(args.count)]
+
+    # Wire bytes: a sample through a pass-through proxy that counts what the client sends
+    wire_bytes = None
+    if args.wire_sample:
+        proxy = ImpairmentProxy(Impairment(), args.broker, args.port)
+        proxy.start()
+        try:
+            publisher = make_publisher(mode, args, proxy.port)
+            sample = messages[:args.wire_sample]
+            before = proxy.bytes_up
+            publish_pipelined(publisher, sample, args.timeout)
+            publisher.disconnect()
+            # At QoS 0 "acknowledged" means written to the proxy, which may still be forwarding
+            counted = -1
+            while counted != proxy.bytes_up:
+                counted = proxy.bytes_up
+                time.sleep(0.05)
+            wire_bytes = (counted - before - DISCONNECT_BYTES) / len(sample)
+        finally:
+            proxy.stop()
+
+    seconds = []
+    for _ in range(args.runs):
+        publisher = make_publisher(mode, args, args.port)
+        try:
+            seconds.append(publish_pipelined(publisher, messages, args.timeout))
+        finally:
+            publisher.disconnect()
+    elapsed = statistics.median(seconds)
+
+    packets = publisher.packets
+    packet_bytes = publisher.packet_bytes / packets
+    header_bytes = (publisher.packet_bytes - publisher.payload_bytes) / packets
+    return HeaderResult(mode=mode, encoding=args.encoding, payload_size=payload_size, qos=args.qos,
+                        topics=args.topics, messages=args.count,
+                        payload_bytes=publisher.payload_bytes / packets, packet_bytes=packet_bytes,
+                        header_bytes=header_bytes, header_share=header_bytes / packet_bytes, wire_bytes=wire_bytes,
+                        aliased_topics=publisher.aliased_topics, msgs_per_second=args.count / elapsed,
+                        wire_mb_per_second=args.count * packet_bytes / elapsed / 1e6,
+                        run_id=uuid.uuid4().hex[:12],
+                        timestamp=datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ"))
+
+
+def main():
+    """Main entry point."""
+    parser = argparse.ArgumentParser(description="Measure PUBLISH header bytes and throughput with topic aliases")
+    parser.add_argument("--modes", nargs="+", choices=list(MODES), default=list(MODES), help="Protocol modes")
+    parser.add_argument("--payloads", nargs="+", type=parse_payload_size, default=["small", "256", "medium"],
+                        help="Payload size variants or target encoded sizes")
+    parser.add_argument("--encoding", choices=["json", "msgpack", "cbor", "protobuf", "struct"], default="json",
+                        help="Encoding format")
+    parser.add_argument("--topic", default="mqtt-demo/all", help="Topic (or topic prefix with --topics)")
+    parser.add_argument("--topics", type=int, default=1, help="Cycle through this many TOPIC/sensor_NNNNN topics")
+    parser.add_argument("--count", type=int, default=20000, help="Messages per throughput run")
+    parser.add_argument("--runs", type=int, default=3, help="Throughput runs per cell (median is reported)")
+    parser.add_argument("--wire-sample", type=int, default=1000,
+                        help="Messages sent through a counting proxy to measure wire bytes (0 = skip)")
+    parser.add_argument("--qos", type=int, choices=[0, 1, 2], default=1, help="Quality of Service level")
+    parser.add_argument("--max-inflight", type=int, default=1000, help="paho in-flight window")
+    parser.add_argument("--broker", default="localhost", help="MQTT broker hostname")
+    parser.add_argument("--port", type=int, default=1883, help="MQTT broker port")
+    parser.add_argument("--timeout", type=float, default=60.0, help="Seconds allowed for each run's acknowledgements")
+    parser.add_argument("--output", default="results/header_results.json", help="Output file for results")
+
+    args = parser.parse_args()
+    args.wire_sample = min(args.wire_sample, args.count)
+
+    print("=" * 60)
+    print("PUBLISH HEADER / TOPIC ALIAS BENCHMARK")
+    print("=" * 60)
+    print(f"Broker: {args.broker}:{args.port}")
+    print(f"Topic: {args.topic}" + (f"/<sensor id> ({args.topics} topics)" if args.topics > 1 else ""))
+    print(f"Encoding: {args.encoding}, QoS {args.qos}, {args.count} messages x {args.runs} runs")
+
+    results: List[HeaderResult] = []
+    try:
+        for payload_size in args.payloads:
+            for mode in args.modes:
+                print(f"\n{mode}, {payload_size} payload...")
+                try:
+                    r = run_cell(mode, payload_size, args)
+                except (RuntimeError, OSError, ValueError) as e:
+                    print(f"  ✗ {e}")
+                    continue
+                results.append(r)
+                wire = f", {r.wire_bytes:.1f} on the wire" if r.wire_bytes is not None else ""
+                print(f"  ✓ {r.packet_bytes:.1f} bytes/message{wire}, header {r.header_bytes:.1f} "
+                      f"({r.header_share:.1%}), {r.msgs_per_second:.0f} msg/s")
+    except KeyboardInterrupt:
+        print("\n\n✗ Benchmark interrupted")
+
+    if results:
+        # Savings are relative to the first mode measured at each payload size
+        baseline: Dict[str, HeaderResult] = {}
+        for r in results:
+            baseline.setdefault(r.payload_size, r)
+        print(f"\n{'payload':<8} {'mode':<8} {'payload B':>9} {'packet B':>9} {'wire B':>8} {'header':>13} "
+              f"{'saved':>7} {'msg/s':>9}")
+        for r in results:
+            saved = f"{1 - r.packet_bytes / baseline[r.payload_size].packet_bytes:>6.1%}"
+            wire = f"{r.wire_bytes:>8.1f}" if r.wire_bytes is not None else f"{'—':>8}"
+            print(f"{r.payload_size:<8} {r.mode:<8} {r.payload_bytes:>9.1f} {r.packet_bytes:>9.1f} {wire} "
+                  f"{r.header_bytes:>5.1f} ({r.header_share:>5.1%}) {saved:>7} {r.msgs_per_second:>9.0f}")
+        Path(args.output).parent.mkdir(parents=True, exist_ok=True)
+        with open(args.output, "w") as f:
+            json.dump([asdict(r) for r in results], f, indent=2)
+        print(f"\n✓ Results saved to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+"""
+Log-bucketed latency histogram for benchmark samples.
+
+Buckets grow geometrically, so recording is O(1), memory is bounded by the
+value range rather than the sample count, and any percentile is accurate to
+within the configured relative precision.
+"""
+
+import math
+from typing import Dict, List
+
+DEFAULT_PERCENTILES = [50, 90, 99, 99.9]
+
+
+class LatencyHistogram:
+    """Fixed-precision histogram of non-negative values (e.g. milliseconds)."""
+
+    def __init__(self, precision: float = 0.01, lowest: float = 0.001):
+        """
+        Initialize the histogram.
+
+        Args:
+            precision: Relative bucket width (0.01 = 1% error bound)
+            lowest: Smallest distinguishable value; anything below lands in bucket 0
+        """
+        self.precision = precision
+        self.lowest = lowest
+        self._log_base = math.log1p(precision)
+        self.buckets: Dict[int, int] = {}
+        self.count = 0
+        self.total = 0.0
+        self.min = math.inf
+        self.max = 0.0
+
+    def _index(self, value: float) -> int:
+        if value <= self.lowest:
+            return 0
+        return int(math.log(value / self.lowest) / self._log_base) + 1
+
+    def _value(self, index: int) -> float:
+        """Representative (midpoint) value of a bucket."""
+        if index == 0:
+            return self.lowest
+        low = self.lowest * (1 + self.precision) ** (index - 1)
+        return low * (1 + self.precision / 2)
+
+    def record(self, value: float):
+        """Add one sample."""
+        index = self._index(value)
+        self.buckets[index] = self.buckets.get(index, 0) + 1
+        self.count += 1
+        self.total += value
+        if value < self.min:
+            self.min = value
+        if value > self.max:
+            self.max = value
+
+    def merge(self, other: "LatencyHistogram"):
+        """Fold another histogram with the same precision into this one."""
+        for index, count in other.buckets.items():
+            self.buckets[index] = self.buckets.get(index, 0) + count
+        self.count += other.count
+        self.total += other.total
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+
+    def percentiles(self, qs: List[float]) -> Dict[float, float]:
+        """
+        Compute several percentiles in one pass over the sorted buckets.
+
+        Args:
+            qs: Percentiles in the range 0-100
+
+        Returns:
+            Mapping of percentile to value
+        """
+        result: Dict[float, float] = {}
+        if not self.count:
+            return {q: 0.0 for q in qs}
+        targets = sorted((max(1, math.ceil(q / 100 * self.count)), q) for q in qs)
+        seen = 0
+        pending = iter(targets)
+        rank, q = next(pending)
+        for index in sorted(self.buckets):
+            seen += self.buckets[index]
+            while seen >= rank:
+                result[q] = min(max(self._value(index), self.min), self.max)
+                try:
+                    rank, q = next(pending)
+                except StopIteration:
+                    return result
+        return result
+
+    def percentile(self, q: float) -> float:
+        """Value at percentile q (0-100)."""
+        return self.percentiles([q])[q]
+
+    @property
+    def mean(self) -> float:
+        return self.total / self.count if self.count else 0.0
+
+    def summary(self, qs: List[float] = DEFAULT_PERCENTILES) -> Dict[str, float]:
+        """Summary suitable for JSON results: count, min, mean, pNN..., max."""
+        summary = {"count": self.count, "min": self.min if self.count else 0.0, "mean": self.mean}
+        for q, value in self.percentiles(qs).items():
+            summary[f"p{q:g}".replace(".", "")] = value
+        summary["max"] = self.max
+        return summary
@@ -0,0 +1,151 @@
+#!/usr/bin/env python3
+"""
+SQLite ingestion benchmark for the Python subscriber's storage sink.
+
+Two modes:
+
+- direct: feeds synthetic decoded readings straight into SQLiteSink for each
+  batch size, isolating the storage path (rows/sec, writer busy fraction,
+  producer back-pressure);
+- mqtt: runs `subscriber.py --sqlite --quiet` against the broker, drives it
+  with one or more Python publishers and reports the sink's end-to-end
+  ingest rate (first received reading to last commit).
+"""
+
+import argparse
+import json
+import re
+import signal
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, Dict, List
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT / "python" / "src"))
+
+from sqlite_sink import SQLiteSink  # noqa: E402
+
+INGEST_LINE = re.compile(r"SQLite ingest: (\d+) rows in (\d+) batches, (\d+) rows/s "
+                         r"\(writer busy (\d+)%, producer blocked ([\d.]+)s\)")
+
+
+def run_direct(batch_size: int, rows: int, flush_interval: float, directory: Path) -> Dict[str, Any]:
+    """
+    Ingest synthetic readings in-process.
+
+    Args:
+        batch_size: Rows per transaction
+        rows: Readings to ingest
+        flush_interval: Partial-batch flush interval in seconds
+        directory: Directory for the throwaway database
+
+    Returns:
+        Sink stats plus wall-clock seconds
+    """
+    path = directory / f"direct_{batch_size}.db"
+    sink = SQLiteSink(str(path), batch_size, flush_interval, max_pending=max(batch_size * 4, 10000))
+    reading = {"timestamp": time.time(), "sensor_id": "sensor_001", "temperature": 21.5,
+               "humidity": 45.0, "pressure": 1013.2}
+    start = time.perf_counter()
+    for _ in range(rows):
+        sink.add("mqtt-comparison/ingest", time.time(), reading)
+    sink.close()
+    return {"mode": "direct", "batch_size": batch_size, "wall_seconds": time.perf_counter() - start,
+            **sink.stats()}
+
+
+def run_mqtt(args, batch_size: int, directory: Path) -> Dict[str, Any]:
+    """
+    Ingest through the broker with subscriber.py --sqlite.
+
+    Args:
+        args: Parsed command-line arguments (broker, port, encoding, qos, count, publishers)
+        batch_size: Rows per transaction
+        directory: Directory for the throwaway database
+
+    Returns:
+        Parsed sink summary plus the number of messages published
+    """
+    topic = f"mqtt-comparison/ingest/{batch_size}"
+    path = directory / f"mqtt_{batch_size}.db"
+    common = ["--broker", args.broker, "--port", str(args.port), "--encoding", args.encoding,
+              "--qos", str(args.qos), "--topic", topic]
+    subscriber = subprocess.Popen(
+        [sys.executable, "python/src/subscriber.py", *common, "--quiet", "--sqlite", str(path),
+         "--sqlite-batch", str(batch_size), "--sqlite-flush", str(args.flush)],
+        cwd=ROOT, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True)
+    try:
+        time.sleep(args.settle)  # let the subscription land before publishing
+        publishers = [subprocess.Popen(
+            [sys.executable, "python/src/publisher.py", *common, "--count", str(args.count), "--interval", "0",
+             "--sensor-id", f"sensor_{i:03d}"],
+            cwd=ROOT, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL) for i in range(args.publishers)]
+        for publisher in publishers:
+            publisher.wait()
+        time.sleep(args.settle)  # in-flight deliveries
+    finally:
+        subscriber.send_signal(signal.SIGINT)
+        output = subscriber.communicate(timeout=60)[0]
+    match = INGEST_LINE.search(output)
+    if not match:
+        raise RuntimeError(f"no ingest summary from subscriber:\n{output[-500:]}")
+    rows, batches, rate, busy, blocked = match.groups()
+    return {"mode": "mqtt", "batch_size": batch_size, "published": args.count * args.publishers,
+            "rows": int(rows), "batches": int(batches), "rows_per_second": float(rate),
+            "writer_busy": int(busy) / 100, "blocked_seconds": float(blocked)}
+
+
+def main():
+    """Main entry point."""
+    parser = argparse.ArgumentParser(description="SQLite sink ingestion benchmark")
+    parser.add_argument("--mode", choices=["direct", "mqtt"], default="direct", help="Benchmark mode")
+    parser.add_argument("--batch-sizes", nargs="+", type=int, default=[1, 10, 100, 500, 2000],
+                        help="Rows per transaction to compare")
+    parser.add_argument("--rows", type=int, default=50000, help="Readings per run (direct mode)")
+    parser.add_argument("--flush", type=float, default=0.25, help="Partial-batch flush interval (seconds)")
+    parser.add_argument("--broker", default="localhost", help="MQTT broker hostname (mqtt mode)")
+    parser.add_argument("--port", type=int, default=1883, help="MQTT broker port (mqtt mode)")
+    parser.add_argument("--encoding", default="json", help="Encoding (mqtt mode)")
+    parser.add_argument("--qos", type=int, choices=[0, 1, 2], default=1, help="QoS level (mqtt mode)")
+    parser.add_argument("--count", type=int, default=2000, help="Messages per publisher (mqtt mode)")
+    parser.add_argument("--publishers", type=int, default=4, help="Concurrent publishers (mqtt mode)")
+    parser.add_argument("--settle", type=float, default=1.0,
+                        help="Seconds to wait after subscribing and after publishing (mqtt mode)")
+    parser.add_argument("--output", default=None, help="Write results as JSON to this file")
+
+    args = parser.parse_args()
+
+    results: List[Dict[str, Any]] = []
+    with tempfile.TemporaryDirectory(prefix="ingest-") as tmp:
+        for batch_size in args.batch_sizes:
+            print(f"Running {args.mode} ingest, batch size {batch_size}...")
+            try:
+                if args.mode == "direct":
+                    result = run_direct(batch_size, args.rows, args.flush, Path(tmp))
+                else:
+                    result = run_mqtt(args, batch_size, Path(tmp))
+            except (RuntimeError, subprocess.TimeoutExpired) as e:
+                print(f"  ✗ {e}")
+                continue
+            results.append(result)
+            missing = result.get("published", result["rows"]) - result["rows"]
+            print(f"  ✓ {result['rows']} rows in {result['batches']} batches: {result['rows_per_second']:.0f} rows/s, "
+                  f"writer busy {result['writer_busy']:.0%}, producer blocked {result['blocked_seconds']:.2f}s"
+                  + (f" ({missing} published messages not stored)" if missing else ""))
+
+    if results:
+        print(f"\n{'batch':>6} {'rows/s':>10} {'busy':>6}")
+        for r in results:
+            print(f"{r['batch_size']:>6} {r['rows_per_second']:>10.0f} {r['writer_busy']:>6.0%}")
+    if args.output:
+        Path(args.output).parent.mkdir(parents=True, exist_ok=True)
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"\n✓ Results saved to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,277 @@
+#!/usr/bin/env python3
+"""
+Network-impairment TCP proxy for benchmarks.
+
+Sits between MQTT clients and the broker on localhost and, in each
+direction, delays data by a base latency plus random jitter, serializes it
+through a bandwidth cap, and aborts connections at random (exponentially
+distributed) intervals to mimic cellular links dropping. Delivery order is
+preserved, as on a real TCP path: jitter stretches gaps between chunks but
+never reorders them. A bounded per-direction queue stands in for the link
+buffer, so a capped link pushes back on the sender instead of buffering
+without limit.
+
+The proxy runs an asyncio loop in a background thread so the harness can
+keep launching and timing client processes while it is up.
+"""
+
+import argparse
+import asyncio
+import random
+import threading
+import time
+from dataclasses import asdict, dataclass
+from typing import Dict, Optional
+
+CHUNK = 16384
+# Chunks queued per direction before the proxy stops reading (the "link buffer")
+QUEUE_CHUNKS = 64
+
+
+@dataclass
+class Impairment:
+    """Link characteristics applied in each direction."""
+    name: str = "direct"
+    latency_ms: float = 0.0
+    jitter_ms: float = 0.0
+    bandwidth_kbps: float = 0.0
+    resets_per_minute: float = 0.0
+
+    @property
+    def direct(self) -> bool:
+        return not (self.latency_ms or self.jitter_ms or self.bandwidth_kbps or self.resets_per_minute)
+
+
+PROFILES: Dict[str, Impairment] = {
+    "direct": Impairment(),
+    "lan": Impairment("lan", 0.5, 0.2),
+    "wifi": Impairment("wifi", 5, 3, 20000),
+    "4g": Impairment("4g", 40, 15, 5000),
+    "3g": Impairment("3g", 120, 40, 750),
+    "lossy-cellular": Impairment("lossy-cellular", 80, 60, 1000, 2),
+}
+
+SPEC_KEYS = {"latency": "latency_ms", "jitter": "jitter_ms", "bandwidth": "bandwidth_kbps",
+             "resets": "resets_per_minute"}
+
+
+def parse_impairment(spec: str) -> Impairment:
+    """
+    Parse a profile name or a custom spec.
+
+    Args:
+        spec: A name from PROFILES, or comma-separated key=value pairs with keys
+              latency (ms), jitter (ms), bandwidth (kbit/s) and resets (per
+              minute), e.g. 'latency=50,jitter=10,bandwidth=1000,resets=1'
+
+    Returns:
+        Impairment named after the spec
+
+    Raises:
+        ValueError: If the spec is neither a profile nor valid key=value pairs
+    """
+    if spec in PROFILES:
+        return PROFILES[spec]
+    values = {}
+    for item in spec.split(","):
+        key, _, value = item.partition("=")
+        if key.strip() not in SPEC_KEYS or not value:
+            raise ValueError(f"invalid network profile {spec!r}: expected one of {', '.join(PROFILES)} "
+                             f"or key=value pairs with keys {', '.join(SPEC_KEYS)}")
+        values[SPEC_KEYS[key.strip()]] = float(value)
+    return Impairment(spec, **values)
+
+
+class ImpairmentProxy:
+    """Impairing TCP forwarder from a local port to an upstream broker."""
+
+    def __init__(self, impairment: Impairment, upstream_host: str, upstream_port: int,
+                 listen_host: str = "127.0.0.1", listen_port: int = 0, seed: Optional[int] = None):
+        """
+        Initialize the proxy (call start() to listen).
+
+        Args:
+            impairment: Link characteristics
+            upstream_host: Broker hostname
+            upstream_port: Broker port
+            listen_host: Address clients connect to
+            listen_port: Port clients connect to (0 picks a free port)
+            seed: Seed for jitter and reset timing, for repeatable runs
+        """
+        self.impairment = impairment
+        self.upstream_host = upstream_host
+        self.upstream_port = upstream_port
+        self.listen_host = listen_host
+        self.port = listen_port
+        self.connections = 0
+        self.resets = 0
+        self.bytes_up = 0
+        self.bytes_down = 0
+        self._random = random.Random(seed)
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._server = None
+        self._thread: Optional[threading.Thread] = None
+        self._ready = threading.Event()
+        self._error: Optional[BaseException] = None
+
+    def start(self, timeout: float = 5.0):
+        """
+        Start listening in a background thread.
+
+        Raises:
+            OSError: If the listen socket cannot be bound
+        """
+        self._thread = threading.Thread(target=self._run, name="netem-proxy", daemon=True)
+        self._thread.start()
+        self._ready.wait(timeout)
+        if self._error:
+            raise self._error
+
+    def _run(self):
+        self._loop = asyncio.new_event_loop()
+        try:
+            self._server = self._loop.run_until_complete(
+                asyncio.start_server(self._handle, self.listen_host, self.port))
+            self.port = self._server.sockets[0].getsockname()[1]
+        except OSError as e:
+            self._error = e
+            self._ready.set()
+            return
+        self._ready.set()
+        self._loop.run_forever()
+        self._loop.close()
+
+    def stop(self):
+        """Close the listener and every proxied connection."""
+        if self._loop is None or self._error:
+            return
+
+        async def shutdown():
+            self._server.close()
+            tasks = [task for task in asyncio.all_tasks() if task is not asyncio.current_task()]
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            self._loop.stop()
+
+        asyncio.run_coroutine_threadsafe(shutdown(), self._loop)
+        self._thread.join(5)
+
+    def stats(self) -> Dict[str, float]:
+        """Connection, reset and byte counters plus the impairment settings."""
+        return {**asdict(self.impairment), "connections": self.connections, "resets": self.resets,
+                "bytes_up": self.bytes_up, "bytes_down": self.bytes_down}
+
+    def _delay(self) -> float:
+        """One-way delay in seconds for the next chunk."""
+        delay = self.impairment.latency_ms
+        if self.impairment.jitter_ms:
+            delay += self._random.gauss(0, self.impairment.jitter_ms)
+        return max(0.0, delay) / 1000
+
+    async def _handle(self, client_reader: asyncio.StreamReader, client_writer: asyncio.StreamWriter):
+        try:
+            upstream_reader, upstream_writer = await asyncio.open_connection(self.upstream_host, self.upstream_port)
+        except OSError:
+            client_writer.close()
+            return
+        self.connections += 1
+        tasks = [asyncio.ensure_future(self._pipe(client_reader, upstream_writer, "up")),
+                 asyncio.ensure_future(self._pipe(upstream_reader, client_writer, "down"))]
+        if self.impairment.resets_per_minute:
+            tasks.append(asyncio.ensure_future(asyncio.sleep(
+                self._random.expovariate(self.impairment.resets_per_minute / 60))))
+        try:
+            done, pending = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+            if len(tasks) == 3 and tasks[2] in done:
+                # Abort both sides (RST), as when a cellular link drops
+                self.resets += 1
+                client_writer.transport.abort()
+                upstream_writer.transport.abort()
+            else:
+                # One side closed: finish delivering the other side's queued data first
+                await asyncio.wait(tasks[:2], timeout=self.impairment.latency_ms / 1000 + 1)
+        except asyncio.CancelledError:
+            pass  # proxy shutting down; a cancelled handler task would be reported by asyncio
+        finally:
+            for task in tasks:
+                task.cancel()
+            for writer in (client_writer, upstream_writer):
+                writer.close()
+
+    async def _pipe(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter, direction: str):
+        """Forward one direction, delaying and rate-limiting each chunk in order."""
+        loop = asyncio.get_running_loop()
+        queue: asyncio.Queue = asyncio.Queue(QUEUE_CHUNKS)
+        bytes_per_second = self.impairment.bandwidth_kbps * 125
+
+        async def deliver():
+            while True:
+                due, data = await queue.get()
+                if data is None:
+                    break
+                wait = due - loop.time()
+                if wait > 0:
+                    await asyncio.sleep(wait)
+                writer.write(data)
+                await writer.drain()
+            if writer.can_write_eof():
+                writer.write_eof()
+
+        deliverer = asyncio.ensure_future(deliver())
+        link_free = 0.0
+        last_due = 0.0
+        try:
+            while True:
+                data = await reader.read(CHUNK)
+                if not data:
+                    break
+                if direction == "up":
+                    self.bytes_up += len(data)
+                else:
+                    self.bytes_down += len(data)
+                now = loop.time()
+                sent = now
+                if bytes_per_second:
+                    # Serialization delay: the link carries one chunk at a time
+                    link_free = max(now, link_free) + len(data) / bytes_per_second
+                    sent = link_free
+                last_due = max(last_due, sent + self._delay())
+                await queue.put((last_due, data))
+            await queue.put((0.0, None))
+            await deliverer
+        finally:
+            deliverer.cancel()
+
+
+def main():
+    """Run a standalone proxy (e.g. in front of a broker for manual testing)."""
+    parser = argparse.ArgumentParser(description="Network-impairment TCP proxy for MQTT benchmarks")
+    parser.add_argument("profile", help=f"Profile ({', '.join(PROFILES)}) or key=value spec "
+                                        "(latency=ms,jitter=ms,bandwidth=kbit/s,resets=per minute)")
+    parser.add_argument("--broker", default="localhost", help="Upstream broker hostname")
+    parser.add_argument("--port", type=int, default=1883, help="Upstream broker port")
+    parser.add_argument("--listen-port", type=int, default=1884, help="Port clients connect to")
+    parser.add_argument("--seed", type=int, default=None, help="Random seed for jitter and resets")
+
+    args = parser.parse_args()
+    try:
+        impairment = parse_impairment(args.profile)
+    except ValueError as e:
+        parser.error(str(e))
+
+    proxy = ImpairmentProxy(impairment, args.broker, args.port, listen_port=args.listen_port, seed=args.seed)
+    proxy.start()
+    print(f"✓ Proxying 127.0.0.1:{proxy.port} -> {args.broker}:{args.port} ({impairment})")
+    try:
+        while True:
+            time.sleep(10)
+            s = proxy.stats()
+            print(f"  {s['connections']} connections, {s['resets']} resets, "
+                  f"{s['bytes_up']} bytes up, {s['bytes_down']} bytes down")
+    except KeyboardInterrupt:
+        proxy.stop()
+
+
+if __name__ == "__main__":
+    main()
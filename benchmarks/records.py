@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+"""
+Per-message record stream consumed from benchmark clients.
+
+Every publisher accepts ``--records PATH`` and writes one JSON object per
+published message (see schemas/publish_records.md). The harness points PATH
+at a FIFO and folds records into a histogram while the client is running.
+"""
+
+import json
+import os
+import tempfile
+import threading
+from array import array
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from histogram import LatencyHistogram
+
+
+class RecordStream:
+    """FIFO-backed reader for a client's per-message records."""
+
+    def __init__(self, context: Optional[Dict] = None, samples_path: Optional[str] = None,
+                 field: str = "pub_ms", keep_columns: bool = False):
+        """
+        Initialize the record stream.
+
+        Args:
+            context: Fields added to each persisted sample (lang, enc, variant, qos, ...)
+            samples_path: If set, append each record as a JSONL sample row here
+            field: Record field folded into the latency histogram ('pub_ms' or 'rtt_ms')
+            keep_columns: Also keep every record as compact seq/field/bytes columns
+        """
+        self.context = context or {}
+        self.field = field
+        self.samples_path = Path(samples_path) if samples_path else None
+        self.latency = LatencyHistogram()
+        self.bytes = 0
+        self.records = 0
+        self.errors = 0
+        self.columns = {"seq": array("q"), field: array("d"), "bytes": array("q")} if keep_columns else None
+        self._dir = tempfile.mkdtemp(prefix="mqtt-records-")
+        self.path = os.path.join(self._dir, "records.fifo")
+        os.mkfifo(self.path)
+        self._thread: Optional[threading.Thread] = None
+
+    def args(self) -> List[str]:
+        """Command-line arguments that point a client at this stream."""
+        return ["--records", self.path]
+
+    def _consume(self):
+        """Read records until the writer closes the FIFO."""
+        samples = None
+        if self.samples_path:
+            self.samples_path.parent.mkdir(parents=True, exist_ok=True)
+            samples = self.samples_path.open("a")
+        try:
+            with open(self.path, "r") as fifo:
+                for line in fifo:
+                    line = line.strip()
+                    if not line:
+                        continue
+                    try:
+                        record = json.loads(line)
+                        value = float(record[self.field])
+                    except (ValueError, KeyError, TypeError):
+                        self.errors += 1
+                        continue
+                    self.records += 1
+                    self.latency.record(value)
+                    size = int(record.get("bytes", 0))
+                    self.bytes += size
+                    if self.columns is not None:
+                        self.columns["seq"].append(int(record.get("seq", self.records)))
+                        self.columns[self.field].append(value)
+                        self.columns["bytes"].append(size)
+                    if samples:
+                        samples.write(json.dumps({**self.context, **record}) + "\n")
+        finally:
+            if samples:
+                samples.close()
+
+    def start(self):
+        """Start consuming in a background thread (before launching the client)."""
+        self._thread = threading.Thread(target=self._consume, name="record-stream", daemon=True)
+        self._thread.start()
+
+    def finish(self, timeout: float = 5.0):
+        """
+        Wait for the stream to drain after the client has exited.
+
+        A client that never opened the FIFO leaves the reader blocked in
+        open(); opening the write end ourselves releases it with EOF.
+        """
+        if self._thread is None:
+            return
+        self._thread.join(timeout=0.1)
+        if self._thread.is_alive():
+            try:
+                os.close(os.open(self.path, os.O_WRONLY | os.O_NONBLOCK))
+            except OSError:
+                pass
+            self._thread.join(timeout=timeout)
+        try:
+            os.unlink(self.path)
+            os.rmdir(self._dir)
+        except OSError:
+            pass
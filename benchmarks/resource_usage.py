@@ -0,0 +1,184 @@
+#!/usr/bin/env python3
+"""
+Resource accounting for benchmark client subprocesses and the broker.
+
+Client usage comes from wait4() on the child, broker usage from /proc
+snapshots taken before and after each run. Linux-only fields (syscalls,
+broker sampling) are left as None elsewhere.
+"""
+
+import os
+import subprocess
+import tempfile
+import threading
+from dataclasses import dataclass
+from pathlib import Path
+from typing import List, Optional, Tuple
+
+PROC = Path("/proc")
+CLOCK_TICKS = os.sysconf("SC_CLK_TCK") if hasattr(os, "sysconf") else 100
+
+
+@dataclass
+class ResourceUsage:
+    """CPU, memory and scheduling counters for one process."""
+    cpu_user: float = 0.0
+    cpu_system: float = 0.0
+    peak_rss_kb: int = 0
+    voluntary_ctx_switches: int = 0
+    involuntary_ctx_switches: int = 0
+    syscalls: Optional[int] = None
+
+    @property
+    def cpu_total(self) -> float:
+        """User plus system CPU seconds."""
+        return self.cpu_user + self.cpu_system
+
+
+def usage_from_rusage(ru) -> ResourceUsage:
+    """
+    Convert a resource.struct_rusage into ResourceUsage.
+
+    Args:
+        ru: rusage as returned by os.wait4() or resource.getrusage()
+
+    Returns:
+        ResourceUsage object
+    """
+    return ResourceUsage(
+        cpu_user=ru.ru_utime,
+        cpu_system=ru.ru_stime,
+        peak_rss_kb=ru.ru_maxrss,
+        voluntary_ctx_switches=ru.ru_nvcsw,
+        involuntary_ctx_switches=ru.ru_nivcsw,
+    )
+
+
+def read_proc_syscalls(pid: int) -> Optional[int]:
+    """Return read+write syscall count from /proc/<pid>/io, if readable."""
+    try:
+        fields = dict(line.split(":", 1) for line in (PROC / str(pid) / "io").read_text().splitlines())
+        return int(fields["syscr"]) + int(fields["syscw"])
+    except (OSError, KeyError, ValueError):
+        return None
+
+
+def read_proc_usage(pid: int) -> Optional[ResourceUsage]:
+    """
+    Snapshot cumulative usage of a running process from /proc.
+
+    Args:
+        pid: Process ID
+
+    Returns:
+        ResourceUsage object, or None if the process is not visible
+    """
+    try:
+        stat = (PROC / str(pid) / "stat").read_text()
+        status = (PROC / str(pid) / "status").read_text()
+    except OSError:
+        return None
+
+    # comm may contain spaces, so split after the closing parenthesis
+    stat_fields = stat.rsplit(")", 1)[1].split()
+    fields = {}
+    for line in status.splitlines():
+        key, _, value = line.partition(":")
+        fields[key] = value.split()[0] if value.split() else "0"
+
+    return ResourceUsage(
+        cpu_user=int(stat_fields[11]) / CLOCK_TICKS,
+        cpu_system=int(stat_fields[12]) / CLOCK_TICKS,
+        peak_rss_kb=int(fields.get("VmHWM", 0)),
+        voluntary_ctx_switches=int(fields.get("voluntary_ctxt_switches", 0)),
+        involuntary_ctx_switches=int(fields.get("nonvoluntary_ctxt_switches", 0)),
+        syscalls=read_proc_syscalls(pid),
+    )
+
+
+def usage_delta(before: ResourceUsage, after: ResourceUsage) -> ResourceUsage:
+    """
+    Usage accrued between two snapshots of the same process.
+
+    Peak RSS is a high-water mark, so the later value is kept as-is.
+    """
+    syscalls = None
+    if before.syscalls is not None and after.syscalls is not None:
+        syscalls = after.syscalls - before.syscalls
+    return ResourceUsage(
+        cpu_user=after.cpu_user - before.cpu_user,
+        cpu_system=after.cpu_system - before.cpu_system,
+        peak_rss_kb=after.peak_rss_kb,
+        voluntary_ctx_switches=after.voluntary_ctx_switches - before.voluntary_ctx_switches,
+        involuntary_ctx_switches=after.involuntary_ctx_switches - before.involuntary_ctx_switches,
+        syscalls=syscalls,
+    )
+
+
+def find_broker_pid(name: str = "mosquitto") -> Optional[int]:
+    """
+    Find a locally visible broker process by command name.
+
+    Args:
+        name: Process name as shown in /proc/<pid>/comm
+
+    Returns:
+        PID of the first match, or None
+    """
+    if not PROC.is_dir():
+        return None
+    for entry in PROC.iterdir():
+        if not entry.name.isdigit():
+            continue
+        try:
+            if (entry / "comm").read_text().strip() == name:
+                return int(entry.name)
+        except OSError:
+            continue
+    return None
+
+
+def run_with_usage(cmd: List[str], cwd: Optional[str] = None,
+                   poll_interval: float = 0.05) -> Tuple[subprocess.CompletedProcess, ResourceUsage]:
+    """
+    Run a command to completion and account for the resources it used.
+
+    The child is reaped with os.wait4() so its rusage is exact rather than
+    mixed into RUSAGE_CHILDREN. Syscall counts are polled from /proc while
+    the child runs, so the last few milliseconds may be missed.
+
+    Args:
+        cmd: Command and arguments
+        cwd: Working directory
+        poll_interval: Seconds between /proc/<pid>/io polls
+
+    Returns:
+        Tuple of (CompletedProcess with captured text output, ResourceUsage)
+    """
+    with tempfile.TemporaryFile("w+") as out, tempfile.TemporaryFile("w+") as err:
+        proc = subprocess.Popen(cmd, stdout=out, stderr=err, text=True, cwd=cwd)
+        syscalls: List[Optional[int]] = [None]
+        done = threading.Event()
+
+        def poll_syscalls():
+            while not done.wait(poll_interval):
+                count = read_proc_syscalls(proc.pid)
+                if count is not None:
+                    syscalls[0] = count
+
+        poller = threading.Thread(target=poll_syscalls, daemon=True)
+        poller.start()
+        try:
+            _, status, ru = os.wait4(proc.pid, 0)
+        finally:
+            done.set()
+            poller.join()
+        proc.returncode = os.waitstatus_to_exitcode(status)
+
+        out.seek(0)
+        err.seek(0)
+        completed = subprocess.CompletedProcess(cmd, proc.returncode, out.read(), err.read())
+
+    usage = usage_from_rusage(ru)
+    usage.syscalls = syscalls[0]
+    return completed, usage
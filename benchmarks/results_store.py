@@ -0,0 +1,173 @@
+#!/usr/bin/env python3
+"""
+Append-only columnar store for benchmark results.
+
+Runs and per-message samples are written as zstd-compressed Parquet part
+files in Hive-style partitions, so any Arrow-aware tool (pandas, pyarrow,
+DuckDB) can read them directly:
+
+    <root>/runs/language=<lang>/encoding=<enc>/part-<utc>-<id>.parquet
+    <root>/samples/language=<lang>/encoding=<enc>/part-<utc>-<id>.parquet
+
+Every write adds new part files and never rewrites existing ones. Readers
+prune partitions by directory name and load only the requested columns.
+"""
+
+import argparse
+import json
+import uuid
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+PARTITIONS = ["language", "encoding"]
+TABLES = ["runs", "samples"]
+
+
+class ResultsStore:
+    """Partitioned, append-only Parquet store for runs and samples."""
+
+    def __init__(self, root: str = "results/store"):
+        """
+        Initialize the store.
+
+        Args:
+            root: Store root directory (created on first write)
+        """
+        self.root = Path(root)
+
+    def _write(self, table: str, df: pd.DataFrame) -> List[Path]:
+        """Write one new part file per (language, encoding) partition."""
+        written = []
+        stamp = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%SZ")
+        for (language, encoding), part in df.groupby(PARTITIONS, sort=False):
+            directory = self.root / table / f"language={language}" / f"encoding={encoding}"
+            directory.mkdir(parents=True, exist_ok=True)
+            path = directory / f"part-{stamp}-{uuid.uuid4().hex[:8]}.parquet"
+            pq.write_table(pa.Table.from_pandas(part, preserve_index=False), path, compression="zstd")
+            written.append(path)
+        return written
+
+    def append_runs(self, results: List[Dict[str, Any]]) -> List[Path]:
+        """
+        Append benchmark runs (BenchmarkResult dicts).
+
+        Nested dicts such as client_usage or publish_latency_ms are flattened
+        into dotted columns ('client_usage.cpu_user').
+
+        Args:
+            results: Result dictionaries with 'language' and 'encoding'
+
+        Returns:
+            Paths of the part files written
+        """
+        if not results:
+            return []
+        return self._write("runs", pd.json_normalize(results))
+
+    def append_samples(self, context: Dict[str, Any], columns: Dict[str, Iterable]) -> List[Path]:
+        """
+        Append per-message samples for one run.
+
+        Args:
+            context: Constant fields for every sample (language, encoding, run_id, qos, ...)
+            columns: Equal-length sample columns (seq, pub_ms or rtt_ms, bytes)
+
+        Returns:
+            Paths of the part files written
+        """
+        df = pd.DataFrame(columns)
+        if df.empty:
+            return []
+        for name, value in context.items():
+            df[name] = value
+        return self._write("samples", df)
+
+    def parts(self, table: str, languages: Optional[List[str]] = None,
+              encodings: Optional[List[str]] = None) -> List[Path]:
+        """List part files of a table, pruned by partition."""
+        base = self.root / table
+        if not base.is_dir():
+            return []
+        paths = []
+        for language_dir in sorted(base.glob("language=*")):
+            if languages and language_dir.name.split("=", 1)[1] not in languages:
+                continue
+            for encoding_dir in sorted(language_dir.glob("encoding=*")):
+                if encodings and encoding_dir.name.split("=", 1)[1] not in encodings:
+                    continue
+                paths.extend(sorted(encoding_dir.glob("*.parquet")))
+        return paths
+
+    def read(self, table: str, columns: Optional[List[str]] = None,
+             languages: Optional[List[str]] = None, encodings: Optional[List[str]] = None) -> pd.DataFrame:
+        """
+        Read a table into one DataFrame.
+
+        Parts written by older harness versions may lack newer columns; those
+        read as NaN rather than failing.
+
+        Args:
+            table: 'runs' or 'samples'
+            columns: Columns to load (default: all)
+            languages: Only these language partitions
+            encodings: Only these encoding partitions
+
+        Returns:
+            Concatenated DataFrame (empty if the table has no parts)
+        """
+        frames = []
+        for path in self.parts(table, languages, encodings):
+            wanted = None
+            if columns is not None:
+                available = set(pq.read_schema(path).names)
+                wanted = [c for c in columns if c in available]
+            frames.append(pq.read_table(path, columns=wanted).to_pandas())
+        if not frames:
+            return pd.DataFrame(columns=columns or [])
+        df = pd.concat(frames, ignore_index=True)
+        return df.reindex(columns=columns) if columns is not None else df
+
+    def read_runs(self, **kwargs) -> pd.DataFrame:
+        """Read the runs table (see read())."""
+        return self.read("runs", **kwargs)
+
+    def read_samples(self, **kwargs) -> pd.DataFrame:
+        """Read the samples table (see read())."""
+        return self.read("samples", **kwargs)
+
+
+def main():
+    """Main entry point."""
+    parser = argparse.ArgumentParser(description="Manage the columnar benchmark results store")
+    parser.add_argument("--store", default="results/store", help="Store root directory")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    import_parser = subparsers.add_parser("import", help="Append benchmark JSON result files as runs")
+    import_parser.add_argument("files", nargs="+", help="benchmark_results.json files")
+    subparsers.add_parser("info", help="Show part and row counts per table")
+
+    args = parser.parse_args()
+    store = ResultsStore(args.store)
+
+    if args.command == "import":
+        for file in args.files:
+            with open(file) as f:
+                results = json.load(f)
+            if isinstance(results, dict):
+                results = [results]
+            written = store.append_runs(results)
+            print(f"✓ {file}: {len(results)} runs -> {len(written)} part files")
+    else:
+        for table in TABLES:
+            parts = store.parts(table)
+            rows = sum(pq.read_metadata(p).num_rows for p in parts)
+            size = sum(p.stat().st_size for p in parts)
+            print(f"{table}: {len(parts)} parts, {rows} rows, {size / 1024:.1f} KiB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,258 @@
+#!/usr/bin/env python3
+"""
+Retained-state bootstrap benchmark.
+
+A dashboard that subscribes to ``sensors/#`` first receives the retained
+last reading of every sensor. This benchmark seeds N retained per-sensor
+topics (one publisher, ``SensorDataPublisher(retain=True)``), then starts a
+fresh process per run that subscribes with ``SensorDataSubscriber`` and keeps
+the latest decoded reading per topic, as a dashboard would. Per codec (each
+is a different decode path in the subscriber) it reports:
+
+- time to full snapshot: SUBSCRIBE sent until all N retained topics arrived;
+- subscriber CPU for the snapshot;
+- memory: RSS growth from connect to full snapshot, per sensor, and peak RSS.
+
+Each run uses its own process so codec imports and allocator state from one
+codec do not count against another.
+"""
+
+import argparse
+import json
+import multiprocessing
+import queue
+import resource
+import statistics
+import sys
+import threading
+import time
+import uuid
+from dataclasses import asdict, dataclass
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT / "python" / "src"))
+
+from publisher import SensorDataPublisher, parse_payload_size  # noqa: E402
+from soak import current_rss_kb  # noqa: E402
+from subscriber import SensorDataSubscriber  # noqa: E402
+
+ENCODINGS = ["json", "msgpack", "cbor", "protobuf", "struct"]
+
+
+@dataclass
+class RetainedResult:
+    """Snapshot measurements for one codec."""
+    encoding: str
+    sensors: int
+    payload_size: str
+    runs: int
+    failures: int
+    seed_msgs_per_second: float
+    snapshot_seconds: Optional[Dict[str, float]] = None
+    snapshot_msgs_per_second: Optional[float] = None
+    cpu_seconds: Optional[float] = None
+    rss_growth_mb: Optional[float] = None
+    bytes_per_sensor: Optional[float] = None
+    peak_rss_mb: Optional[float] = None
+    scenario: str = "retained"
+    run_id: str = ""
+    timestamp: str = ""
+
+
+class SnapshotSink:
+    """Subscriber sink that keeps the latest decoded reading per topic."""
+
+    def __init__(self, expected: int):
+        self.latest: Dict[str, Any] = {}
+        self.expected = expected
+        self.complete = threading.Event()
+
+    def add(self, topic: str, receive_time: float, data: Any):
+        self.latest[topic] = data
+        if len(self.latest) >= self.expected:
+            self.complete.set()
+
+    def close(self):
+        pass
+
+
+def snapshot_worker(config: Dict[str, Any], results):
+    """
+    Subscribe to the seeded prefix in this (fresh) process and time the full snapshot.
+
+    Puts a dict with the received topic count, snapshot time, CPU seconds and RSS figures.
+    """
+    sink = SnapshotSink(config["sensors"])
+    subscriber = SensorDataSubscriber(config["broker"], config["port"], config["encoding"], qos=1,
+                                      sink=sink, quiet=True)
+    connected = threading.Event()
+    subscriber.client.on_connect = lambda client, userdata, flags, reason_code, properties: connected.set()
+    subscriber.client.connect(config["broker"], config["port"], 60)
+    subscriber.client.loop_start()
+    if not connected.wait(10):
+        results.put({"error": "subscriber could not connect"})
+        return
+    rss_before = current_rss_kb() or 0
+    cpu_before = sum(resource.getrusage(resource.RUSAGE_SELF)[:2])
+    start = time.perf_counter()
+    subscriber.client.subscribe(f"{config['prefix']}/#", qos=1)
+    complete = sink.complete.wait(config["timeout"])
+    elapsed = time.perf_counter() - start
+    cpu = sum(resource.getrusage(resource.RUSAGE_SELF)[:2]) - cpu_before
+    rss_after = current_rss_kb() or 0
+    subscriber.client.loop_stop()
+    subscriber.client.disconnect()
+    results.put({"received": len(sink.latest), "complete": complete, "seconds": elapsed, "cpu": cpu,
+                 "rss_growth_kb": rss_after - rss_before,
+                 "peak_rss_kb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+                 "decode_errors": subscriber.decode_errors})
+
+
+def publish_all(publisher: SensorDataPublisher, items, timeout: float) -> float:
+    """
+    Publish (topic, payload) pairs pipelined and wait for every acknowledgement.
+
+    Returns:
+        Seconds from the first publish to the last acknowledgement
+
+    Raises:
+        RuntimeError: If not everything is acknowledged within the timeout
+    """
+    acked = [0]
+    publisher.on_ack = lambda mid: acked.__setitem__(0, acked[0] + 1)
+    start = time.perf_counter()
+    sent = 0
+    for topic, payload in items:
+        publisher.client.publish(topic, payload, qos=publisher.qos, retain=publisher.retain)
+        sent += 1
+    deadline = time.time() + timeout
+    while acked[0] < sent and time.time() < deadline:
+        time.sleep(0.01)
+    if acked[0] < sent:
+        raise RuntimeError(f"only {acked[0]}/{sent} retained publishes acknowledged")
+    return time.perf_counter() - start
+
+
+def run_encoding(encoding: str, args) -> RetainedResult:
+    """
+    Seed, measure and clear the retained topics for one codec.
+
+    Args:
+        encoding: Encoding format
+        args: Parsed command-line arguments
+
+    Returns:
+        RetainedResult for the codec
+    """
+    run_id = uuid.uuid4().hex[:12]
+    prefix = f"{args.prefix}/{encoding}-{run_id}"
+    publisher = SensorDataPublisher(args.broker, args.port, encoding, qos=1, retain=True)
+    publisher.client.max_inflight_messages_set(1000)
+    publisher.connect()
+    topics = [f"{prefix}/sensor_{i:05d}" for i in range(args.sensors)]
+    try:
+        print(f"  Seeding {args.sensors} retained topics...")
+        seed_seconds = publish_all(publisher, (
+            (topic, publisher.encode_message(publisher.create_sensor_data(topic.rsplit("/", 1)[1], args.payload)))
+            for topic in topics), args.timeout)
+        print(f"  ✓ Seeded at {args.sensors / seed_seconds:.0f} msg/s")
+
+        context = multiprocessing.get_context("spawn")
+        config = {"broker": args.broker, "port": args.port, "encoding": encoding, "prefix": prefix,
+                  "sensors": args.sensors, "timeout": args.timeout}
+        samples: List[Dict[str, Any]] = []
+        failures = 0
+        for i in range(args.runs):
+            results = context.Queue()
+            proc = context.Process(target=snapshot_worker, args=(config, results))
+            proc.start()
+            try:
+                sample = results.get(timeout=args.timeout + 30)
+            except queue.Empty:
+                sample = {"error": "snapshot worker did not report"}
+            proc.join(10)
+            if "error" in sample or not sample["complete"]:
+                failures += 1
+                reason = sample.get("error") or f"{sample['received']}/{args.sensors} topics within {args.timeout:g}s"
+                print(f"  ✗ Run {i + 1}: {reason}")
+                continue
+            samples.append(sample)
+            print(f"  Run {i + 1}: {sample['seconds'] * 1000:.0f}ms, CPU {sample['cpu']:.2f}s, "
+                  f"+{sample['rss_growth_kb'] / 1024:.1f} MB")
+    finally:
+        # Empty retained payloads delete the topics so the broker does not accumulate them
+        publish_all(publisher, ((topic, b"") for topic in topics), args.timeout)
+        publisher.disconnect()
+
+    result = RetainedResult(encoding=encoding, sensors=args.sensors, payload_size=args.payload,
+                            runs=len(samples), failures=failures,
+                            seed_msgs_per_second=args.sensors / seed_seconds, run_id=run_id,
+                            timestamp=datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ"))
+    if samples:
+        seconds = sorted(s["seconds"] for s in samples)
+        result.snapshot_seconds = {"min": seconds[0], "p50": statistics.median(seconds), "max": seconds[-1]}
+        result.snapshot_msgs_per_second = args.sensors / result.snapshot_seconds["p50"]
+        result.cpu_seconds = statistics.median(s["cpu"] for s in samples)
+        growth_kb = statistics.median(s["rss_growth_kb"] for s in samples)
+        result.rss_growth_mb = growth_kb / 1024
+        result.bytes_per_sensor = growth_kb * 1024 / args.sensors
+        result.peak_rss_mb = max(s["peak_rss_kb"] for s in samples) / 1024
+        print(f"  ✓ Snapshot: p50 {result.snapshot_seconds['p50'] * 1000:.0f}ms "
+              f"({result.snapshot_msgs_per_second:.0f} msg/s), {result.bytes_per_sensor:.0f} bytes/sensor, "
+              f"peak RSS {result.peak_rss_mb:.1f} MB")
+    return result
+
+
+def main():
+    """Main entry point."""
+    parser = argparse.ArgumentParser(description="Retained-state bootstrap benchmark")
+    parser.add_argument("--encodings", nargs="+", choices=ENCODINGS, default=ENCODINGS, help="Encodings")
+    parser.add_argument("--sensors", type=int, default=20000, help="Retained per-sensor topics to seed")
+    parser.add_argument("--payload", type=parse_payload_size, default="small",
+                        help="Payload size variant or target encoded size")
+    parser.add_argument("--runs", type=int, default=3, help="Snapshot subscriptions per encoding")
+    parser.add_argument("--prefix", default="mqtt-comparison/retained", help="Topic prefix for the seeded sensors")
+    parser.add_argument("--broker", default="localhost", help="MQTT broker hostname")
+    parser.add_argument("--port", type=int, default=1883, help="MQTT broker port")
+    parser.add_argument("--timeout", type=float, default=120.0,
+                        help="Seconds allowed for seeding and for each snapshot")
+    parser.add_argument("--output", default="results/retained_results.json", help="Output file for results")
+
+    args = parser.parse_args()
+
+    print("=" * 60)
+    print("RETAINED-STATE BOOTSTRAP BENCHMARK")
+    print("=" * 60)
+    print(f"Broker: {args.broker}:{args.port}")
+    print(f"Sensors: {args.sensors} retained topics, {args.payload} payload, {args.runs} runs")
+
+    results: List[RetainedResult] = []
+    try:
+        for encoding in args.encodings:
+            print(f"\nBootstrapping {encoding} snapshot...")
+            try:
+                results.append(run_encoding(encoding, args))
+            except (RuntimeError, OSError, ImportError) as e:
+                print(f"  ✗ {e}")
+    except KeyboardInterrupt:
+        print("\n\n✗ Benchmark interrupted")
+
+    if results:
+        print(f"\n{'encoding':<9} {'snapshot':>10} {'msg/s':>9} {'CPU s':>7} {'B/sensor':>9} {'peak MB':>8}")
+        for r in results:
+            if r.snapshot_seconds is None:
+                print(f"{r.encoding:<9} {'—':>10}")
+                continue
+            print(f"{r.encoding:<9} {r.snapshot_seconds['p50'] * 1000:>8.0f}ms {r.snapshot_msgs_per_second:>9.0f} "
+                  f"{r.cpu_seconds:>7.2f} {r.bytes_per_sensor:>9.0f} {r.peak_rss_mb:>8.1f}")
+        Path(args.output).parent.mkdir(parents=True, exist_ok=True)
+        with open(args.output, "w") as f:
+            json.dump([asdict(r) for r in results], f, indent=2)
+        print(f"\n✓ Results saved to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -93,7 +93,8 @@ def run_benchmark_suite():
                 "--payloads"] + config["payloads"] + [
                 "--qos"] + [str(q) for q in config["qos"]] + [
                 "--count", str(config["count"]),
-                "--output", f"results/{config['language']}/benchmark_results.json"
+                "--output", f"results/{config['language']}/benchmark_results.json",
+                "--store", "results/store"
             ]
             
             result = subprocess.run(cmd, capture_output=True, text=True)
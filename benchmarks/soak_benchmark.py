@@ -0,0 +1,186 @@
+#!/usr/bin/env python3
+"""
+Soak test: hours at a fixed rate, watching for leaks and drift.
+
+Short benchmarks (100 messages by default) never run long enough to show
+unbounded buffers, paho queue growth or slowly degrading latency. This
+harness runs, for a fixed duration:
+
+- the Python subscriber in soak mode (--soak), sampling its receive rate,
+  end-to-end latency percentiles, RSS, GC state and sink queue depth;
+- the Python publisher in soak mode at --rate msg/s, sampling its ack rate,
+  ack latency percentiles, RSS, GC state, in-flight messages and paho queue
+  depth;
+- the broker (found by process name), sampled here for RSS and CPU.
+
+Each role writes a JSON-lines time series to --output-dir. At the end every
+series is run through soak.analyze(), which flags monotonic growth (memory,
+GC objects, queues) and drift between the first and last quarter
+(throughput, p50/p99 latency); the findings are saved to --output.
+"""
+
+import argparse
+import json
+import signal
+import subprocess
+import sys
+import time
+import uuid
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT / "python" / "src"))
+
+from resource_usage import find_broker_pid, read_proc_usage  # noqa: E402
+from soak import analyze, current_rss_kb, load_series, parse_duration, print_findings  # noqa: E402
+
+# Seconds for the subscriber to subscribe before publishing, and to drain after
+SETTLE = 2.0
+
+
+def sample_broker(pid: int, duration: float, interval: float, output: Path) -> List[Dict[str, Any]]:
+    """
+    Sample a broker's RSS and CPU at a fixed interval, as a SoakMonitor time series.
+
+    Args:
+        pid: Broker process ID
+        duration: Seconds to sample for
+        interval: Seconds between samples
+        output: JSON-lines file written as samples are taken
+
+    Returns:
+        Samples with t, rss_mb and cpu_percent (stops early if the broker exits)
+    """
+    samples = []
+    start = time.perf_counter()
+    last = (start, read_proc_usage(pid))
+    with open(output, "w", buffering=1) as f:
+        next_sample = start + interval
+        while next_sample <= start + duration:
+            time.sleep(max(0.0, next_sample - time.perf_counter()))
+            now, usage, rss_kb = time.perf_counter(), read_proc_usage(pid), current_rss_kb(pid)
+            if usage is None or rss_kb is None or last[1] is None:
+                print("  ✗ Broker process is gone; stopped sampling it")
+                break
+            samples.append({"t": round(now - start, 3), "rss_mb": round(rss_kb / 1024, 2),
+                            "cpu_percent": round((usage.cpu_total - last[1].cpu_total) / (now - last[0]) * 100, 1)})
+            f.write(json.dumps(samples[-1]) + "\n")
+            last = (now, usage)
+            next_sample += interval
+    return samples
+
+
+def main():
+    """Main entry point."""
+    parser = argparse.ArgumentParser(description="Soak-test the Python publisher, subscriber and broker")
+    parser.add_argument("--duration", type=parse_duration, default="1h",
+                        help="How long to publish (e.g. 30m, 6h)")
+    parser.add_argument("--rate", type=float, default=100.0, help="Messages per second")
+    parser.add_argument("--interval", type=float, default=10.0, help="Seconds between samples")
+    parser.add_argument("--encoding", choices=["json", "msgpack", "cbor", "protobuf", "struct"], default="json",
+                        help="Encoding format")
+    parser.add_argument("--payload", default="small", help="Payload size variant or target size")
+    parser.add_argument("--qos", type=int, choices=[0, 1, 2], default=1, help="Quality of Service level")
+    parser.add_argument("--topic", default="mqtt-comparison/soak", help="MQTT topic")
+    parser.add_argument("--broker", default="localhost", help="MQTT broker hostname")
+    parser.add_argument("--port", type=int, default=1883, help="MQTT broker port")
+    parser.add_argument("--broker-process", default="mosquitto",
+                        help="Broker process name to sample (skipped if not found locally)")
+    parser.add_argument("--drift", type=float, default=0.25,
+                        help="First- to last-quarter change flagged as drift")
+    parser.add_argument("--max-growth", type=float, default=1.0, metavar="MB_PER_HOUR",
+                        help="Steady RSS growth above this is flagged")
+    parser.add_argument("--output-dir", default="results/soak", help="Directory for the time series and client logs")
+    parser.add_argument("--output", default="results/soak_results.json", help="Output file for the findings")
+
+    args = parser.parse_args()
+    if args.interval * 8 > args.duration:
+        parser.error("--duration must cover at least 8 intervals to judge drift")
+
+    run_id = uuid.uuid4().hex[:12]
+    out_dir = Path(args.output_dir) / run_id
+    out_dir.mkdir(parents=True, exist_ok=True)
+    series = {role: out_dir / f"{role}.jsonl" for role in ("publisher", "subscriber", "broker")}
+
+    print("=" * 60)
+    print("SOAK TEST")
+    print("=" * 60)
+    print(f"Broker: {args.broker}:{args.port}")
+    print(f"{args.duration:g}s at {args.rate:g} msg/s ({args.encoding}, {args.payload}, QoS {args.qos}), "
+          f"sampled every {args.interval:g}s")
+    print(f"Time series: {out_dir}")
+
+    common = ["--broker", args.broker, "--port", str(args.port), "--encoding", args.encoding,
+              "--topic", args.topic, "--qos", str(args.qos), "--soak-interval", str(args.interval),
+              "--soak-drift", str(args.drift), "--soak-max-growth", str(args.max_growth)]
+    broker_pid = find_broker_pid(args.broker_process)
+    if broker_pid is None:
+        print(f"⚠ No local '{args.broker_process}' process; the broker will not be sampled")
+
+    sub_log = open(out_dir / "subscriber.log", "w")
+    pub_log = open(out_dir / "publisher.log", "w")
+    # The subscriber soaks longer than the publisher and is interrupted once it has drained
+    subscriber = subprocess.Popen(
+        ["python3", "python/src/subscriber.py", "--quiet", "--soak", str(args.duration + 10 * SETTLE + 60),
+         "--soak-output", str(series["subscriber"])] + common,
+        cwd=ROOT, stdout=sub_log, stderr=subprocess.STDOUT)
+    publisher: Optional[subprocess.Popen] = None
+    try:
+        time.sleep(SETTLE)
+        publisher = subprocess.Popen(
+            ["python3", "python/src/publisher.py", "--soak", str(args.duration), "--rate", str(args.rate),
+             "--payload", args.payload, "--soak-output", str(series["publisher"])] + common,
+            cwd=ROOT, stdout=pub_log, stderr=subprocess.STDOUT)
+        if broker_pid is not None:
+            sample_broker(broker_pid, args.duration, args.interval, series["broker"])
+        publisher.wait()
+        time.sleep(SETTLE)
+    except KeyboardInterrupt:
+        print("\n✗ Soak interrupted; analyzing what was sampled")
+        if publisher is not None:
+            publisher.send_signal(signal.SIGINT)
+            publisher.wait()
+    finally:
+        subscriber.send_signal(signal.SIGINT)
+        try:
+            subscriber.wait(timeout=30)
+        except subprocess.TimeoutExpired:
+            subscriber.kill()
+            subscriber.wait()
+        sub_log.close()
+        pub_log.close()
+
+    results: Dict[str, Any] = {
+        "run_id": run_id,
+        "timestamp": datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ"),
+        "duration": args.duration, "rate": args.rate, "interval": args.interval,
+        "encoding": args.encoding, "payload_size": args.payload, "qos": args.qos,
+        "roles": {},
+    }
+    flagged = 0
+    print()
+    for role, path in series.items():
+        if not path.exists():
+            continue
+        samples = load_series(str(path))
+        findings = analyze(samples, args.drift, memory_growth=args.max_growth)
+        flagged += sum(f["flagged"] for f in findings)
+        results["roles"][role] = {"series": str(path), "samples": len(samples), "findings": findings}
+        print_findings(findings, title=role.capitalize())
+    if not results["roles"]:
+        print(f"✗ No time series written; see the logs in {out_dir}")
+    elif flagged:
+        print(f"\n⚠ {flagged} finding(s) flagged")
+    else:
+        print("\n✓ No growth or drift flagged")
+
+    Path(args.output).parent.mkdir(parents=True, exist_ok=True)
+    with open(args.output, "w") as f:
+        json.dump(results, f, indent=2)
+    print(f"✓ Results saved to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,410 @@
+#!/usr/bin/env python3
+"""
+Cold-start benchmark for the MQTT clients of every language.
+
+Measures, from process spawn:
+
+- time to first publish: a publisher started with ``--count 1`` until its
+  message reaches a probe subscriber in this process (one broker hop);
+- time to first message: a subscriber until it prints its first
+  ``[Message N]`` line while a probe publisher sends a message every few
+  milliseconds.
+
+Subscribers run on a pseudo-terminal so every runtime line-buffers stdout
+and the first-message line is seen as soon as it is printed. Startup is
+tracked here rather than in benchmark.py, where it is amortized into
+throughput.
+"""
+
+import argparse
+import json
+import os
+import pty
+import re
+import select
+import signal
+import subprocess
+import sys
+import threading
+import time
+import uuid
+from dataclasses import asdict, dataclass
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import paho.mqtt.client as mqtt
+
+from histogram import LatencyHistogram
+
+ROOT = Path(__file__).resolve().parent.parent
+LANGUAGES = ["python", "rust", "c", "cpp", "julia", "r", "csharp", "java"]
+ROLES = ["publisher", "subscriber"]
+
+# language -> role -> (command, working directory relative to the repo root).
+# Prebuilt binaries are run directly: `cargo run` or a `dotnet` build step
+# would be measured as startup.
+CLIENTS: Dict[str, Dict[str, Tuple[List[str], str]]] = {
+    "python": {"publisher": (["python3", "python/src/publisher.py"], "."),
+               "subscriber": (["python3", "python/src/subscriber.py"], ".")},
+    "rust": {"publisher": (["./target/release/publisher"], "rust"),
+             "subscriber": (["./target/release/subscriber"], "rust")},
+    "c": {"publisher": (["./c/bin/publisher"], "."),
+          "subscriber": (["./c/bin/subscriber"], ".")},
+    "cpp": {"publisher": (["./cpp/bin/publisher"], "."),
+            "subscriber": (["./cpp/bin/subscriber"], ".")},
+    "julia": {"publisher": (["julia", "--project=.", "src/publisher.jl"], "julia"),
+              "subscriber": (["julia", "--project=.", "src/subscriber.jl"], "julia")},
+    "r": {"publisher": (["Rscript", "publisher.R"], "r"),
+          "subscriber": (["Rscript", "subscriber.R"], "r")},
+    "csharp": {"publisher": (["dotnet", "run", "--no-build", "--project", "MQTTComparison.csproj", "--",
+                              "--publisher"], "csharp"),
+               "subscriber": (["dotnet", "run", "--no-build", "--project", "MQTTComparison.csproj", "--",
+                               "--subscriber"], "csharp")},
+    "java": {"publisher": (["java", "-jar", "target/mqtt-java-1.0.0.jar", "publisher"], "java"),
+             "subscriber": (["java", "-jar", "target/mqtt-java-1.0.0.jar", "subscriber"], "java")},
+}
+# Clients without an --encoding option (JSON only)
+JSON_ONLY = {("c", "subscriber")}
+
+# Printed by every subscriber for each received message (R pads it: "[Message 1 ]")
+FIRST_MESSAGE = re.compile(rb"\[Message\s+\d+\s*\]")
+
+
+@dataclass
+class StartupResult:
+    """Startup timings for one (language, role, encoding) cell."""
+    language: str
+    role: str
+    encoding: str
+    qos: int
+    runs: int
+    failures: int
+    time_to_first_publish_ms: Optional[Dict[str, float]] = None
+    time_to_first_message_ms: Optional[Dict[str, float]] = None
+    process_ms: Optional[Dict[str, float]] = None
+    samples_ms: Optional[List[float]] = None
+    scenario: str = "startup"
+    run_id: str = ""
+    timestamp: str = ""
+
+
+def summarize(values: List[float]) -> Optional[Dict[str, float]]:
+    """Histogram summary of a list of milliseconds, or None if empty."""
+    if not values:
+        return None
+    histogram = LatencyHistogram()
+    for value in values:
+        histogram.record(value)
+    return histogram.summary()
+
+
+def probe_payload(encoding: str) -> bytes:
+    """A valid SensorData message in the given encoding, built with the Python publisher."""
+    sys.path.insert(0, str(ROOT / "python" / "src"))
+    from publisher import SensorDataPublisher
+    publisher = SensorDataPublisher(encoding=encoding)
+    return publisher.encode_message(publisher.create_sensor_data("startup_probe"))
+
+
+class Probe:
+    """In-process MQTT client that observes or feeds the client under test."""
+
+    def __init__(self, broker: str, port: int, qos: int):
+        """
+        Connect the probe.
+
+        Args:
+            broker: MQTT broker hostname
+            port: MQTT broker port
+            qos: QoS for the probe's subscription and messages
+        """
+        self.qos = qos
+        self.arrived = threading.Event()
+        self.arrival = 0.0
+        self._subscribed = threading.Event()
+        self.client = mqtt.Client(mqtt.CallbackAPIVersion.VERSION2, client_id=f"startup-probe-{uuid.uuid4().hex[:8]}")
+        self.client.on_message = self._on_message
+        self.client.on_subscribe = lambda *args: self._subscribed.set()
+        self.client.connect(broker, port, 60)
+        self.client.loop_start()
+
+    def _on_message(self, client, userdata, msg):
+        if not self.arrived.is_set():
+            self.arrival = time.perf_counter()
+            self.arrived.set()
+
+    def watch(self, topic: str, timeout: float = 5.0):
+        """Subscribe to topic and wait for the SUBACK."""
+        self.arrived.clear()
+        self._subscribed.clear()
+        self.client.subscribe(topic, qos=self.qos)
+        if not self._subscribed.wait(timeout):
+            raise RuntimeError(f"probe subscription to {topic} not acknowledged")
+
+    def unwatch(self, topic: str):
+        """Drop a subscription made by watch()."""
+        self.client.unsubscribe(topic)
+
+    def close(self):
+        """Disconnect the probe."""
+        self.client.loop_stop()
+        self.client.disconnect()
+
+
+class StartupBenchmark:
+    """Runs startup measurements against a broker."""
+
+    def __init__(self, broker: str = "localhost", port: int = 1883, qos: int = 1, timeout: float = 30.0,
+                 probe_interval: float = 0.005):
+        """
+        Initialize the benchmark.
+
+        Args:
+            broker: MQTT broker hostname
+            port: MQTT broker port
+            qos: QoS level for clients and probe
+            timeout: Seconds to wait for a client's first publish or message
+            probe_interval: Seconds between probe messages in subscriber runs
+        """
+        self.broker = broker
+        self.port = port
+        self.qos = qos
+        self.timeout = timeout
+        self.probe_interval = probe_interval
+        self.probe = Probe(broker, port, qos)
+        self.results: List[StartupResult] = []
+
+    def _command(self, language: str, role: str, encoding: str, topic: str) -> Tuple[List[str], Path]:
+        cmd, cwd = CLIENTS[language][role]
+        cmd = cmd + ["--broker", self.broker, "--port", str(self.port), "--topic", topic, "--qos", str(self.qos)]
+        if (language, role) not in JSON_ONLY:
+            cmd += ["--encoding", encoding]
+        if role == "publisher":
+            cmd += ["--count", "1", "--interval", "0"]
+        return cmd, ROOT / cwd
+
+    def time_publisher(self, language: str, encoding: str) -> Tuple[float, float]:
+        """
+        Start a one-message publisher.
+
+        Returns:
+            (time to first publish, process lifetime) in milliseconds
+
+        Raises:
+            RuntimeError: If no message arrives within the timeout
+        """
+        topic = f"mqtt-comparison/startup/{uuid.uuid4().hex[:12]}"
+        self.probe.watch(topic)
+        cmd, cwd = self._command(language, "publisher", encoding, topic)
+        try:
+            start = time.perf_counter()
+            proc = subprocess.Popen(cmd, cwd=cwd, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True)
+            if not self.probe.arrived.wait(self.timeout):
+                proc.kill()
+                output = proc.communicate()[0]
+                raise RuntimeError(f"no message within {self.timeout:.0f}s: {output.strip()[-200:]}")
+            first = self.probe.arrival - start
+            proc.communicate(timeout=self.timeout)
+            return first * 1000, (time.perf_counter() - start) * 1000
+        finally:
+            self.probe.unwatch(topic)
+
+    def time_subscriber(self, language: str, encoding: str, payload: bytes) -> float:
+        """
+        Start a subscriber and feed it probe messages until it reports one.
+
+        Returns:
+            Time to first message in milliseconds
+
+        Raises:
+            RuntimeError: If the subscriber reports no message within the timeout
+        """
+        topic = f"mqtt-comparison/startup/{uuid.uuid4().hex[:12]}"
+        cmd, cwd = self._command(language, "subscriber", encoding, topic)
+        master, slave = pty.openpty()
+        try:
+            start = time.perf_counter()
+            proc = subprocess.Popen(cmd, cwd=cwd, stdin=subprocess.DEVNULL, stdout=slave, stderr=slave)
+        finally:
+            os.close(slave)
+        seen = b""
+        try:
+            deadline = start + self.timeout
+            while time.perf_counter() < deadline:
+                self.probe.client.publish(topic, payload, qos=self.qos)
+                ready, _, _ = select.select([master], [], [], self.probe_interval)
+                if not ready:
+                    continue
+                try:
+                    chunk = os.read(master, 65536)
+                except OSError:  # EIO: the client exited and closed the terminal
+                    chunk = b""
+                if not chunk:
+                    raise RuntimeError(f"exited with code {proc.wait()}: {seen.decode(errors='replace')[-200:]}")
+                seen = (seen + chunk)[-4096:]
+                if FIRST_MESSAGE.search(seen):
+                    return (time.perf_counter() - start) * 1000
+            raise RuntimeError(f"no message within {self.timeout:.0f}s: {seen.decode(errors='replace')[-200:]}")
+        finally:
+            self._stop(proc, master)
+
+    @staticmethod
+    def _stop(proc: subprocess.Popen, master: int, timeout: float = 5.0):
+        """Interrupt a subscriber, draining its terminal so it cannot block on output while exiting."""
+        if proc.poll() is None:
+            proc.send_signal(signal.SIGINT)
+        deadline = time.perf_counter() + timeout
+        while proc.poll() is None and time.perf_counter() < deadline:
+            if select.select([master], [], [], 0.05)[0]:
+                try:
+                    os.read(master, 65536)
+                except OSError:
+                    break
+        if proc.poll() is None:
+            proc.kill()
+        proc.wait()
+        os.close(master)
+
+    def run(self, language: str, role: str, encoding: str, runs: int, warmup: int = 1) -> Optional[StartupResult]:
+        """
+        Measure one cell.
+
+        Args:
+            language: Client language
+            role: 'publisher' or 'subscriber'
+            encoding: Encoding format
+            runs: Measured process starts
+            warmup: Unmeasured starts first (page cache, JIT caches)
+
+        Returns:
+            StartupResult, or None if the cell was skipped
+        """
+        if (language, role) in JSON_ONLY and encoding != "json":
+            print(f"⚠ {language} {role} supports only json; skipping {encoding}")
+            return None
+        print(f"\nTiming {language} {role} startup ({encoding}, QoS {self.qos})...")
+        payload = probe_payload(encoding) if role == "subscriber" else b""
+        firsts: List[float] = []
+        lifetimes: List[float] = []
+        failures = 0
+        for i in range(warmup + runs):
+            try:
+                if role == "publisher":
+                    first, lifetime = self.time_publisher(language, encoding)
+                    lifetimes.append(lifetime)
+                else:
+                    first = self.time_subscriber(language, encoding, payload)
+            except FileNotFoundError as e:
+                print(f"  ✗ {language} {role} not available ({e.filename}); build it first")
+                return None
+            except (RuntimeError, subprocess.TimeoutExpired) as e:
+                failures += 1
+                print(f"  ✗ Run {i + 1}: {e}")
+                continue
+            if i < warmup:
+                if lifetimes:
+                    lifetimes.pop()
+                continue
+            firsts.append(first)
+            print(f"  Run {i - warmup + 1}: {first:.1f}ms")
+
+        summary = summarize(firsts)
+        result = StartupResult(
+            language=language,
+            role=role,
+            encoding=encoding,
+            qos=self.qos,
+            runs=len(firsts),
+            failures=failures,
+            time_to_first_publish_ms=summary if role == "publisher" else None,
+            time_to_first_message_ms=summary if role == "subscriber" else None,
+            process_ms=summarize(lifetimes),
+            samples_ms=[round(v, 3) for v in firsts],
+            run_id=uuid.uuid4().hex[:12],
+            timestamp=datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
+        )
+        if summary:
+            label = "first publish" if role == "publisher" else "first message"
+            print(f"  ✓ Time to {label}: p50 {summary['p50']:.1f}ms, min {summary['min']:.1f}ms, "
+                  f"max {summary['max']:.1f}ms")
+            if result.process_ms:
+                print(f"  ✓ Process lifetime: p50 {result.process_ms['p50']:.1f}ms")
+        self.results.append(result)
+        return result
+
+    def print_summary(self):
+        """Print a table of median startup times."""
+        if not self.results:
+            print("\nNo startup results to display")
+            return
+        print("\n" + "=" * 60)
+        print("STARTUP SUMMARY (p50 ms from spawn)")
+        print("=" * 60)
+        print(f"{'language':<10} {'role':<11} {'encoding':<9} {'first':>9} {'process':>9} {'runs':>5}")
+        for r in self.results:
+            first = r.time_to_first_publish_ms or r.time_to_first_message_ms
+            first_ms = f"{first['p50']:.1f}" if first else "—"
+            process_ms = f"{r.process_ms['p50']:.1f}" if r.process_ms else "—"
+            print(f"{r.language:<10} {r.role:<11} {r.encoding:<9} {first_ms:>9} {process_ms:>9} {r.runs:>5}")
+
+    def save_results(self, output_file: str):
+        """
+        Save startup results to a JSON file.
+
+        Args:
+            output_file: Output file path
+        """
+        Path(output_file).parent.mkdir(parents=True, exist_ok=True)
+        with open(output_file, "w") as f:
+            json.dump([asdict(r) for r in self.results], f, indent=2)
+        print(f"\n✓ Results saved to {output_file}")
+
+    def close(self):
+        """Disconnect the probe client."""
+        self.probe.close()
+
+
+def main():
+    """Main entry point."""
+    parser = argparse.ArgumentParser(description="MQTT client startup-time benchmark")
+    parser.add_argument("--broker", default="localhost", help="MQTT broker hostname")
+    parser.add_argument("--port", type=int, default=1883, help="MQTT broker port")
+    parser.add_argument("--languages", nargs="+", choices=LANGUAGES, default=["python"],
+                        help="Languages to measure")
+    parser.add_argument("--roles", nargs="+", choices=ROLES, default=ROLES, help="Clients to measure")
+    parser.add_argument("--encodings", nargs="+", default=["json"], help="Encodings to measure")
+    parser.add_argument("--qos", type=int, choices=[0, 1, 2], default=1, help="QoS level")
+    parser.add_argument("--runs", type=int, default=10, help="Measured starts per cell")
+    parser.add_argument("--warmup", type=int, default=1, help="Unmeasured starts per cell")
+    parser.add_argument("--timeout", type=float, default=30.0,
+                        help="Seconds to wait for each first publish or message")
+    parser.add_argument("--output", default="results/startup_results.json", help="Output file for results")
+
+    args = parser.parse_args()
+
+    print("=" * 60)
+    print("MQTT COMPARISON STARTUP BENCHMARK")
+    print("=" * 60)
+    print(f"Broker: {args.broker}:{args.port}")
+    print(f"Languages: {', '.join(args.languages)}")
+    print(f"Roles: {', '.join(args.roles)}")
+    print(f"Encodings: {', '.join(args.encodings)}")
+    print(f"Runs: {args.runs} (+{args.warmup} warmup)")
+
+    benchmark = StartupBenchmark(args.broker, args.port, args.qos, args.timeout)
+    try:
+        for language in args.languages:
+            for role in args.roles:
+                for encoding in args.encodings:
+                    benchmark.run(language, role, encoding, args.runs, args.warmup)
+        benchmark.print_summary()
+        benchmark.save_results(args.output)
+    except KeyboardInterrupt:
+        print("\n\n✗ Benchmark interrupted")
+    finally:
+        benchmark.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+"""
+Stage-level latency report from publisher/subscriber trace files.
+
+Joins records written by `publisher.py --trace` and `subscriber.py --trace`
+by (run, seq) and breaks each message's latency down per stage per codec.
+"""
+
+import argparse
+import json
+from collections import defaultdict
+from typing import Dict, List, Tuple
+
+from histogram import LatencyHistogram
+
+# (stage name, start stamp, end stamp)
+STAGES = [
+    ("generate+encode", "t_create", "t_encoded"),
+    ("client handoff", "t_encoded", "t_enqueued"),
+    ("client queue", "t_enqueued", "t_written"),
+    ("broker delivery", "t_written", "t_received"),
+    ("decode", "t_received", "t_decoded"),
+    ("ack (PUBACK/PUBCOMP)", "t_written", "t_acked"),
+    ("end-to-end", "t_create", "t_decoded"),
+]
+
+
+def load_traces(paths: List[str]) -> Dict[Tuple[str, int], Dict]:
+    """
+    Load and merge trace records from publisher and subscriber files.
+
+    Args:
+        paths: Trace JSONL files (any mix of roles)
+
+    Returns:
+        Mapping of (run, seq) to the merged record
+    """
+    merged: Dict[Tuple[str, int], Dict] = {}
+    for path in paths:
+        with open(path) as f:
+            for line_number, line in enumerate(f, 1):
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    record = json.loads(line)
+                    key = (record["run"], int(record["seq"]))
+                except (ValueError, KeyError) as e:
+                    print(f"⚠ {path}:{line_number}: skipping bad trace record ({e})")
+                    continue
+                role = record.pop("role", None)
+                entry = merged.setdefault(key, {})
+                # Publisher records are authoritative for enc/qos
+                if role == "sub":
+                    for field in ("enc", "qos"):
+                        if field in entry:
+                            record.pop(field, None)
+                entry.update(record)
+    return merged
+
+
+def stage_histograms(records: Dict[Tuple[str, int], Dict]) -> Dict[Tuple[str, int], Dict[str, LatencyHistogram]]:
+    """Fold stage durations (ms) into histograms grouped by (enc, qos)."""
+    groups: Dict[Tuple[str, int], Dict[str, LatencyHistogram]] = defaultdict(
+        lambda: {name: LatencyHistogram() for name, _, _ in STAGES})
+    for record in records.values():
+        stages = groups[(record.get("enc", "unknown"), int(record.get("qos", 0)))]
+        for name, start, end in STAGES:
+            if start in record and end in record:
+                stages[name].record(max(0, record[end] - record[start]) / 1e6)
+    return groups
+
+
+def render(groups: Dict[Tuple[str, int], Dict[str, LatencyHistogram]]) -> str:
+    """Render per-codec stage tables as Markdown."""
+    lines = ["# Stage Latency Breakdown", ""]
+    for (enc, qos), stages in sorted(groups.items()):
+        lines += [f"## {enc} (QoS {qos})", "",
+                  "| Stage | n | mean ms | p50 ms | p90 ms | p99 ms | max ms |",
+                  "|---|---:|---:|---:|---:|---:|---:|"]
+        for name, _, _ in STAGES:
+            hist = stages[name]
+            if not hist.count:
+                continue
+            p = hist.percentiles([50, 90, 99])
+            lines.append(f"| {name} | {hist.count} | {hist.mean:.3f} | {p[50]:.3f} | {p[90]:.3f} | "
+                         f"{p[99]:.3f} | {hist.max:.3f} |")
+        lines.append("")
+    return "\n".join(lines)
+
+
+def main():
+    """Main entry point."""
+    parser = argparse.ArgumentParser(description="Break down traced MQTT message latency per stage")
+    parser.add_argument("traces", nargs="+", help="Trace files from publisher.py/subscriber.py --trace")
+    parser.add_argument("--output", default=None, help="Write Markdown report here instead of stdout")
+
+    args = parser.parse_args()
+
+    records = load_traces(args.traces)
+    if not records:
+        print("No trace records found.")
+        return
+
+    report = render(stage_histograms(records))
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(report)
+        print(f"Stage report generated: {args.output}")
+    else:
+        print(report)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+"""
+Schema-validation overhead per codec for the Python subscriber.
+
+Times decode alone and decode plus the compiled SensorData validator at
+several sampling rates, in-process and without a broker, so the numbers
+isolate the cost added by `subscriber.py --validate`. When the `jsonschema`
+package is installed, an interpreted validator is timed for comparison.
+"""
+
+import argparse
+import json
+import sys
+import time
+from pathlib import Path
+from typing import Callable, Dict, List
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT / "python" / "src"))
+
+from publisher import SensorDataPublisher, parse_payload_size  # noqa: E402
+from schema_validator import SampledValidator, default_schema_path, load_validator  # noqa: E402
+from subscriber import SensorDataSubscriber  # noqa: E402
+
+ENCODINGS = ["json", "msgpack", "cbor", "protobuf", "struct"]
+
+
+def time_per_call(fns: Dict[str, Callable[[], object]], number: int, repeat: int) -> Dict[str, float]:
+    """
+    Best-of-repeat mean time per call in microseconds for each function.
+
+    The functions are timed in turn within every repeat, so drift in machine
+    load affects all of them alike.
+    """
+    best = {name: float("inf") for name in fns}
+    for _ in range(repeat):
+        for name, fn in fns.items():
+            start = time.perf_counter()
+            for _ in range(number):
+                fn()
+            best[name] = min(best[name], time.perf_counter() - start)
+    return {name: elapsed / number * 1e6 for name, elapsed in best.items()}
+
+
+def interpreted_validator():
+    """jsonschema's validator for the same schema, or None if jsonschema is not installed."""
+    try:
+        import jsonschema
+    except ImportError:
+        return None
+    with open(default_schema_path()) as f:
+        schema = json.load(f)
+    return jsonschema.validators.validator_for(schema)(schema)
+
+
+def measure(encoding: str, payload: str, rates: List[float], number: int, repeat: int) -> Dict[str, float]:
+    """
+    Time decode with and without validation for one codec.
+
+    Args:
+        encoding: Encoding format
+        payload: Payload size variant or target size (see publisher.parse_payload_size)
+        rates: Validation sampling rates
+        number: Calls per timing
+        repeat: Timings per measurement (best is kept)
+
+    Returns:
+        Per-message microseconds: 'decode', 'validate_<rate>' and optionally 'jsonschema'
+    """
+    publisher = SensorDataPublisher(encoding=encoding)
+    message = publisher.encode_message(publisher.create_sensor_data("sensor_001", payload))
+    decode = SensorDataSubscriber(encoding=encoding).decode_message
+    validate = load_validator()
+    if validate(decode(message)) is not None:
+        raise ValueError(f"{encoding}: sample message fails validation: {validate(decode(message))}")
+
+    fns = {"decode": lambda: decode(message)}
+    for rate in rates:
+        fns[f"validate_{rate:g}"] = (lambda sampler: lambda: sampler.check(decode(message)))(
+            SampledValidator(validate, rate))
+    row = {"bytes": len(message), **time_per_call(fns, number, repeat)}
+    interpreted = interpreted_validator()
+    if interpreted is not None:
+        # jsonschema walks the schema per call and needs a real dict
+        row.update(time_per_call({"jsonschema": lambda: interpreted.is_valid(dict(decode(message)))},
+                                 max(1, number // 10), repeat))
+    return row
+
+
+def main():
+    """Main entry point."""
+    parser = argparse.ArgumentParser(description="Measure schema-validation overhead per codec")
+    parser.add_argument("--encodings", nargs="+", choices=ENCODINGS, default=ENCODINGS, help="Codecs to measure")
+    parser.add_argument("--payload", type=parse_payload_size, default="small",
+                        help="Payload size variant or target encoded size (e.g. 4KB)")
+    parser.add_argument("--rates", nargs="+", type=float, default=[1.0, 0.1, 0.01],
+                        help="Validation sampling rates")
+    parser.add_argument("--number", type=int, default=20000, help="Calls per timing")
+    parser.add_argument("--repeat", type=int, default=5, help="Timings per measurement (best is kept)")
+    parser.add_argument("--output", default=None, help="Write results as JSON to this file")
+
+    args = parser.parse_args()
+
+    results = []
+    for encoding in args.encodings:
+        try:
+            row = measure(encoding, args.payload, args.rates, args.number, args.repeat)
+        except ImportError as e:
+            print(f"⚠ Skipping {encoding}: {e}")
+            continue
+        results.append({"encoding": encoding, "payload_size": args.payload, **row})
+
+    columns = [f"validate_{rate:g}" for rate in args.rates]
+    print(f"Per-message time in µs ({args.payload} payload; overhead vs decode alone in parentheses)\n")
+    header = f"{'encoding':<10} {'bytes':>6} {'decode':>8}" + "".join(f" {'rate ' + c[9:]:>18}" for c in columns)
+    if any("jsonschema" in r for r in results):
+        header += f" {'jsonschema':>18}"
+    print(header)
+    for r in results:
+        line = f"{r['encoding']:<10} {r['bytes']:>6} {r['decode']:>8.2f}"
+        for c in columns + (["jsonschema"] if "jsonschema" in r else []):
+            overhead = r[c] - r["decode"]
+            line += f" {r[c]:>8.2f} ({overhead:+6.2f})"
+        print(line)
+
+    if args.output:
+        Path(args.output).parent.mkdir(parents=True, exist_ok=True)
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"\n✓ Results saved to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,3 +1,4 @@
+#define _DEFAULT_SOURCE  /* usleep, clock_gettime under -std=c99 */
 #include <stdio.h>
 #include <stdlib.h>
 #include <string.h>
@@ -21,6 +22,7 @@ typedef struct {
     char payload_size[32];
     int qos;
     char encoding[32];
+    char records[512];
 } publisher_args_t;
 
 void parse_args(int argc, char *argv[], publisher_args_t *args) {
@@ -37,6 +39,7 @@ void parse_args(int argc, char *argv[], publisher_args_t *args) {
     strcpy(args->payload_size, "small");
     args->qos = 1;
     strcpy(args->encoding, "json");
+    args->records[0] = '\0';
     
     // Parse command line arguments
     for (int i = 1; i < argc; i++) {
@@ -58,6 +61,8 @@ void parse_args(int argc, char *argv[], publisher_args_t *args) {
             args->qos = atoi(argv[++i]);
         } else if (strcmp(argv[i], "--encoding") == 0 && i + 1 < argc) {
             strncpy(args->encoding, argv[++i], sizeof(args->encoding) - 1);
+        } else if (strcmp(argv[i], "--records") == 0 && i + 1 < argc) {
+            strncpy(args->records, argv[++i], sizeof(args->records) - 1);
         }
     }
 }
@@ -109,6 +114,17 @@ int main(int argc, char *argv[]) {
     
     printf("✓ Connected to %s:%d\n", args.broker, args.port);
     
+    // Optional per-message record stream (one JSON object per line)
+    FILE *records = NULL;
+    if (args.records[0] != '\0') {
+        records = fopen(args.records, "w");
+        if (!records) {
+            printf("Failed to open records file %s\n", args.records);
+        } else {
+            setvbuf(records, NULL, _IOLBF, 0);
+        }
+    }
+    
     // Publish messages
     double *publish_times = malloc(args.count * sizeof(double));
     if (!publish_times) {
@@ -156,8 +172,9 @@ int main(int argc, char *argv[]) {
             continue;
         }
         
-        // Measure publish time
-        clock_t start = clock();
+        // Measure publish time (wall clock; clock() would only count CPU time)
+        struct timespec start, end;
+        clock_gettime(CLOCK_MONOTONIC, &start);
         
         // Publish message
         pubmsg.payload = payload;
@@ -175,10 +192,14 @@ int main(int argc, char *argv[]) {
             }
         }
         
-        clock_t end = clock();
-        double publish_time = ((double)(end - start)) / CLOCKS_PER_SEC;
+        clock_gettime(CLOCK_MONOTONIC, &end);
+        double publish_time = (end.tv_sec - start.tv_sec) + (end.tv_nsec - start.tv_nsec) / 1e9;
         publish_times[i] = publish_time;
         printf("  Publish time: %.2fms\n", publish_time * 1000.0);
+        if (records) {
+            fprintf(records, "{\"seq\": %d, \"pub_ms\": %.4f, \"bytes\": %d}\n",
+                    i + 1, publish_time * 1000.0, payload_len);
+        }
         
         // Cleanup
         free(payload);
@@ -200,6 +221,7 @@ int main(int argc, char *argv[]) {
     printf("✓ Average publish time: %.2fms\n", avg_time * 1000.0);
     
     // Cleanup
+    if (records) fclose(records);
     free(publish_times);
     MQTTClient_disconnect(client, 10000);
     MQTTClient_destroy(&client);
@@ -4,6 +4,7 @@
 #include <chrono>
 #include <thread>
 #include <iomanip>
+#include <fstream>
 #include <mqtt/async_client.h>
 #include "sensor_data.h"
 
@@ -18,6 +19,7 @@ public:
     std::string payload_size = "small";
     int qos = 1;
     std::string encoding = "json";
+    std::string records;
     
     void parse_args(int argc, char* argv[]) {
         for (int i = 1; i < argc; i++) {
@@ -40,6 +42,8 @@ public:
                 qos = std::stoi(argv[++i]);
             } else if (arg == "--encoding" && i + 1 < argc) {
                 encoding = argv[++i];
+            } else if (arg == "--records" && i + 1 < argc) {
+                records = argv[++i];
             }
         }
     }
@@ -52,6 +56,8 @@ private:
     int qos;
     
 public:
+    size_t last_payload_size = 0;
+    
     SensorDataPublisher(const std::string& broker, int port, const std::string& topic, int qos)
         : client(broker + ":" + std::to_string(port), "cpp_publisher"), topic(topic), qos(qos) {
     }
@@ -99,6 +105,7 @@ public:
             return -1.0;
         }
         
+        last_payload_size = payload.size();
         mqtt::message_ptr msg = mqtt::make_message(topic, payload);
         msg->set_qos(qos);
         
@@ -133,6 +140,12 @@ int main(int argc, char* argv[]) {
         std::vector<double> publish_times;
         publish_times.reserve(args.count);
         
+        // Optional per-message record stream (one JSON object per line)
+        std::ofstream records;
+        if (!args.records.empty()) {
+            records.open(args.records);
+        }
+        
         for (int i = 0; i < args.count; i++) {
             std::cout << "Publishing message " << (i + 1) << "/" << args.count << "..." << std::endl;
             
@@ -143,6 +156,11 @@ int main(int argc, char* argv[]) {
                 publish_times.push_back(publish_time);
                 std::cout << "  Publish time: " << std::fixed << std::setprecision(2) 
                          << (publish_time * 1000.0) << "ms" << std::endl;
+                if (records.is_open()) {
+                    records << "{\"seq\": " << (i + 1) << ", \"pub_ms\": " << std::fixed << std::setprecision(4)
+                            << (publish_time * 1000.0) << ", \"bytes\": " << publisher.last_payload_size << "}"
+                            << std::endl;
+                }
             }
             
             if (i < args.count - 1) {
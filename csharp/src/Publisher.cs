@@ -16,6 +16,8 @@ namespace MQTTComparison
         private readonly int _qos;
         private readonly string _encoding;
 
+        public int LastPayloadSize { get; private set; }
+
         public Publisher(string broker, int port, string topic, int qos, string encoding = "json")
         {
             _broker = broker;
@@ -64,6 +66,7 @@ namespace MQTTComparison
             var stopwatch = Stopwatch.StartNew();
             
             var payload = EncodeMessage(data);
+            LastPayloadSize = payload.Length;
             var message = new MqttApplicationMessageBuilder()
                 .WithTopic(_topic)
                 .WithPayload(payload)
@@ -99,6 +102,11 @@ namespace MQTTComparison
 
                 var publishTimes = new List<double>();
 
+                // Optional per-message record stream (one JSON object per line)
+                using var records = string.IsNullOrEmpty(options.Records)
+                    ? null
+                    : new StreamWriter(options.Records) { AutoFlush = true };
+
                 for (int i = 0; i < options.Count; i++)
                 {
                     Console.WriteLine($"Publishing message {i + 1}/{options.Count}...");
@@ -108,6 +116,8 @@ namespace MQTTComparison
                     
                     publishTimes.Add(publishTime);
                     Console.WriteLine($"  Publish time: {publishTime * 1000:F2}ms");
+                    records?.WriteLine(FormattableString.Invariant(
+                        $"{{\"seq\": {i + 1}, \"pub_ms\": {publishTime * 1000:F4}, \"bytes\": {publisher.LastPayloadSize}}}"));
                     
                     if (i < options.Count - 1)
                     {
@@ -168,6 +178,9 @@ namespace MQTTComparison
                     case "--encoding" when i + 1 < args.Length:
                         options.Encoding = args[++i];
                         break;
+                    case "--records" when i + 1 < args.Length:
+                        options.Records = args[++i];
+                        break;
                 }
             }
             
@@ -186,5 +199,6 @@ namespace MQTTComparison
         public string PayloadSize { get; set; } = "small";
         public int Qos { get; set; } = 1;
         public string Encoding { get; set; } = "json";
+        public string? Records { get; set; }
     }
 }
@@ -10,6 +10,9 @@ import picocli.CommandLine;
 import picocli.CommandLine.Command;
 import picocli.CommandLine.Option;
 
+import java.io.FileWriter;
+import java.io.PrintWriter;
+import java.util.Locale;
 import java.util.concurrent.TimeUnit;
 
 /**
@@ -45,6 +48,9 @@ public class Publisher implements MqttCallback {
     @Option(names = "--encoding", description = "Encoding format", defaultValue = "json")
     private String encoding;
     
+    @Option(names = "--records", description = "Write one JSON record per message to this path (file or FIFO)")
+    private String records;
+    
     private MqttClient client;
     private ObjectMapper objectMapper;
     private long[] publishTimes;
@@ -83,6 +89,9 @@ public class Publisher implements MqttCallback {
             client.connect(connOpts);
             System.out.println("✓ Connected to " + broker + ":" + port);
             
+            // Optional per-message record stream (one JSON object per line)
+            PrintWriter recordWriter = records != null ? new PrintWriter(new FileWriter(records), true) : null;
+            
             // Publish messages
             publishTimes = new long[count];
             
@@ -108,6 +117,10 @@ public class Publisher implements MqttCallback {
                 publishTimes[i] = publishTime;
                 
                 System.out.println("  Publish time: " + (publishTime / 1_000_000.0) + "ms");
+                if (recordWriter != null) {
+                    recordWriter.println(String.format(Locale.ROOT, "{\"seq\": %d, \"pub_ms\": %.4f, \"bytes\": %d}",
+                            i + 1, publishTime / 1_000_000.0, payload.length));
+                }
                 
                 if (i < count - 1) {
                     Thread.sleep((long) (interval * 1000));
@@ -125,6 +138,10 @@ public class Publisher implements MqttCallback {
             double avgTime = totalTime / (double) count / 1_000_000.0;
             System.out.println("✓ Average publish time: " + String.format("%.2f", avgTime) + "ms");
             
+            if (recordWriter != null) {
+                recordWriter.close();
+            }
+            
             // Disconnect
             client.disconnect();
             System.out.println("✓ Disconnected");
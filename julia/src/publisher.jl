@@ -46,6 +46,10 @@ function parse_args()
             help = "Encoding format"
             arg_type = String
             default = "json"
+        "--records"
+            help = "Write one JSON record per message to this path (file or FIFO)"
+            arg_type = String
+            default = ""
     end
     
     return parse_args(s)
@@ -70,6 +74,9 @@ function main()
         connect(client)
         println("✓ Connected to $(args["broker"]):$(args["port"])")
         
+        # Optional per-message record stream (one JSON object per line)
+        records = isempty(args["records"]) ? nothing : open(args["records"], "w")
+        
         # Publish messages
         publish_times = Float64[]
         
@@ -93,6 +100,10 @@ function main()
             push!(publish_times, publish_time)
             
             println("  Publish time: $(round(publish_time * 1000, digits=2))ms")
+            if records !== nothing
+                println(records, "{\"seq\": $i, \"pub_ms\": $(round(publish_time * 1000, digits=4)), \"bytes\": $(sizeof(payload))}")
+                flush(records)
+            end
             
             if i < args["count"]
                 sleep(args["interval"])
@@ -107,6 +118,8 @@ function main()
             println("✓ Average publish time: $(round(avg_time * 1000, digits=2))ms")
         end
         
+        records !== nothing && close(records)
+        
         # Disconnect
         disconnect(client)
         println("✓ Disconnected")
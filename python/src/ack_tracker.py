@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+"""
+Publish/acknowledgement matching by paho message id.
+
+paho reports an acknowledgement (PUBACK/PUBCOMP, or the socket write for
+QoS 0) with the message id only, so a pipelined publisher keeps the send
+time of every id until its ack arrives. Under QoS 0 the ack can fire inside
+publish(), before the caller has the id to record, so an ack for an unknown
+id is held until the matching send shows up.
+
+An id that is never acknowledged (e.g. a QoS 0 publish dropped across a
+reconnect) would stay in flight forever; expire() forgets entries older
+than a cutoff and counts the publishes among them as expired.
+"""
+
+import threading
+from typing import Dict, Optional
+
+
+class AckTracker:
+    """Send times of unacknowledged publishes, for ack latency and in-flight counts (thread-safe)."""
+
+    def __init__(self):
+        """Initialize an empty tracker."""
+        self.expired = 0
+        self._pending: Dict[int, float] = {}
+        self._early: Dict[int, float] = {}
+        self._lock = threading.Lock()
+
+    @property
+    def inflight(self) -> int:
+        """Publishes sent and not yet acknowledged."""
+        return len(self._pending)
+
+    def sent(self, mid: int, now: float) -> Optional[float]:
+        """
+        Record a publish.
+
+        Args:
+            mid: Message id returned by publish()
+            now: perf_counter() taken before publish()
+
+        Returns:
+            Ack latency in seconds if the ack already arrived, else None
+        """
+        with self._lock:
+            acked_at = self._early.pop(mid, None)
+            if acked_at is None:
+                self._pending[mid] = now
+                return None
+        return acked_at - now
+
+    def acked(self, mid: int, now: float) -> Optional[float]:
+        """
+        Record an acknowledgement.
+
+        Args:
+            mid: Message id
+            now: perf_counter() at the ack
+
+        Returns:
+            Ack latency in seconds, or None if the send has not been recorded yet
+        """
+        with self._lock:
+            sent_at = self._pending.pop(mid, None)
+            if sent_at is None:
+                # QoS 0 can complete inside publish(), before sent() runs
+                self._early[mid] = now
+                return None
+        return now - sent_at
+
+    def expire(self, cutoff: float) -> int:
+        """
+        Forget publishes sent, and acks held, before a cutoff.
+
+        Args:
+            cutoff: perf_counter() value; older entries are dropped
+
+        Returns:
+            Publishes expired by this call (also added to `expired`)
+        """
+        expired = 0
+        with self._lock:
+            for entries in (self._pending, self._early):
+                for mid in [mid for mid, at in entries.items() if at < cutoff]:
+                    del entries[mid]
+                    expired += entries is self._pending
+            self.expired += expired
+        return expired
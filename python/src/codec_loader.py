@@ -0,0 +1,43 @@
+#!/usr/bin/env python3
+"""
+On-demand loading of codec modules for the Python clients.
+
+Only the module behind the selected encoding is imported, so a JSON run
+never pays the startup cost of msgpack, cbor2 or the protobuf runtime.
+"""
+
+import importlib
+from types import ModuleType
+from typing import Optional
+
+# encoding -> (module to import, package to install when it is missing)
+CODEC_MODULES = {
+    "msgpack": ("msgpack", "msgpack"),
+    "cbor": ("cbor2", "cbor2"),
+    "protobuf": ("protobuf_codec", "protobuf"),
+    "struct": ("struct_codec", None),
+}
+
+
+def load_codec(encoding: str) -> Optional[ModuleType]:
+    """
+    Import the module backing an encoding.
+
+    Args:
+        encoding: Encoding format ('json', 'msgpack', 'cbor', 'protobuf', 'struct')
+
+    Returns:
+        The codec module, or None for json and unknown encodings
+
+    Raises:
+        ImportError: If the encoding's library is not installed
+    """
+    if encoding not in CODEC_MODULES:
+        return None
+    module, package = CODEC_MODULES[encoding]
+    try:
+        return importlib.import_module(module)
+    except ImportError as e:
+        if package is None:
+            raise
+        raise ImportError(f"{package} is not installed") from e
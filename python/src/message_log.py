@@ -0,0 +1,292 @@
+#!/usr/bin/env python3
+"""
+Segmented append-only log of raw received MQTT payloads.
+
+Layout of a log directory:
+
+    segment-000001.log   records, appended in receive order
+    segment-000001.idx   memory-mapped sparse index for that segment
+
+A record is a fixed header followed by the sensor id, topic and raw payload:
+
+    <d  received_at (Unix seconds)
+    B   codec id (index into CODECS)
+    B   sensor_id length
+    H   topic length
+    I   payload length
+
+Segments rotate once they exceed the configured size. The index file is
+preallocated and memory-mapped: an 8-byte entry count, then one entry per
+block of about INDEX_INTERVAL bytes of log:
+
+    <d  received_at of the block's first record
+    Q   file offset of the block's first record
+    Q   64-bit Bloom mask of the sensor ids in the block
+
+Time-range reads binary-search the index and scan forward. Sensor reads skip
+blocks whose mask cannot contain the sensor. Readers mmap segments and yield
+payloads as memoryview slices, so nothing is copied until the caller does so.
+"""
+
+import mmap
+import os
+import struct
+import zlib
+from pathlib import Path
+from typing import Iterator, List, NamedTuple, Optional, Tuple
+
+CODECS = ["json", "msgpack", "cbor", "protobuf", "struct"]
+RECORD = struct.Struct("<dBBHI")
+COUNT = struct.Struct("<Q")
+ENTRY = struct.Struct("<dQQ")
+INDEX_INTERVAL = 4096
+DEFAULT_SEGMENT_BYTES = 64 * 1024 * 1024
+
+
+def sensor_mask(sensor_id: bytes) -> int:
+    """Two-bit Bloom mask for a sensor id (bits taken from its CRC32)."""
+    h = zlib.crc32(sensor_id)
+    return (1 << (h & 63)) | (1 << ((h >> 6) & 63))
+
+
+def segment_paths(directory: Path) -> List[Tuple[Path, Path]]:
+    """(log, index) paths of every segment, oldest first."""
+    return [(log, log.with_suffix(".idx")) for log in sorted(directory.glob("segment-*.log"))]
+
+
+class LogRecord(NamedTuple):
+    """One logged message; payload is a zero-copy view into the segment."""
+    received_at: float
+    codec: str
+    sensor_id: str
+    topic: str
+    payload: memoryview
+
+
+class MessageLogWriter:
+    """Appends records to size-rotated segments and maintains their indexes."""
+
+    def __init__(self, directory: str, segment_bytes: int = DEFAULT_SEGMENT_BYTES,
+                 index_interval: int = INDEX_INTERVAL):
+        """
+        Open a log directory for appending; a new segment is started.
+
+        Args:
+            directory: Log directory (created if missing)
+            segment_bytes: Rotate to a new segment once a segment reaches this size
+            index_interval: Log bytes per sparse index entry
+        """
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.segment_bytes = segment_bytes
+        self.index_interval = index_interval
+        self.records = 0
+        self.bytes = 0
+        existing = segment_paths(self.directory)
+        self._sequence = int(existing[-1][0].stem.split("-")[1]) if existing else 0
+        self._log = None
+        self._index: Optional[mmap.mmap] = None
+        self._open_segment()
+
+    def _open_segment(self):
+        """Close the current segment (if any) and start the next one."""
+        self._close_segment()
+        self._sequence += 1
+        base = self.directory / f"segment-{self._sequence:06d}"
+        self._log = open(base.with_suffix(".log"), "wb")
+        self._position = 0
+        # Blocks start at least index_interval bytes apart
+        capacity = self.segment_bytes // self.index_interval + 2
+        with open(base.with_suffix(".idx"), "wb") as f:
+            f.truncate(COUNT.size + capacity * ENTRY.size)
+        with open(base.with_suffix(".idx"), "r+b") as f:
+            self._index = mmap.mmap(f.fileno(), 0)
+        self._entries = 0
+        self._capacity = capacity
+        self._offset = COUNT.size
+        self._block_end = 0
+        self._mask = 0
+
+    def _close_segment(self):
+        if self._log is not None:
+            self._log.close()
+            self._log = None
+        if self._index is not None:
+            self._index.flush()
+            self._index.close()
+            self._index = None
+
+    def append(self, topic: str, payload: bytes, received_at: float, codec: str = "json",
+               sensor_id: Optional[str] = None):
+        """
+        Append one raw message.
+
+        Args:
+            topic: Topic it arrived on
+            payload: Raw payload bytes
+            received_at: Receive time (Unix seconds)
+            codec: Encoding of the payload (one of CODECS)
+            sensor_id: Sensor id if the payload was decoded, else None
+        """
+        sensor = (sensor_id or "").encode("utf-8")[:255]
+        topic_bytes = topic.encode("utf-8")
+        size = RECORD.size + len(sensor) + len(topic_bytes) + len(payload)
+        if self._position and self._position + size > self.segment_bytes:
+            self._open_segment()
+        if self._position >= self._block_end and self._entries < self._capacity:
+            # Start a new sparse block at this record
+            self._entries += 1
+            self._mask = 0
+            self._block_end = self._position + self.index_interval
+            self._offset = COUNT.size + (self._entries - 1) * ENTRY.size
+            ENTRY.pack_into(self._index, self._offset, received_at, self._position, 0)
+            COUNT.pack_into(self._index, 0, self._entries)
+        if sensor:
+            self._mask |= sensor_mask(sensor)
+            # Only the mask field of the current entry changes
+            struct.pack_into("<Q", self._index, self._offset + 16, self._mask)
+        self._log.write(RECORD.pack(received_at, CODECS.index(codec), len(sensor), len(topic_bytes), len(payload)))
+        self._log.write(sensor)
+        self._log.write(topic_bytes)
+        self._log.write(payload)
+        self._position += size
+        self.records += 1
+        self.bytes += size
+
+    def flush(self):
+        """Make appended records visible to readers."""
+        self._log.flush()
+
+    def close(self):
+        """Flush and close the current segment."""
+        self._close_segment()
+
+
+class Segment:
+    """Read-only view of one segment; the index stays memory-mapped and is searched in place."""
+
+    def __init__(self, log_path: Path, index_path: Path):
+        self.log_path = log_path
+        with open(index_path, "rb") as f:
+            self.index = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+    def __len__(self) -> int:
+        """Index entries written so far (grows while the segment is being appended to)."""
+        return COUNT.unpack_from(self.index, 0)[0]
+
+    def entry(self, i: int) -> Tuple[float, int, int]:
+        """(received_at, offset, sensor mask) of index entry i."""
+        return ENTRY.unpack_from(self.index, COUNT.size + i * ENTRY.size)
+
+    @property
+    def first_time(self) -> Optional[float]:
+        return self.entry(0)[0] if len(self) else None
+
+    def find(self, start: float) -> int:
+        """Last index entry whose block starts at or before `start` (binary search over the map)."""
+        low, high = 0, len(self)
+        while low < high:
+            middle = (low + high) // 2
+            if ENTRY.unpack_from(self.index, COUNT.size + middle * ENTRY.size)[0] <= start:
+                low = middle + 1
+            else:
+                high = middle
+        return max(0, low - 1)
+
+    def close(self):
+        self.index.close()
+
+    def scan(self, start: Optional[float] = None, end: Optional[float] = None,
+             sensor_id: Optional[str] = None) -> Iterator[LogRecord]:
+        """
+        Yield records of this segment in the time range (inclusive), optionally for one sensor.
+
+        Args:
+            start: Earliest receive time
+            end: Latest receive time
+            sensor_id: Only records from this sensor
+        """
+        count = len(self)
+        if not count or os.path.getsize(self.log_path) == 0:
+            return
+        with open(self.log_path, "rb") as f:
+            data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        view = memoryview(data)
+        sensor = sensor_id.encode("utf-8") if sensor_id is not None else None
+        mask = sensor_mask(sensor) if sensor else 0
+        first = self.find(start) if start is not None else 0
+        try:
+            for block in range(first, count):
+                block_time, position, block_mask = self.entry(block)
+                if end is not None and block_time > end:
+                    return
+                if mask and (block_mask & mask) != mask:
+                    continue
+                # The index of a segment being written can run ahead of the flushed log
+                limit = min(self.entry(block + 1)[1], len(data)) if block + 1 < count else len(data)
+                while position + RECORD.size <= limit:
+                    received_at, codec, sensor_len, topic_len, payload_len = RECORD.unpack_from(data, position)
+                    body = position + RECORD.size
+                    next_position = body + sensor_len + topic_len + payload_len
+                    if next_position > len(data):
+                        return  # partially written tail
+                    position = next_position
+                    if start is not None and received_at < start:
+                        continue
+                    if end is not None and received_at > end:
+                        return
+                    if sensor is not None and data[body:body + sensor_len] != sensor:
+                        continue
+                    topic_start = body + sensor_len
+                    yield LogRecord(received_at, CODECS[codec], data[body:topic_start].decode("utf-8"),
+                                    data[topic_start:topic_start + topic_len].decode("utf-8"),
+                                    view[topic_start + topic_len:next_position])
+        finally:
+            view.release()
+            try:
+                data.close()
+            except BufferError:
+                pass  # caller still holds payload views; the map is released with them
+
+
+class MessageLogReader:
+    """Range reads across all segments of a log directory."""
+
+    def __init__(self, directory: str):
+        """
+        Open a log directory for reading.
+
+        Args:
+            directory: Log directory written by MessageLogWriter
+        """
+        self.directory = Path(directory)
+        self.segments = [Segment(log, index) for log, index in segment_paths(self.directory) if index.exists()]
+
+    def scan(self, start: Optional[float] = None, end: Optional[float] = None,
+             sensor_id: Optional[str] = None) -> Iterator[LogRecord]:
+        """
+        Yield matching records in receive order.
+
+        Segments that start after `end`, or whose successor starts at or
+        before `start`, are skipped without touching their log files.
+
+        Args:
+            start: Earliest receive time (Unix seconds)
+            end: Latest receive time (Unix seconds)
+            sensor_id: Only records from this sensor
+
+        Returns:
+            Iterator of LogRecord; payload views stay valid while referenced
+        """
+        segments = [s for s in self.segments if s.first_time is not None]
+        for i, segment in enumerate(segments):
+            if end is not None and segment.first_time > end:
+                return
+            if start is not None and i + 1 < len(segments) and segments[i + 1].first_time <= start:
+                continue
+            yield from segment.scan(start, end, sensor_id)
+
+    def close(self):
+        """Unmap the segment indexes."""
+        for segment in self.segments:
+            segment.close()
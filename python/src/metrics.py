@@ -0,0 +1,229 @@
+#!/usr/bin/env python3
+"""
+Live client metrics in the OpenMetrics text format.
+
+Counters and histograms are sharded per thread: each thread that records
+gets its own cell on first use and then updates it without a lock (only the
+owning thread ever writes a cell, and the GIL makes each update atomic with
+respect to readers). A scrape sums the cells, so it may miss updates that
+are in progress, but never blocks the MQTT network thread. Gauges are
+callbacks evaluated at scrape time.
+
+MetricsServer serves the registry at /metrics over HTTP from a daemon thread,
+for Prometheus or any OpenMetrics scraper:
+
+    registry = MetricsRegistry(role="publisher", encoding="json")
+    sent = registry.counter("mqtt_publisher_messages", "PUBLISH packets queued")
+    MetricsServer(registry, port=9101).start()
+    sent.inc()
+"""
+
+import bisect
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+CONTENT_TYPE = "application/openmetrics-text; version=1.0.0; charset=utf-8"
+
+# Seconds, from 10µs (decode, encode) to 10s (end-to-end latency under load)
+DEFAULT_BUCKETS = (1e-5, 2.5e-5, 5e-5, 1e-4, 2.5e-4, 5e-4, 1e-3, 2.5e-3, 5e-3, 0.01, 0.025, 0.05,
+                   0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def _format(value: float) -> str:
+    return repr(float(value)) if isinstance(value, float) and not value.is_integer() else str(int(value))
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(labels: Dict[str, str], extra: Optional[Tuple[str, str]] = None) -> str:
+    items = list(labels.items()) + ([extra] if extra else [])
+    return "{" + ",".join(f'{key}="{_escape(value)}"' for key, value in items) + "}" if items else ""
+
+
+class _Sharded:
+    """Per-thread cells of a fixed width, summed on read."""
+
+    def __init__(self, width: int):
+        self._width = width
+        self._local = threading.local()
+        self._cells: List[List[float]] = []
+        self._lock = threading.Lock()
+
+    def _cell(self) -> List[float]:
+        try:
+            return self._local.cell
+        except AttributeError:
+            cell = self._local.cell = [0] * self._width
+            with self._lock:
+                self._cells.append(cell)
+            return cell
+
+    def _sum(self) -> List[float]:
+        with self._lock:
+            cells = list(self._cells)
+        return [sum(column) for column in zip(*cells)] if cells else [0] * self._width
+
+
+class Counter(_Sharded):
+    """Monotonic counter."""
+
+    def __init__(self, name: str, help: str):
+        super().__init__(1)
+        self.name = name
+        self.help = help
+
+    def inc(self, amount: float = 1):
+        """Add amount (non-negative) from the calling thread."""
+        self._cell()[0] += amount
+
+    @property
+    def value(self) -> float:
+        return self._sum()[0]
+
+    def render(self, labels: Dict[str, str]) -> List[str]:
+        return [f"# TYPE {self.name} counter", f"# HELP {self.name} {self.help}",
+                f"{self.name}_total{_labels(labels)} {_format(self.value)}"]
+
+
+class Gauge:
+    """Value read from a callback at scrape time."""
+
+    def __init__(self, name: str, help: str, read: Callable[[], float]):
+        self.name = name
+        self.help = help
+        self.read = read
+
+    def render(self, labels: Dict[str, str]) -> List[str]:
+        return [f"# TYPE {self.name} gauge", f"# HELP {self.name} {self.help}",
+                f"{self.name}{_labels(labels)} {_format(self.read())}"]
+
+
+class Histogram(_Sharded):
+    """Fixed-bucket histogram; each cell holds one count per bucket (plus +Inf) and the sum."""
+
+    def __init__(self, name: str, help: str, buckets: Sequence[float] = DEFAULT_BUCKETS):
+        super().__init__(len(buckets) + 2)
+        self.name = name
+        self.help = help
+        self.bounds = list(buckets)
+
+    def observe(self, value: float):
+        """Record one value from the calling thread."""
+        cell = self._cell()
+        cell[bisect.bisect_left(self.bounds, value)] += 1
+        cell[-1] += value
+
+    def render(self, labels: Dict[str, str]) -> List[str]:
+        totals = self._sum()
+        lines = [f"# TYPE {self.name} histogram", f"# HELP {self.name} {self.help}"]
+        cumulative = 0
+        for bound, count in zip(self.bounds + ["+Inf"], totals[:-1]):
+            cumulative += count
+            le = bound if isinstance(bound, str) else repr(float(bound))
+            lines.append(f"{self.name}_bucket{_labels(labels, ('le', le))} {cumulative}")
+        lines.append(f"{self.name}_count{_labels(labels)} {cumulative}")
+        lines.append(f"{self.name}_sum{_labels(labels)} {_format(totals[-1])}")
+        return lines
+
+
+class MetricsRegistry:
+    """Named metrics of one client, rendered with the same constant labels."""
+
+    def __init__(self, **labels: str):
+        """
+        Initialize the registry.
+
+        Args:
+            labels: Constant labels added to every sample (e.g. role, encoding)
+        """
+        self.labels = {key: str(value) for key, value in labels.items()}
+        self._metrics: Dict[str, object] = {}
+
+    def _add(self, metric):
+        if metric.name in self._metrics:
+            raise ValueError(f"metric {metric.name} already registered")
+        self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, help: str) -> Counter:
+        """Register a counter; name is without the _total suffix."""
+        return self._add(Counter(name, help))
+
+    def gauge(self, name: str, help: str, read: Callable[[], float]) -> Gauge:
+        """Register a gauge read from read() at scrape time."""
+        return self._add(Gauge(name, help, read))
+
+    def histogram(self, name: str, help: str, buckets: Sequence[float] = DEFAULT_BUCKETS) -> Histogram:
+        """Register a histogram with the given upper bucket bounds."""
+        return self._add(Histogram(name, help, buckets))
+
+    def render(self) -> str:
+        """All metrics in the OpenMetrics text format, terminated by # EOF."""
+        lines: List[str] = []
+        for metric in self._metrics.values():
+            lines.extend(metric.render(self.labels))
+        lines.append("# EOF")
+        return "\n".join(lines) + "\n"
+
+
+class MetricsServer:
+    """HTTP endpoint serving a registry at /metrics from a daemon thread."""
+
+    def __init__(self, registry: MetricsRegistry, host: str = "127.0.0.1", port: int = 9100):
+        """
+        Initialize the server (call start() to listen).
+
+        Args:
+            registry: Metrics to serve
+            host: Address to bind; the default only accepts local scrapers
+            port: Port to bind (0 picks a free port)
+        """
+        self.registry = registry
+        self.host = host
+        self.port = port
+        self._server: Optional[ThreadingHTTPServer] = None
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self):
+        """
+        Bind and serve in the background.
+
+        Raises:
+            OSError: If the address cannot be bound
+        """
+        registry = self.registry
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split("?", 1)[0] != "/metrics":
+                    self.send_error(404)
+                    return
+                body = registry.render().encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", CONTENT_TYPE)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        self._server = ThreadingHTTPServer((self.host, self.port), Handler)
+        self._server.daemon_threads = True
+        self.port = self._server.server_address[1]
+        self._thread = threading.Thread(target=self._server.serve_forever, name="metrics-http", daemon=True)
+        self._thread.start()
+
+    @property
+    def url(self) -> str:
+        return f"http://{self.host}:{self.port}/metrics"
+
+    def stop(self):
+        """Stop serving and close the socket."""
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
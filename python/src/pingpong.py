@@ -0,0 +1,178 @@
+#!/usr/bin/env python3
+"""
+MQTT ping-pong round-trip latency driver for Python.
+
+Publishes a request, waits for an echo responder (`subscriber.py --echo`) to
+bounce it back, and times the round trip with a single monotonic clock, so
+the result is unaffected by clock offset between hosts or containers.
+"""
+
+import argparse
+import json
+import math
+import os
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+from codec_loader import load_codec
+from publisher import SensorDataPublisher, parse_payload_size
+from subscriber import SensorDataSubscriber
+
+
+class PingPongDriver:
+    """Round-trip driver built from a request publisher and a reply subscriber."""
+
+    def __init__(self, broker: str = "localhost", port: int = 1883, encoding: str = "json", qos: int = 1):
+        """
+        Initialize the driver.
+
+        Args:
+            broker: MQTT broker hostname
+            port: MQTT broker port
+            encoding: Encoding format ('json', 'msgpack', 'cbor', 'protobuf', 'struct')
+            qos: Quality of Service level for requests and replies
+        """
+        self.requests = SensorDataPublisher(broker, port, encoding, qos)
+        self.replies = SensorDataSubscriber(broker, port, encoding, qos)
+        self.replies.client.on_message = self._on_reply
+        self.qos = qos
+        self._reply = threading.Event()
+        self._reply_payload: Optional[bytes] = None
+
+    def _on_reply(self, client, userdata, msg):
+        """Callback for when an echoed message comes back."""
+        self._reply_payload = msg.payload
+        self._reply.set()
+
+    def connect(self, reply_topic: str):
+        """
+        Connect both clients and subscribe to the reply topic.
+
+        Args:
+            reply_topic: Topic the responder echoes to
+        """
+        self.replies.connect(reply_topic)
+        self.replies.client.loop_start()
+        self.requests.connect()
+
+    def disconnect(self):
+        """Disconnect both clients."""
+        self.requests.disconnect()
+        self.replies.client.loop_stop()
+        self.replies.disconnect()
+
+    def ping(self, topic: str, data: Dict[str, Any], timeout: float = 5.0) -> Optional[float]:
+        """
+        Send one request and wait for its echo.
+
+        Args:
+            topic: Request topic the responder subscribes to
+            data: Sensor data dictionary
+            timeout: Seconds to wait for the reply
+
+        Returns:
+            Round-trip time in seconds (encode, publish, echo, decode), or None on timeout
+        """
+        self._reply.clear()
+        start = time.perf_counter()
+        payload = self.requests.encode_message(data)
+        self.requests.last_payload_size = len(payload)
+        self.requests.client.publish(topic, payload, qos=self.qos)
+        deadline = start + timeout
+        while True:
+            if not self._reply.wait(max(0.0, deadline - time.perf_counter())):
+                return None
+            self._reply.clear()
+            # A late echo of an earlier timed-out request must not count as this reply
+            if self._reply_payload == payload:
+                break
+        self.replies.decode_message(self._reply_payload)
+        return time.perf_counter() - start
+
+
+def percentile(sorted_values: List[float], q: float) -> float:
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return 0.0
+    return sorted_values[max(0, math.ceil(q / 100 * len(sorted_values)) - 1)]
+
+
+def main():
+    """Main entry point."""
+    parser = argparse.ArgumentParser(description="MQTT ping-pong round-trip latency driver")
+    parser.add_argument("--broker", default=os.getenv("MQTT_BROKER", "localhost"), help="MQTT broker hostname")
+    parser.add_argument("--port", type=int, default=int(os.getenv("MQTT_PORT", "1883")), help="MQTT broker port")
+    parser.add_argument("--encoding", choices=["json", "msgpack", "cbor", "protobuf", "struct"], default="json",
+                        help="Encoding format")
+    parser.add_argument("--topic", default="mqtt-demo/ping", help="Request topic")
+    parser.add_argument("--reply-topic", default="mqtt-demo/pong", help="Reply topic")
+    parser.add_argument("--sensor-id", default="sensor_001", help="Sensor ID")
+    parser.add_argument("--count", type=int, default=100, help="Number of measured round trips")
+    parser.add_argument("--warmup", type=int, default=10, help="Unmeasured round trips before measuring")
+    parser.add_argument("--interval", type=float, default=0.0, help="Pause between round trips (seconds)")
+    parser.add_argument("--timeout", type=float, default=5.0, help="Seconds to wait for each reply")
+    parser.add_argument("--payload", type=parse_payload_size, default="small",
+                        help="Payload size variant (small, medium, large) or target encoded size (e.g. 512, 64KB, 4MB)")
+    parser.add_argument("--qos", type=int, choices=[0, 1, 2], default=1,
+                        help="Quality of Service level")
+    parser.add_argument("--records", default=None,
+                        help="Write one JSON record per round trip to this path (file or FIFO)")
+
+    args = parser.parse_args()
+
+    print("=== MQTT Ping-Pong (Python) ===")
+    print(f"Encoding: {args.encoding}")
+    print(f"Topics: {args.topic} -> {args.reply_topic}")
+    print(f"Payload: {args.payload}")
+    print(f"QoS: {args.qos}")
+    if args.encoding == "protobuf":
+        print(f"Protobuf backend: {load_codec('protobuf').protobuf_backend()}")
+    print()
+
+    driver = PingPongDriver(args.broker, args.port, args.encoding, args.qos)
+    records = open(args.records, "w", buffering=1) if args.records else None
+    rtts = []
+    timeouts = 0
+
+    try:
+        driver.connect(args.reply_topic)
+
+        for i in range(args.warmup + args.count):
+            data = driver.requests.create_sensor_data(args.sensor_id, args.payload)
+            rtt = driver.ping(args.topic, data, args.timeout)
+            if i < args.warmup:
+                continue
+            seq = i - args.warmup + 1
+            if rtt is None:
+                timeouts += 1
+                print(f"  Round trip {seq}: timeout")
+            else:
+                rtts.append(rtt)
+                print(f"  Round trip {seq}: {rtt*1000:.3f}ms")
+                if records:
+                    records.write(json.dumps({"seq": seq, "rtt_ms": round(rtt * 1000, 4),
+                                              "bytes": driver.requests.last_payload_size}) + "\n")
+            if args.interval:
+                time.sleep(args.interval)
+
+        print()
+        print(f"✓ Completed {len(rtts)}/{args.count} round trips ({timeouts} timeouts)")
+        if rtts:
+            ordered = sorted(rtts)
+            print(f"✓ RTT min {ordered[0]*1000:.3f}ms, p50 {percentile(ordered, 50)*1000:.3f}ms, "
+                  f"p90 {percentile(ordered, 90)*1000:.3f}ms, p99 {percentile(ordered, 99)*1000:.3f}ms, "
+                  f"max {ordered[-1]*1000:.3f}ms")
+
+    except KeyboardInterrupt:
+        print("\n✗ Interrupted by user")
+    except Exception as e:
+        print(f"\n✗ Error: {e}")
+    finally:
+        driver.disconnect()
+        if records:
+            records.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,187 @@
+#!/usr/bin/env python3
+"""
+Profiling helpers for the Python MQTT clients.
+
+Captures cProfile stats or a low-overhead stack-sampling profile, plus the
+top tracemalloc allocators, for a measured window only.
+"""
+
+import io
+import sys
+import threading
+import time
+import tracemalloc
+from collections import Counter
+from pathlib import Path
+from typing import List, Optional
+
+PROFILE_MODES = ["cprofile", "sample"]
+
+
+class StackSampler:
+    """Periodically samples the stacks of all other threads."""
+
+    def __init__(self, interval: float = 0.005):
+        """
+        Initialize the sampler.
+
+        Args:
+            interval: Seconds between samples
+        """
+        self.interval = interval
+        self.samples: Counter = Counter()
+        self.sample_count = 0
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def _run(self):
+        """Sampling loop."""
+        own_ident = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            for ident, frame in sys._current_frames().items():
+                if ident == own_ident:
+                    continue
+                stack = []
+                while frame is not None:
+                    code = frame.f_code
+                    stack.append(f"{Path(code.co_filename).name}:{code.co_name}:{frame.f_lineno}")
+                    frame = frame.f_back
+                self.samples[";".join(reversed(stack))] += 1
+            self.sample_count += 1
+
+    def start(self):
+        """Start sampling in a daemon thread."""
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="stack-sampler", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """Stop sampling and wait for the sampler thread."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+
+    def folded(self) -> str:
+        """Return samples in collapsed-stack format (flamegraph.pl / speedscope)."""
+        return "\n".join(f"{stack} {count}" for stack, count in self.samples.most_common()) + "\n"
+
+    def top_functions(self, limit: int = 30) -> List[str]:
+        """Return the functions most often at the top of a sampled stack."""
+        leaves: Counter = Counter()
+        for stack, count in self.samples.items():
+            leaves[stack.rsplit(";", 1)[-1]] += count
+        total = sum(leaves.values()) or 1
+        return [f"{count:8d} {count * 100.0 / total:6.2f}%  {leaf}" for leaf, count in leaves.most_common(limit)]
+
+
+class WindowProfiler:
+    """Profiles a measured window and writes the results next to a base path."""
+
+    def __init__(self, mode: str = "cprofile", output: str = "profile", interval: float = 0.005,
+                 top: int = 25, trace_frames: int = 10):
+        """
+        Initialize the profiler.
+
+        Args:
+            mode: Profiling mode ('cprofile' or 'sample')
+            output: Base path for output files (suffixes are appended)
+            interval: Sampling interval in seconds (sample mode only)
+            top: Number of entries in the text reports
+            trace_frames: Frames kept per tracemalloc traceback
+        """
+        if mode not in PROFILE_MODES:
+            raise ValueError(f"Unsupported profile mode: {mode}")
+        self.mode = mode
+        self.output = Path(output)
+        self.top = top
+        self.trace_frames = trace_frames
+        self.profiler = None
+        if mode == "cprofile":
+            import cProfile  # deferred with pstats: unprofiled runs skip ~10ms of imports
+            self.profiler = cProfile.Profile()
+        self.sampler = StackSampler(interval) if mode == "sample" else None
+        self.snapshot: Optional[tracemalloc.Snapshot] = None
+        self.window = 0.0
+        self.running = False
+        self._start_time = 0.0
+
+    def start(self):
+        """Begin the measured window."""
+        tracemalloc.start(self.trace_frames)
+        self.running = True
+        self._start_time = time.perf_counter()
+        if self.profiler is not None:
+            self.profiler.enable()
+        else:
+            self.sampler.start()
+
+    def stop(self):
+        """End the measured window."""
+        if self.profiler is not None:
+            self.profiler.disable()
+        else:
+            self.sampler.stop()
+        self.window = time.perf_counter() - self._start_time
+        self.running = False
+        self.snapshot = tracemalloc.take_snapshot()
+        tracemalloc.stop()
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.stop()
+        return False
+
+    def _allocations_report(self) -> str:
+        """Format the top allocating source lines from the snapshot."""
+        snapshot = self.snapshot.filter_traces([
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, __file__),
+        ])
+        stats = snapshot.statistics("lineno")
+        total = sum(stat.size for stat in stats)
+        lines = [f"Top {self.top} allocators (live at end of window, total {total / 1024:.1f} KiB)", ""]
+        for stat in stats[:self.top]:
+            frame = stat.traceback[0]
+            lines.append(f"{stat.size / 1024:10.1f} KiB {stat.count:8d} blocks  {frame.filename}:{frame.lineno}")
+        return "\n".join(lines) + "\n"
+
+    def save(self) -> List[str]:
+        """
+        Write profile outputs.
+
+        Returns:
+            List of written file paths
+        """
+        self.output.parent.mkdir(parents=True, exist_ok=True)
+        written = []
+
+        summary = [f"Profile mode: {self.mode}", f"Window: {self.window:.3f}s", ""]
+        if self.profiler is not None:
+            prof_path = self.output.with_suffix(".prof")
+            self.profiler.dump_stats(str(prof_path))
+            written.append(str(prof_path))
+            import pstats
+            stream = io.StringIO()
+            pstats.Stats(self.profiler, stream=stream).sort_stats("cumulative").print_stats(self.top)
+            summary.append(stream.getvalue())
+        else:
+            folded_path = self.output.with_suffix(".folded")
+            folded_path.write_text(self.sampler.folded())
+            written.append(str(folded_path))
+            summary.append(f"Samples: {self.sampler.sample_count} every {self.sampler.interval * 1000:.1f}ms")
+            summary.append("")
+            summary.extend(self.sampler.top_functions(self.top))
+
+        summary_path = self.output.with_suffix(".txt")
+        summary_path.write_text("\n".join(summary) + "\n")
+        written.append(str(summary_path))
+
+        if self.snapshot is not None:
+            alloc_path = self.output.with_suffix(".alloc.txt")
+            alloc_path.write_text(self._allocations_report())
+            written.append(str(alloc_path))
+
+        return written
@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+"""
+Protobuf codec for SensorData.
+
+Wraps the generated ``sensor_data_pb2`` bindings (regenerate with
+scripts/generate-python-proto.sh), reports which protobuf runtime backend is
+active, and decodes into a read-only mapping view instead of copying every
+field into a dict.
+"""
+
+from collections.abc import Mapping
+from typing import Any, Dict, Iterator
+
+from google.protobuf.internal import api_implementation
+
+import sensor_data_pb2
+
+# Protobuf has no free-form field, so sized-payload padding is appended as an
+# unknown length-delimited field that decoders skip (field 15, wire type 2)
+PADDING_TAG = bytes([(15 << 3) | 2])
+
+FIELDS = ('timestamp', 'sensor_id', 'temperature', 'humidity', 'pressure')
+
+
+def protobuf_backend() -> str:
+    """Active protobuf runtime backend: 'upb', 'cpp' or 'python'."""
+    return api_implementation.Type()
+
+
+def encode_varint(value: int) -> bytes:
+    """Protobuf base-128 varint."""
+    out = bytearray()
+    while value > 0x7F:
+        out.append((value & 0x7F) | 0x80)
+        value >>= 7
+    out.append(value)
+    return bytes(out)
+
+
+class SensorDataView(Mapping):
+    """Read-only dict-like view of a parsed SensorData; fields are read on access."""
+
+    __slots__ = ('message',)
+
+    def __init__(self, message: sensor_data_pb2.SensorData):
+        self.message = message
+
+    def __getitem__(self, key: str) -> Any:
+        if key in FIELDS:
+            return getattr(self.message, key)
+        raise KeyError(key)
+
+    def get(self, key: str, default: Any = None) -> Any:
+        # Direct lookup; Mapping.get would go through __getitem__ and KeyError
+        if key in FIELDS:
+            return getattr(self.message, key)
+        return default
+
+    def __contains__(self, key: object) -> bool:
+        return key in FIELDS
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(FIELDS)
+
+    def __len__(self) -> int:
+        return len(FIELDS)
+
+
+class ProtobufCodec:
+    """Encoder/decoder for SensorData protobuf messages."""
+
+    @staticmethod
+    def encode(data: Dict[str, Any]) -> bytes:
+        """
+        Encode sensor data.
+
+        Args:
+            data: Sensor data dictionary (extra keys other than 'padding' are ignored)
+
+        Returns:
+            Encoded message
+        """
+        # Field assignment on an empty message beats the keyword constructor on upb
+        message = sensor_data_pb2.SensorData()
+        message.timestamp = data.get('timestamp', 0.0)
+        message.sensor_id = data.get('sensor_id', '')
+        message.temperature = data.get('temperature', 0.0)
+        message.humidity = data.get('humidity', 0.0)
+        message.pressure = data.get('pressure', 0.0)
+        encoded = message.SerializeToString()
+        padding = data.get('padding')
+        if padding:
+            padding = padding.encode('utf-8')
+            encoded += PADDING_TAG + encode_varint(len(padding)) + padding
+        return encoded
+
+    @staticmethod
+    def decode(payload: bytes) -> SensorDataView:
+        """
+        Decode a message.
+
+        Args:
+            payload: Encoded message
+
+        Returns:
+            Mapping view over the parsed message (use .message for the protobuf object)
+        """
+        return SensorDataView(sensor_data_pb2.SensorData.FromString(payload))
@@ -10,71 +10,371 @@ import time
 import argparse
 import random
 import os
-from typing import Dict, Any
+import re
+import resource
+import threading
+import uuid
+from typing import Callable, Dict, Any, Optional, Tuple
 import paho.mqtt.client as mqtt
+from paho.mqtt.packettypes import PacketTypes
+from paho.mqtt.properties import Properties
+from codec_loader import load_codec
+from profiling import PROFILE_MODES, WindowProfiler
+import tracing
 
-try:
-    import msgpack
-    MSGPACK_AVAILABLE = True
-except ImportError:
-    MSGPACK_AVAILABLE = False
 
-try:
-    import cbor2
-    CBOR_AVAILABLE = True
-except ImportError:
-    CBOR_AVAILABLE = False
+PAYLOAD_VARIANTS = ["small", "medium", "large"]
+SIZE_UNITS = {"": 1, "b": 1, "kb": 1024, "mb": 1024 ** 2}
+PROTOCOLS = {"3.1.1": mqtt.MQTTv311, "5": mqtt.MQTTv5}
+# Seconds between drain retries after a failed send (first, maximum)
+DRAIN_BACKOFF = (0.05, 2.0)
 
-try:
-    import sensor_data_pb2
-    PROTOBUF_AVAILABLE = True
-except (ImportError, TypeError):
-    PROTOBUF_AVAILABLE = False
+
+def parse_payload_size(value: str) -> str:
+    """
+    Parse a --payload value: a size variant or a target encoded size.
+
+    Args:
+        value: 'small', 'medium', 'large', or a size such as '512', '64KB', '4MB'
+
+    Returns:
+        The variant name, or the target size in bytes as a decimal string
+    """
+    if value in PAYLOAD_VARIANTS:
+        return value
+    match = re.fullmatch(r"(\d+)\s*([kKmM]?[bB]?)", value.strip())
+    if not match or match.group(2).lower() not in SIZE_UNITS:
+        raise argparse.ArgumentTypeError(
+            f"invalid payload {value!r}: expected {', '.join(PAYLOAD_VARIANTS)} or a size like 512, 64KB, 4MB")
+    return str(int(match.group(1)) * SIZE_UNITS[match.group(2).lower()])
+
+
+def publish_packet_size(topic_length: int, payload_length: int, qos: int, properties_length: Optional[int]) -> int:
+    """
+    Size on the wire of a PUBLISH packet.
+
+    Args:
+        topic_length: Encoded topic name length (0 when a topic alias stands in for it)
+        payload_length: Payload length
+        qos: QoS level (adds a packet identifier above 0)
+        properties_length: Packed MQTT 5 properties including their length prefix, or None for 3.1.1
+
+    Returns:
+        Bytes including the fixed header
+    """
+    remaining = 2 + topic_length + payload_length + (2 if qos else 0) + (properties_length or 0)
+    length_bytes = 1 if remaining < 128 else 2 if remaining < 16384 else 3 if remaining < 2097152 else 4
+    return 1 + length_bytes + remaining
+
+
+class _PackedProperties(Properties):
+    """PUBLISH properties packed once; paho would otherwise pack them again on every send."""
+
+    def __init__(self, **values):
+        super().__init__(PacketTypes.PUBLISH)
+        for name, value in values.items():
+            setattr(self, name, value)
+        # Properties.__setattr__ only accepts MQTT property names
+        self.__dict__["packed"] = super().pack()
+
+    def pack(self) -> bytes:
+        return self.packed
 
 
 class SensorDataPublisher:
     """Publisher for sensor data messages."""
 
-    def __init__(self, broker: str = "localhost", port: int = 1883, encoding: str = "json", qos: int = 1):
+    def __init__(self, broker: str = "localhost", port: int = 1883, encoding: str = "json", qos: int = 1,
+                 trace_path: Optional[str] = None, spool: Optional[Any] = None, drain_rate: float = 0.0,
+                 retain: bool = False, protocol: Optional[int] = None, topic_alias: bool = False,
+                 minimal_properties: bool = False, metrics: Optional[Any] = None):
         """
         Initialize the publisher.
 
         Args:
             broker: MQTT broker hostname
             port: MQTT broker port
-            encoding: Encoding format ('json' or 'msgpack')
+            encoding: Encoding format ('json', 'msgpack', 'cbor', 'protobuf', 'struct')
             qos: Quality of Service level (0, 1, or 2)
+            trace_path: If set, trace each message's stages to this file (uses MQTT 5)
+            spool: If set, a spool.DiskSpool that holds messages while the broker is unreachable
+            drain_rate: Messages per second when draining the spool after a reconnect (0 = unlimited)
+            retain: Publish every message retained, so the broker keeps the last one per topic
+            protocol: mqtt.MQTTv311 or mqtt.MQTTv5; defaults to MQTT 5 when tracing or using
+                topic aliases, else 3.1.1
+            topic_alias: Replace each topic by a topic alias after its first PUBLISH, up to the
+                broker's Topic Alias Maximum (MQTT 5)
+            minimal_properties: Carry the trace stamps in one compact user property instead of
+                one per stamp (MQTT 5)
+            metrics: If set, a metrics.MetricsRegistry to record message, byte, error and timing
+                metrics in
+
+        Raises:
+            ImportError: If the library for the selected encoding is not installed
+            ValueError: If topic aliases or minimal properties are requested without MQTT 5,
+                or topic aliases with a spool
         """
+        if protocol is None:
+            protocol = mqtt.MQTTv5 if trace_path or topic_alias else mqtt.MQTTv311
+        if (topic_alias or minimal_properties) and protocol != mqtt.MQTTv5:
+            raise ValueError("topic aliases and minimal properties need MQTT 5")
+        if topic_alias and spool is not None:
+            # Aliases last one connection, but paho retransmits alias-only publishes after a reconnect
+            raise ValueError("topic aliases cannot be combined with a spool")
         self.broker = broker
         self.port = port
         self.encoding = encoding.lower()
         self.qos = qos
-        self.client = mqtt.Client(mqtt.CallbackAPIVersion.VERSION2)
+        self.retain = retain
+        self.protocol = protocol
+        self.topic_alias = topic_alias
+        self.minimal_properties = minimal_properties
+        self.last_payload_size = 0
+        # Computed PUBLISH sizes (first transmissions only; retransmissions are not counted)
+        self.last_packet_size = 0
+        self.packet_bytes = 0
+        self.payload_bytes = 0
+        self.packets = 0
+        # Granted by the broker in CONNACK; 0 sends full topics
+        self.alias_maximum = 0
+        self._aliases: Dict[str, _PackedProperties] = {}
+        self._alias_lock = threading.Lock()
+        self._padding: Dict[int, str] = {}
+        # Only the selected codec is imported (see codec_loader)
+        self._codec = load_codec(self.encoding)
+        self._struct_codec = self._codec.StructCodec() if self.encoding == "struct" else None
+        self._connected = threading.Event()
+        self.tracer = None
+        self.trace_run = None
+        self._trace_seq = 0
+        self._trace_create = None
+        self._trace_current: Optional[Dict[str, Any]] = None
+        if trace_path:
+            self.tracer = tracing.TraceWriter(trace_path, role="pub", enc=self.encoding, qos=qos)
+            self.trace_run = uuid.uuid4().hex[:8]
+        self.client = mqtt.Client(mqtt.CallbackAPIVersion.VERSION2, protocol=protocol)
+        if self.tracer:
+            self.client.on_socket_unregister_write = self._on_socket_written
         self.client.on_connect = self._on_connect
+        self.client.on_disconnect = self._on_disconnect
         self.client.on_publish = self._on_publish
+        self.metrics = metrics
+        if metrics is not None:
+            self._register_metrics(metrics)
+        # Called as on_ack(mid) instead of printing when set (adaptive mode)
+        self.on_ack: Optional[Callable[[int], None]] = None
+        self.spool = spool
+        self.drain_rate = drain_rate
+        self.spooled = 0
+        self.drained = 0
+        self.drain_seconds = 0.0
+        self._spool_lock = threading.Lock()
+        self._spool_wakeup = threading.Event()
+        self._closing = threading.Event()
+        self._drainer = None
+        if spool is not None:
+            # Reconnect quickly after an outage instead of backing off to paho's 120s default
+            self.client.reconnect_delay_set(1, 10)
+            self._drainer = threading.Thread(target=self._drain, name="spool-drain", daemon=True)
+
+    def _register_metrics(self, registry):
+        self._m_messages = registry.counter("mqtt_publisher_messages", "PUBLISH packets queued")
+        self._m_payload_bytes = registry.counter("mqtt_publisher_payload_bytes", "Payload bytes queued")
+        self._m_packet_bytes = registry.counter("mqtt_publisher_packet_bytes", "PUBLISH packet bytes queued")
+        self._m_acked = registry.counter("mqtt_publisher_acked", "PUBLISHes acknowledged (QoS 0: written)")
+        self._m_errors = registry.counter("mqtt_publisher_errors", "PUBLISH calls that failed (e.g. not connected)")
+        self._m_encode = registry.histogram("mqtt_publisher_encode_seconds", "Time to encode one message")
+        self._m_publish = registry.histogram("mqtt_publisher_publish_seconds",
+                                             "Time from publish() to acknowledgement (waiting publishes only)")
+        registry.gauge("mqtt_publisher_inflight", "PUBLISHes queued and not yet acknowledged",
+                       lambda: self._m_messages.value - self._m_acked.value)
+        registry.gauge("mqtt_publisher_queue_depth", "Packets in paho's outgoing queue plus spooled messages",
+                       self._queue_depth)
+
+    def _queue_depth(self) -> int:
+        # paho keeps unsent packets in a deque; there is no public accessor
+        depth = len(getattr(self.client, "_out_packet", ()))
+        if self.spool is not None:
+            with self._spool_lock:
+                depth += len(self.spool)
+        return depth
 
     def _on_connect(self, client, userdata, flags, reason_code, properties):
         """Callback for when the client connects to the broker."""
         if reason_code == 0:
             print(f"✓ Connected to {self.broker}:{self.port}")
+            if self.topic_alias:
+                with self._alias_lock:
+                    # Aliases are scoped to one connection
+                    self._unalias_pending()
+                    self._aliases.clear()
+                    self.alias_maximum = getattr(properties, "TopicAliasMaximum", 0)
+                if not self.alias_maximum:
+                    print("⚠ Broker allows no topic aliases; sending full topics")
+            self._connected.set()
+            self._spool_wakeup.set()
         else:
             print(f"✗ Connection failed with code: {reason_code}")
 
+    def _unalias_pending(self):
+        """
+        Restore full topics on PUBLISHes paho will resend after a reconnect.
+
+        paho resends unacknowledged (and still queued) messages as stored, but
+        their topic aliases belonged to the previous connection; an alias-only
+        PUBLISH with an empty topic is a protocol error on the new one. Called
+        from on_connect, before paho resends, with _alias_lock held. That order
+        and the message internals are paho 2.1's, hence the pin in
+        requirements.txt and tests/test_topic_alias_resend.py.
+        """
+        topics = {alias.TopicAlias: topic for topic, alias in self._aliases.items()}
+        # paho has no public accessor for its outgoing messages
+        with self.client._out_message_mutex:
+            for message in self.client._out_messages.values():
+                properties = message.properties
+                if properties is None or not hasattr(properties, "TopicAlias"):
+                    continue
+                if not message._topic:
+                    message._topic = topics[properties.TopicAlias].encode("utf-8")
+                if isinstance(properties, _PackedProperties):
+                    # Shared alias-only properties: there is nothing else to keep
+                    message.properties = None
+                else:
+                    delattr(properties, "TopicAlias")
+
+    def _on_disconnect(self, client, userdata, flags, reason_code, properties):
+        """Callback for when the connection to the broker is lost or closed."""
+        self._connected.clear()
+        if self.spool is not None and not self._closing.is_set():
+            print(f"⚠ Disconnected ({reason_code}); spooling to {self.spool.path}")
+
     def _on_publish(self, client, userdata, mid, reason_code, properties):
         """Callback for when a message is published."""
+        if self.metrics is not None:
+            self._m_acked.inc()
+        if self._trace_current is not None:
+            now = tracing.now_ns()
+            # QoS 0 "publish" fires on socket write, before the queue-flushed callback
+            self._trace_current.setdefault("t_written", now)
+            self._trace_current["t_acked"] = now
+        if self.on_ack is not None:
+            self.on_ack(mid)
+            return
         print(f"  Published message {mid}")
 
-    def connect(self):
-        """Connect to the MQTT broker."""
+    def _on_socket_written(self, client, userdata, sock):
+        """Callback for when the outgoing queue has been flushed to the socket."""
+        # publish() waits for each message, so at most one traced message is in flight
+        if self._trace_current is not None and "t_written" not in self._trace_current:
+            self._trace_current["t_written"] = tracing.now_ns()
+
+    def connect(self, timeout: float = 5.0):
+        """
+        Connect to the MQTT broker and wait for the connection to be acknowledged.
+
+        Args:
+            timeout: Seconds to wait for CONNACK before publishing anyway
+        """
         print(f"Connecting to MQTT broker at {self.broker}:{self.port}...")
-        self.client.connect(self.broker, self.port, 60)
+        if self.spool is not None:
+            # With a spool the broker may be down at startup; paho keeps retrying in the background
+            self.client.connect_async(self.broker, self.port, 60)
+        else:
+            self.client.connect(self.broker, self.port, 60)
         self.client.loop_start()
-        time.sleep(1)  # Wait for connection
+        if self._drainer is not None:
+            self._drainer.start()
+        if not self._connected.wait(timeout):
+            where = f"spooled to {self.spool.path}" if self.spool is not None else "queued"
+            print(f"⚠ No CONNACK after {timeout:.0f}s; messages are {where} until connected")
 
     def disconnect(self):
         """Disconnect from the MQTT broker."""
-        self.client.loop_stop()
+        self._closing.set()
+        self._spool_wakeup.set()
+        if self._drainer is not None and self._drainer.is_alive():
+            self._drainer.join()
+        # Disconnecting first lets the network thread exit at once instead of
+        # finishing its current one-second select() before loop_stop() returns
         self.client.disconnect()
+        self.client.loop_stop()
+        if self.tracer:
+            self.tracer.close()
+        if self.spool is not None:
+            self.spool.close()
+
+    def _wait_acked(self, result: mqtt.MQTTMessageInfo) -> bool:
+        """Wait for a publish to complete; gives up (False) if the connection drops first."""
+        while not result.is_published():
+            if not self._connected.is_set():
+                return False
+            result.wait_for_publish(0.1)
+        return True
+
+    def _drain(self):
+        """Spool drainer: republish spooled messages in order while connected."""
+        interval = 1.0 / self.drain_rate if self.drain_rate > 0 else 0.0
+        backoff = 0.0
+        while not self._closing.is_set():
+            with self._spool_lock:
+                record = self.spool.peek() if self._connected.is_set() else None
+                head = self.spool.head
+            if record is None:
+                self._spool_wakeup.wait(0.5)
+                self._spool_wakeup.clear()
+                continue
+            start = time.perf_counter()
+            result = self._send(record[0], record[1])
+            if result.rc == mqtt.MQTT_ERR_SUCCESS and self._wait_acked(result):
+                # Removed only once delivered, so an outage mid-drain loses nothing; if a full
+                # ring dropped this record meanwhile, the next one was never sent and stays
+                with self._spool_lock:
+                    self.spool.pop(head)
+                self.drained += 1
+                backoff = 0.0
+            else:
+                # The send failed while still connected (e.g. paho's queue is full): back off
+                backoff = min(max(backoff * 2, DRAIN_BACKOFF[0]), DRAIN_BACKOFF[1])
+                self._closing.wait(backoff)
+            if interval:
+                time.sleep(max(0.0, interval - (time.perf_counter() - start)))
+            self.drain_seconds += time.perf_counter() - start
+
+    def _spool_push(self, topic: str, payload: bytes):
+        with self._spool_lock:
+            self.spool.push(topic, payload)
+        self.spooled += 1
+        self._spool_wakeup.set()
+
+    def wait_for_spool(self, timeout: float) -> bool:
+        """
+        Wait for the spool to drain.
+
+        Args:
+            timeout: Seconds to wait
+
+        Returns:
+            True if the spool is empty
+        """
+        deadline = time.perf_counter() + timeout
+        while len(self.spool) and time.perf_counter() < deadline:
+            time.sleep(0.05)
+        return not len(self.spool)
+
+    def spool_stats(self) -> Dict[str, Any]:
+        """
+        Spool metrics.
+
+        Returns:
+            Spool depth and drop counters, messages spooled and drained, drain
+            throughput (messages per second spent draining) and peak RSS in MB
+        """
+        with self._spool_lock:
+            stats = self.spool.stats()
+        stats.update(spooled=self.spooled, drained=self.drained,
+                     drain_rate=self.drained / self.drain_seconds if self.drain_seconds else 0.0,
+                     max_rss_mb=resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024)
+        return stats
 
     def encode_message(self, data: Dict[str, Any]) -> bytes:
         """
@@ -89,24 +389,13 @@ class SensorDataPublisher:
         if self.encoding == "json":
             return json.dumps(data).encode('utf-8')
         elif self.encoding == "msgpack":
-            if not MSGPACK_AVAILABLE:
-                raise ImportError("msgpack is not installed")
-            return msgpack.packb(data)
+            return self._codec.packb(data)
         elif self.encoding == "cbor":
-            if not CBOR_AVAILABLE:
-                raise ImportError("cbor2 is not installed")
-            return cbor2.dumps(data)
+            return self._codec.dumps(data)
         elif self.encoding == "protobuf":
-            if not PROTOBUF_AVAILABLE:
-                raise ImportError("protobuf is not installed")
-            # Convert dict to protobuf message
-            pb_message = sensor_data_pb2.SensorData()
-            pb_message.timestamp = data.get('timestamp', 0.0)
-            pb_message.sensor_id = data.get('sensor_id', '')
-            pb_message.temperature = data.get('temperature', 0.0)
-            pb_message.humidity = data.get('humidity', 0.0)
-            pb_message.pressure = data.get('pressure', 0.0)
-            return pb_message.SerializeToString()
+            return self._codec.ProtobufCodec.encode(data)
+        elif self.encoding == "struct":
+            return self._struct_codec.encode(data)
         else:
             raise ValueError(f"Unsupported encoding: {self.encoding}")
 
@@ -116,11 +405,14 @@ class SensorDataPublisher:
 
         Args:
             sensor_id: Sensor identifier
-            payload_size: Size variant ('small', 'medium', 'large')
+            payload_size: Size variant ('small', 'medium', 'large') or a target
+                encoded size in bytes (see parse_payload_size())
 
         Returns:
             Dictionary with sensor data
         """
+        if self.tracer:
+            self._trace_create = tracing.now_ns()
         base_data = {
             "timestamp": time.time(),
             "sensor_id": sensor_id,
@@ -131,6 +423,8 @@ class SensorDataPublisher:
         
         if payload_size == "small":
             return base_data
+        elif payload_size.isdigit():
+            return self._pad_to_size(base_data, int(payload_size))
         elif payload_size == "medium":
             # Add more fields to reach ~2KB
             base_data.update({
@@ -159,6 +453,145 @@ class SensorDataPublisher:
         
         return base_data
 
+    def _pad_to_size(self, data: Dict[str, Any], target: int) -> Dict[str, Any]:
+        """
+        Add a 'padding' field so the encoded message is about target bytes.
+
+        The padding length is calibrated once per target by encoding and
+        correcting for each codec's framing, then reused. Targets below the
+        unpadded size yield the unpadded message.
+        """
+        padding = self._padding.get(target)
+        if padding is None and len(self.encode_message(data)) >= target:
+            padding = self._padding[target] = ""
+        elif padding is None:
+            length = 0
+            for _ in range(4):  # length prefixes grow with the padding; converges in 1-3 steps
+                size = len(self.encode_message({**data, "padding": "x" * length}))
+                if size == target:
+                    break
+                length = max(0, length + target - size)
+            padding = self._padding[target] = "x" * length
+        if padding:
+            data["padding"] = padding
+        return data
+
+    @property
+    def aliased_topics(self) -> int:
+        """Topics sent by alias on the current connection."""
+        return len(self._aliases)
+
+    def _send(self, topic: str, payload: bytes, properties: Optional[Properties] = None) -> mqtt.MQTTMessageInfo:
+        """
+        Queue one PUBLISH, using a topic alias when one is available, and count its size.
+
+        The first PUBLISH of a topic carries the topic and assigns it the next
+        free alias; later ones carry only the alias. Topics beyond the broker's
+        Topic Alias Maximum are always sent in full.
+        """
+        if not self.alias_maximum:
+            properties_length = None
+            if self.protocol == mqtt.MQTTv5:
+                properties_length = len(properties.pack()) if properties is not None else 1
+            size = self._count(len(topic.encode("utf-8")), len(payload), properties_length)
+            result = self.client.publish(topic, payload, qos=self.qos, retain=self.retain, properties=properties)
+            if self.metrics is not None:
+                self._observe_send(result, len(payload), size)
+            return result
+
+        with self._alias_lock:
+            name = topic
+            alias = self._aliases.get(topic)
+            if alias is not None:
+                name = ""
+            elif len(self._aliases) < self.alias_maximum:
+                alias = self._aliases[topic] = _PackedProperties(TopicAlias=len(self._aliases) + 1)
+            if alias is not None and properties is None:
+                # Shared by all PUBLISHes of the topic
+                properties = alias
+            elif alias is not None:
+                properties.TopicAlias = alias.TopicAlias
+            properties_length = len(properties.pack()) if properties is not None else 1
+            size = self._count(len(name.encode("utf-8")), len(payload), properties_length)
+            # Queued under the lock so an alias-only PUBLISH never overtakes the one assigning the alias
+            result = self.client.publish(name, payload, qos=self.qos, retain=self.retain, properties=properties)
+        if self.metrics is not None:
+            self._observe_send(result, len(payload), size)
+        return result
+
+    def _count(self, topic_length: int, payload_length: int, properties_length: Optional[int]) -> int:
+        size = self.last_packet_size = publish_packet_size(topic_length, payload_length, self.qos, properties_length)
+        self.packet_bytes += size
+        self.payload_bytes += payload_length
+        self.packets += 1
+        return size
+
+    def _observe_send(self, result: mqtt.MQTTMessageInfo, payload_length: int, packet_size: int):
+        if result.rc != mqtt.MQTT_ERR_SUCCESS:
+            self._m_errors.inc()
+            return
+        self._m_messages.inc()
+        self._m_payload_bytes.inc(payload_length)
+        self._m_packet_bytes.inc(packet_size)
+
+    def _encode_observed(self, data: Dict[str, Any]) -> bytes:
+        """encode_message(), timed into the encode histogram when metrics are enabled."""
+        if self.metrics is None:
+            return self.encode_message(data)
+        start = time.perf_counter()
+        payload = self.encode_message(data)
+        self._m_encode.observe(time.perf_counter() - start)
+        return payload
+
+    def publish_encoded(self, topic: str, payload: bytes, start_time: Optional[float] = None) -> float:
+        """
+        Publish an already-encoded payload (e.g. one replayed from a message log).
+
+        Args:
+            topic: MQTT topic
+            payload: Encoded message
+            start_time: time.perf_counter() at which to start the clock (default: now)
+
+        Returns:
+            Time taken to publish in seconds
+        """
+        if start_time is None:
+            start_time = time.perf_counter()
+        self.last_payload_size = len(payload)
+        if self.spool is not None:
+            # Spool while disconnected, and behind an undrained backlog to keep order
+            if not self._connected.is_set() or len(self.spool):
+                self._spool_push(topic, payload)
+                return time.perf_counter() - start_time
+            result = self._send(topic, payload)
+            if result.rc != mqtt.MQTT_ERR_SUCCESS:
+                self._spool_push(topic, payload)
+            else:
+                # If the connection drops mid-flight paho retransmits this one message on reconnect
+                self._wait_acked(result)
+            return time.perf_counter() - start_time
+        result = self._send(topic, payload)
+        result.wait_for_publish()
+        elapsed = time.perf_counter() - start_time
+        if self.metrics is not None:
+            self._m_publish.observe(elapsed)
+        return elapsed
+
+    def publish_async(self, topic: str, data: Dict[str, Any]) -> int:
+        """
+        Encode and queue sensor data without waiting for it to be published.
+
+        Args:
+            topic: MQTT topic
+            data: Sensor data dictionary
+
+        Returns:
+            Message id, reported to on_ack once published
+        """
+        payload = self._encode_observed(data)
+        self.last_payload_size = len(payload)
+        return self._send(topic, payload).mid
+
     def publish(self, topic: str, data: Dict[str, Any]) -> float:
         """
         Publish sensor data to MQTT topic.
@@ -170,11 +603,146 @@ class SensorDataPublisher:
         Returns:
             Time taken to publish in seconds
         """
-        start_time = time.time()
-        payload = self.encode_message(data)
-        result = self.client.publish(topic, payload, qos=self.qos)
+        start_time = time.perf_counter()
+        payload = self._encode_observed(data)
+        if not self.tracer:
+            return self.publish_encoded(topic, payload, start_time)
+        self.last_payload_size = len(payload)
+
+        t_encoded = tracing.now_ns()
+        self._trace_seq += 1
+        trace = {
+            "run": self.trace_run,
+            "seq": self._trace_seq,
+            "t_create": self._trace_create or t_encoded,
+            "t_encoded": t_encoded,
+            "bytes": len(payload),
+        }
+        self._trace_current = trace
+        result = self._send(topic, payload, tracing.to_properties(trace, compact=self.minimal_properties))
+        # Once publish() returns; the network thread may already have written the packet
+        trace["t_enqueued"] = tracing.now_ns()
         result.wait_for_publish()
-        return time.time() - start_time
+        elapsed = time.perf_counter() - start_time
+        if self.metrics is not None:
+            self._m_publish.observe(elapsed)
+        self._trace_current = None
+        self._trace_create = None
+        self.tracer.write(trace)
+        return elapsed
+
+
+def sensor_topic(args, i: int) -> Tuple[str, str]:
+    """Sensor id and topic of the i-th message under --sensors and --topic-per-sensor."""
+    sensor_id = args.sensor_id if args.sensors == 1 else f"sensor_{i % args.sensors:05d}"
+    return sensor_id, f"{args.topic}/{sensor_id}" if args.topic_per_sensor else args.topic
+
+
+def run_adaptive(publisher: SensorDataPublisher, args, records) -> Any:
+    """
+    Publish --count messages pipelined, paced by an AIMD controller on ack latency.
+
+    Args:
+        publisher: Connected publisher (paho's in-flight window set to --max-inflight)
+        args: Parsed command-line arguments
+        records: Open --records file or None; one record per ack with the ack latency as pub_ms
+
+    Returns:
+        The controller, for its saturation point and history
+    """
+    from rate_control import AIMDController
+
+    target = args.target_latency / 1000 if args.target_latency else None
+    controller = AIMDController(initial_rate=args.initial_rate, target_latency=target,
+                                max_inflight=args.max_inflight, expire_after=args.ack_timeout)
+    def on_ack(mid):
+        latency = controller.acked(mid, time.perf_counter())
+        if records and latency is not None:
+            records.write(json.dumps({"seq": controller.acked_total, "pub_ms": round(latency * 1000, 4),
+                                      "bytes": publisher.last_payload_size}) + "\n")
+
+    publisher.on_ack = on_ack
+    started = next_send = time.perf_counter()
+    for i in range(args.count):
+        sensor_id, topic = sensor_topic(args, i)
+        data = publisher.create_sensor_data(sensor_id, args.payload)
+        now = time.perf_counter()
+        while controller.inflight >= controller.max_inflight:
+            if now - (controller.last_ack or started) > args.ack_timeout:
+                break
+            controller.update(now)
+            time.sleep(0.0005)
+            now = time.perf_counter()
+        if controller.inflight >= controller.max_inflight:
+            print(f"  ✗ No acknowledgement for {args.ack_timeout:g}s with {controller.inflight} in flight; "
+                  f"stopped after {i} messages")
+            break
+        if next_send > now:
+            time.sleep(next_send - now)
+        start = time.perf_counter()
+        controller.sent(publisher.publish_async(topic, data), start)
+        next_send = max(next_send, start - controller.period) + 1.0 / controller.rate
+        if controller.update(start) == "decrease":
+            _, _, goodput, p90, inflight = controller.history[-1]
+            print(f"  ⚠ Backing off to {controller.rate:.0f} msg/s: {goodput:.0f} msg/s acked, "
+                  f"ack p90 {p90 * 1000:.2f}ms, {inflight} in flight")
+
+    deadline = time.perf_counter() + args.ack_timeout
+    while controller.inflight and time.perf_counter() < deadline:
+        time.sleep(0.01)
+    # Give up on whatever is still in flight
+    controller.expire(time.perf_counter() + controller.expire_after)
+    if controller.expired:
+        print(f"  ⚠ {controller.expired} messages never acknowledged")
+    return controller
+
+
+def run_soak(publisher: SensorDataPublisher, args, duration: float) -> int:
+    """
+    Publish pipelined at a fixed --rate for a duration while sampling throughput, ack latency,
+    memory, GC, in-flight messages and queue depth.
+
+    Sends are scheduled open-loop: if the broker falls behind, messages queue up
+    in paho instead of the rate dropping, which is what the queue-depth and
+    memory checks look for.
+
+    Args:
+        publisher: Connected publisher
+        args: Parsed command-line arguments (--rate, --payload and --soak-* options)
+        duration: Seconds to publish; Ctrl+C ends the run early and still reports
+
+    Returns:
+        Messages sent
+    """
+    from soak import SoakMonitor, analyze, print_findings
+
+    monitor = SoakMonitor(args.soak_interval, args.soak_output,
+                          {"inflight": lambda: monitor.inflight, "queue_depth": publisher._queue_depth})
+    publisher.on_ack = lambda mid: monitor.acked(mid, time.perf_counter())
+    period = 1.0 / args.rate
+    sent = 0
+    monitor.start()
+    try:
+        next_send = time.perf_counter()
+        deadline = next_send + duration
+        while next_send < deadline:
+            now = time.perf_counter()
+            if next_send > now:
+                time.sleep(next_send - now)
+            sensor_id, topic = sensor_topic(args, sent)
+            data = publisher.create_sensor_data(sensor_id, args.payload)
+            start = time.perf_counter()
+            monitor.sent(publisher.publish_async(topic, data), start)
+            sent += 1
+            next_send += period
+    except KeyboardInterrupt:
+        print("\n✗ Soak interrupted")
+    finally:
+        monitor.stop()
+    print(f"\n✓ Sent {sent} messages at {args.rate:g} msg/s in {len(monitor.samples)} intervals "
+          f"({monitor.inflight} unacknowledged, {monitor.expired} expired)")
+    print_findings(analyze(monitor.samples, args.soak_drift, memory_growth=args.soak_max_growth))
+    return sent
 
 
 def main():
@@ -182,53 +750,214 @@ def main():
     parser = argparse.ArgumentParser(description="MQTT Sensor Data Publisher")
     parser.add_argument("--broker", default=os.getenv("MQTT_BROKER", "localhost"), help="MQTT broker hostname")
     parser.add_argument("--port", type=int, default=int(os.getenv("MQTT_PORT", "1883")), help="MQTT broker port")
-    parser.add_argument("--encoding", choices=["json", "msgpack", "cbor", "protobuf"], default="json",
+    parser.add_argument("--encoding", choices=["json", "msgpack", "cbor", "protobuf", "struct"], default="json",
                         help="Encoding format")
     parser.add_argument("--topic", default="mqtt-demo/all", help="MQTT topic")
     parser.add_argument("--sensor-id", default="sensor_001", help="Sensor ID")
+    parser.add_argument("--sensors", type=int, default=1,
+                        help="Cycle through this many sensors (sensor_00000, ...; overrides --sensor-id)")
+    parser.add_argument("--topic-per-sensor", action="store_true",
+                        help="Publish each sensor to TOPIC/<sensor id> instead of TOPIC")
+    parser.add_argument("--retain", action="store_true",
+                        help="Publish retained, so new subscribers get each topic's last reading")
     parser.add_argument("--count", type=int, default=10, help="Number of messages to publish")
     parser.add_argument("--interval", type=float, default=1.0, help="Interval between messages (seconds)")
-    parser.add_argument("--payload", choices=["small", "medium", "large"], default="small",
-                        help="Payload size variant")
+    parser.add_argument("--payload", type=parse_payload_size, default="small",
+                        help="Payload size variant (small, medium, large) or target encoded size (e.g. 512, 64KB, 4MB)")
     parser.add_argument("--qos", type=int, choices=[0, 1, 2], default=1,
                         help="Quality of Service level")
+    parser.add_argument("--profile", choices=PROFILE_MODES, default=None,
+                        help="Profile the publish loop with cProfile or a sampling profiler")
+    parser.add_argument("--profile-output", default="profile_publisher",
+                        help="Base path for profile output files")
+    parser.add_argument("--trace", default=None,
+                        help="Append per-stage trace records to this file (switches to MQTT 5)")
+    parser.add_argument("--protocol", choices=list(PROTOCOLS), default=None,
+                        help="MQTT protocol version (default: 5 with --trace or --topic-alias, else 3.1.1)")
+    parser.add_argument("--topic-alias", action="store_true",
+                        help="MQTT 5: send each topic once, then only its topic alias")
+    parser.add_argument("--minimal-properties", action="store_true",
+                        help="MQTT 5: carry --trace stamps in one compact user property")
+    parser.add_argument("--records", default=None,
+                        help="Write one JSON record per message to this path (file or FIFO)")
+    parser.add_argument("--spool", default=None, metavar="PATH",
+                        help="Spool messages to this ring file while the broker is unreachable")
+    parser.add_argument("--spool-mb", type=int, default=64,
+                        help="Spool capacity in MB (oldest messages are dropped when full)")
+    parser.add_argument("--drain-rate", type=float, default=0.0,
+                        help="Messages per second when draining the spool after reconnecting (0 = unlimited)")
+    parser.add_argument("--drain-timeout", type=float, default=30.0,
+                        help="Seconds to wait for the spool to drain before exiting")
+    parser.add_argument("--adaptive", action="store_true",
+                        help="Pipeline publishes and adapt the rate to ack latency (AIMD) instead of --interval")
+    parser.add_argument("--target-latency", type=float, default=None, metavar="MS",
+                        help="Adaptive mode: ack latency treated as congestion (default: 4x the lowest seen)")
+    parser.add_argument("--max-inflight", type=int, default=100,
+                        help="Adaptive and soak modes: paho's in-flight window (adaptive mode pauses sending at it)")
+    parser.add_argument("--initial-rate", type=float, default=100.0,
+                        help="Adaptive mode: starting rate in messages per second")
+    parser.add_argument("--ack-timeout", type=float, default=10.0,
+                        help="Adaptive mode: seconds before an unacknowledged message is given up on, "
+                             "and without any ack before the run stops")
+    parser.add_argument("--metrics-port", type=int, default=None, metavar="PORT",
+                        help="Serve live OpenMetrics at http://HOST:PORT/metrics")
+    parser.add_argument("--metrics-host", default="127.0.0.1", help="Address for --metrics-port")
+    parser.add_argument("--soak", default=None, metavar="DURATION",
+                        help="Soak mode: publish at --rate for DURATION (e.g. 30m, 6h), sample throughput, "
+                             "latency, memory and GC every --soak-interval, and report drift at the end")
+    parser.add_argument("--rate", type=float, default=100.0, help="Soak mode: messages per second")
+    parser.add_argument("--soak-interval", type=float, default=10.0, help="Soak mode: seconds between samples")
+    parser.add_argument("--soak-output", default=None, metavar="PATH",
+                        help="Soak mode: write the samples to PATH as JSON lines")
+    parser.add_argument("--soak-drift", type=float, default=0.25,
+                        help="Soak mode: first- to last-quarter change flagged as drift")
+    parser.add_argument("--soak-max-growth", type=float, default=1.0, metavar="MB_PER_HOUR",
+                        help="Soak mode: steady RSS growth above this is flagged")
 
     args = parser.parse_args()
+    if args.adaptive and (args.spool or args.trace):
+        parser.error("--adaptive cannot be combined with --spool or --trace")
+    soak_duration = None
+    if args.soak is not None:
+        from soak import parse_duration
+        try:
+            soak_duration = parse_duration(args.soak)
+        except argparse.ArgumentTypeError as e:
+            parser.error(f"--soak: {e}")
+        if args.adaptive or args.spool or args.trace:
+            parser.error("--soak cannot be combined with --adaptive, --spool or --trace")
+        if args.rate <= 0:
+            parser.error("--rate must be positive")
+    if args.sensors < 1:
+        parser.error("--sensors must be at least 1")
+    if (args.topic_alias or args.minimal_properties) and args.protocol == "3.1.1":
+        parser.error("--topic-alias and --minimal-properties need --protocol 5")
+    if args.topic_alias and args.spool:
+        parser.error("--topic-alias cannot be combined with --spool")
+    spool = None
+    if args.spool:
+        from spool import DiskSpool
+        try:
+            spool = DiskSpool(args.spool, args.spool_mb * 1024 * 1024)
+        except (OSError, ValueError) as e:
+            parser.error(f"--spool: {e}")
 
     print(f"=== MQTT Publisher (Python) ===")
     print(f"Encoding: {args.encoding}")
     print(f"Topic: {args.topic}")
     print(f"Payload: {args.payload}")
     print(f"QoS: {args.qos}")
+    if args.protocol == "5" or args.trace or args.topic_alias:
+        print("Protocol: MQTT 5" + (", topic aliases" if args.topic_alias else "")
+              + (", minimal properties" if args.minimal_properties else ""))
+    if args.sensors > 1 or args.topic_per_sensor or args.retain:
+        print(f"Sensors: {args.sensors}" + (f", topics {args.topic}/<sensor id>" if args.topic_per_sensor else "")
+              + (", retained" if args.retain else ""))
+    if args.encoding == "protobuf":
+        print(f"Protobuf backend: {load_codec('protobuf').protobuf_backend()}")
+    if spool is not None:
+        print(f"Spool: {args.spool} ({spool.capacity // (1024 * 1024)} MB, {len(spool)} messages pending)")
+    if soak_duration is not None:
+        print(f"Soak: {soak_duration:g}s at {args.rate:g} msg/s, sampled every {args.soak_interval:g}s"
+              + (f" to {args.soak_output}" if args.soak_output else ""))
     print()
 
-    publisher = SensorDataPublisher(args.broker, args.port, args.encoding, args.qos)
+    registry = metrics_server = None
+    if args.metrics_port is not None:
+        from metrics import MetricsRegistry, MetricsServer
+        registry = MetricsRegistry(role="publisher", encoding=args.encoding, qos=args.qos)
+        metrics_server = MetricsServer(registry, args.metrics_host, args.metrics_port)
+        try:
+            metrics_server.start()
+        except OSError as e:
+            parser.error(f"--metrics-port: {e}")
+        print(f"✓ Metrics at {metrics_server.url}")
+
+    publisher = SensorDataPublisher(args.broker, args.port, args.encoding, args.qos, args.trace,
+                                    spool, args.drain_rate, args.retain, PROTOCOLS.get(args.protocol),
+                                    args.topic_alias, args.minimal_properties, registry)
     publish_times = []
+    profiler = WindowProfiler(args.profile, args.profile_output) if args.profile else None
+    records = open(args.records, "w", buffering=1) if args.records else None
 
     try:
+        if args.adaptive or soak_duration is not None:
+            # Let the controller (or the soak schedule), not paho's default window of 20, bound what is in flight
+            publisher.client.max_inflight_messages_set(args.max_inflight)
         publisher.connect()
 
+        if profiler:
+            profiler.start()
+        if soak_duration is not None:
+            run_soak(publisher, args, soak_duration)
+            if profiler:
+                profiler.stop()
+            return
+        if args.adaptive:
+            start = time.perf_counter()
+            controller = run_adaptive(publisher, args, records)
+            elapsed = time.perf_counter() - start
+            if profiler:
+                profiler.stop()
+            print()
+            print(f"✓ Acked {controller.acked_total}/{args.count} messages in {elapsed:.2f}s "
+                  f"({controller.acked_total / elapsed:.0f} msg/s)")
+            saturation = controller.saturation_point()
+            target = controller.target * 1000 if controller.target is not None else 0.0
+            if saturation is None:
+                print(f"⚠ Saturation point not reached (rate grew to {controller.rate:.0f} msg/s); "
+                      f"increase --count or --initial-rate")
+            else:
+                print(f"✓ Saturation point: {saturation:.0f} msg/s (ack latency target {target:.2f}ms, "
+                      f"{len(controller.backoffs)} back-offs)")
+            return
         for i in range(args.count):
-            data = publisher.create_sensor_data(args.sensor_id, args.payload)
+            sensor_id, topic = sensor_topic(args, i)
+            data = publisher.create_sensor_data(sensor_id, args.payload)
             print(f"Publishing message {i+1}/{args.count}...")
-            publish_time = publisher.publish(args.topic, data)
+            publish_time = publisher.publish(topic, data)
             publish_times.append(publish_time)
             print(f"  Publish time: {publish_time*1000:.2f}ms")
+            if records:
+                records.write(json.dumps({"seq": i + 1, "pub_ms": round(publish_time * 1000, 4),
+                                          "bytes": publisher.last_payload_size}) + "\n")
             if i < args.count - 1:
                 time.sleep(args.interval)
+        if profiler:
+            profiler.stop()
 
         print()
         print(f"✓ Published {args.count} messages")
         if publish_times:
             avg_time = sum(publish_times) / len(publish_times)
             print(f"✓ Average publish time: {avg_time*1000:.2f}ms")
+        if publisher.packets:
+            print(f"✓ PUBLISH size: {publisher.packet_bytes / publisher.packets:.1f} bytes/message, "
+                  f"{(publisher.packet_bytes - publisher.payload_bytes) / publisher.packets:.1f} of them header"
+                  + (f" ({publisher.aliased_topics} topic aliases)" if publisher.alias_maximum else ""))
+        if spool is not None and len(spool) and not publisher.wait_for_spool(args.drain_timeout):
+            print(f"⚠ {len(spool)} messages left in the spool for the next run")
 
     except KeyboardInterrupt:
         print("\n✗ Interrupted by user")
     except Exception as e:
         print(f"\n✗ Error: {e}")
     finally:
+        if spool is not None:
+            s = publisher.spool_stats()
+            print(f"{'⚠' if s['dropped'] else '✓'} Spool: {s['spooled']} spooled, {s['drained']} drained at "
+                  f"{s['drain_rate']:.0f} msg/s, {s['dropped']} dropped, peak depth {s['peak_records']} messages "
+                  f"({s['peak_bytes']} bytes), {s['records']} pending, max RSS {s['max_rss_mb']:.1f} MB")
         publisher.disconnect()
+        if metrics_server:
+            metrics_server.stop()
+        if records:
+            records.close()
+        if profiler and profiler.running:
+            profiler.stop()
+        if profiler and profiler.snapshot is not None:
+            for path in profiler.save():
+                print(f"✓ Profile written: {path}")
 
 
 if __name__ == "__main__":
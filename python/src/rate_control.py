@@ -0,0 +1,175 @@
+#!/usr/bin/env python3
+"""
+AIMD send-rate control driven by acknowledgement latency.
+
+The publisher reports every send and every PUBACK/PUBCOMP (for QoS 0, the
+socket write) to an AIMDController. Once per control period the controller
+looks at the acks of that period:
+
+- congested (p90 ack latency above target, no acks while messages are in
+  flight, or the in-flight cap reached): multiply the rate by `decrease` and
+  record the acked throughput of the period as a saturation sample;
+- otherwise: double the rate until the first congestion (slow start), then
+  add `increase` msg/s per period.
+
+The target defaults to `latency_factor` times the lowest ack latency seen,
+so it adapts to the broker and network under test. The saturation point is
+the median acked throughput at which congestion was detected. Sends left
+unacknowledged for `expire_after` seconds (e.g. lost across a reconnect)
+are forgotten so they do not hold the in-flight count up for good.
+"""
+
+import statistics
+import threading
+from typing import List, Optional, Tuple
+
+from ack_tracker import AckTracker
+
+
+class AIMDController:
+    """Additive-increase/multiplicative-decrease send rate for a pipelined publisher."""
+
+    def __init__(self, initial_rate: float = 100.0, min_rate: float = 10.0, max_rate: float = 1e6,
+                 increase: float = 50.0, decrease: float = 0.7, target_latency: Optional[float] = None,
+                 latency_factor: float = 4.0, max_inflight: int = 100, period: float = 0.25,
+                 expire_after: float = 10.0):
+        """
+        Initialize the controller.
+
+        Args:
+            initial_rate: Starting send rate (msg/s)
+            min_rate: Lower bound on the rate (msg/s)
+            max_rate: Upper bound on the rate (msg/s)
+            increase: Additive increase per uncongested period (msg/s)
+            decrease: Multiplicative decrease factor on congestion
+            target_latency: Ack latency (seconds) above which the broker counts as
+                congested; None derives it from the lowest latency seen
+            latency_factor: Multiple of the lowest latency used as the derived target
+            max_inflight: Unacknowledged messages at which sending pauses
+            period: Control period in seconds
+            expire_after: Seconds after which an unacknowledged send is forgotten
+        """
+        self.rate = initial_rate
+        self.min_rate = min_rate
+        self.max_rate = max_rate
+        self.increase = increase
+        self.decrease = decrease
+        self.target_latency = target_latency
+        self.latency_factor = latency_factor
+        self.max_inflight = max_inflight
+        self.period = period
+        self.expire_after = expire_after
+        self.baseline: Optional[float] = None
+        self.slow_start = True
+        self.acked_total = 0
+        self.last_ack: Optional[float] = None
+        self.backoffs: List[float] = []
+        self.history: List[Tuple[float, float, float, float, int]] = []
+        self._acks = AckTracker()
+        self._window: List[float] = []
+        self._window_start: Optional[float] = None
+        self._lock = threading.Lock()
+
+    @property
+    def inflight(self) -> int:
+        """Messages sent but not yet acknowledged."""
+        return self._acks.inflight
+
+    @property
+    def expired(self) -> int:
+        """Sends forgotten after going unacknowledged for expire_after seconds."""
+        return self._acks.expired
+
+    @property
+    def target(self) -> Optional[float]:
+        """Current congestion threshold for the p90 ack latency (seconds)."""
+        if self.target_latency is not None:
+            return self.target_latency
+        if self.baseline is None:
+            return None
+        # Floor of 1ms so sub-millisecond jitter on loopback is not read as congestion
+        return max(self.baseline * self.latency_factor, 0.001)
+
+    def sent(self, mid: int, now: float):
+        """Record a send (now = perf_counter() taken before publish())."""
+        latency = self._acks.sent(mid, now)
+        with self._lock:
+            if self._window_start is None:
+                self._window_start = now
+            if latency is not None:
+                self._record(latency, now + latency)
+
+    def acked(self, mid: int, now: float) -> Optional[float]:
+        """
+        Record an acknowledgement.
+
+        Args:
+            mid: Message id
+            now: perf_counter() at the ack
+
+        Returns:
+            Ack latency in seconds, or None if the send has not been recorded yet
+        """
+        latency = self._acks.acked(mid, now)
+        if latency is not None:
+            with self._lock:
+                self._record(latency, now)
+        return latency
+
+    def expire(self, now: float) -> int:
+        """
+        Forget sends unacknowledged for longer than expire_after.
+
+        Args:
+            now: perf_counter()
+
+        Returns:
+            Sends expired by this call
+        """
+        return self._acks.expire(now - self.expire_after)
+
+    def _record(self, latency: float, acked_at: float):
+        # Called with the lock held
+        self._window.append(latency)
+        self.acked_total += 1
+        self.last_ack = acked_at
+        if self.baseline is None or latency < self.baseline:
+            self.baseline = latency
+
+    def update(self, now: float) -> Optional[str]:
+        """
+        Adjust the rate once per control period.
+
+        Args:
+            now: perf_counter()
+
+        Returns:
+            'decrease' or 'increase' if the rate changed, None within a period
+        """
+        with self._lock:
+            if self._window_start is None or now - self._window_start < self.period:
+                return None
+            window, self._window = self._window, []
+            elapsed = now - self._window_start
+            self._window_start = now
+        self.expire(now)
+        inflight = self._acks.inflight
+        goodput = len(window) / elapsed
+        p90 = statistics.quantiles(window, n=10)[-1] if len(window) >= 2 else (window[0] if window else 0.0)
+        target = self.target
+        congested = ((not window and inflight > 0) or inflight >= self.max_inflight
+                     or (target is not None and p90 > target))
+        self.history.append((now, self.rate, goodput, p90, inflight))
+        if congested:
+            self.backoffs.append(goodput)
+            self.slow_start = False
+            self.rate = max(self.min_rate, self.rate * self.decrease)
+            return "decrease"
+        self.rate = min(self.max_rate, self.rate * 2 if self.slow_start else self.rate + self.increase)
+        return "increase"
+
+    def saturation_point(self) -> Optional[float]:
+        """Median acked throughput (msg/s) at congestion, or None if the rate never saturated."""
+        # The slow-start overshoot is not a steady-state sample when later ones exist
+        samples = self.backoffs[1:] or self.backoffs
+        return statistics.median(samples) if samples else None
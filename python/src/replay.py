@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+"""
+Replay a captured message log through SensorDataPublisher.
+
+Reads records written by `subscriber.py --log DIR` and republishes the raw
+payloads, either with their original spacing (optionally sped up) or as fast
+as the broker accepts them.
+"""
+
+import argparse
+import os
+import time
+from pathlib import Path
+
+from message_log import MessageLogReader, Segment
+from publisher import SensorDataPublisher
+
+
+def open_log(path: str):
+    """Reader for a log directory, or for a single segment-*.log file."""
+    if Path(path).is_dir():
+        return MessageLogReader(path)
+    log = Path(path)
+    if not log.exists():
+        raise FileNotFoundError(f"no such log: {path}")
+    return Segment(log, log.with_suffix(".idx"))
+
+
+def main():
+    """Main entry point."""
+    parser = argparse.ArgumentParser(description="Replay a captured MQTT message log")
+    parser.add_argument("log", help="Log directory or a single segment-*.log file")
+    parser.add_argument("--broker", default=os.getenv("MQTT_BROKER", "localhost"), help="MQTT broker hostname")
+    parser.add_argument("--port", type=int, default=int(os.getenv("MQTT_PORT", "1883")), help="MQTT broker port")
+    parser.add_argument("--qos", type=int, choices=[0, 1, 2], default=1, help="QoS level")
+    parser.add_argument("--topic", default=None, help="Publish everything to this topic instead of the original ones")
+    parser.add_argument("--start", type=float, default=None, help="Earliest receive time to replay (Unix seconds)")
+    parser.add_argument("--end", type=float, default=None, help="Latest receive time to replay (Unix seconds)")
+    parser.add_argument("--sensor-id", default=None, help="Only replay messages from this sensor")
+    parser.add_argument("--speed", type=float, default=1.0,
+                        help="Pacing relative to the original receive times (2 = twice as fast, 0 = no pacing)")
+
+    args = parser.parse_args()
+    if args.speed < 0:
+        parser.error("--speed must be >= 0")
+    try:
+        log = open_log(args.log)
+    except (OSError, ValueError) as e:
+        parser.error(str(e))
+
+    print("=== MQTT Log Replay (Python) ===")
+    print(f"Log: {args.log}")
+    print(f"Speed: {'unpaced' if args.speed == 0 else f'{args.speed:g}x'}")
+    print(f"QoS: {args.qos}")
+    print()
+
+    # Payloads are already encoded, so the publisher's own codec is never used
+    publisher = SensorDataPublisher(args.broker, args.port, "json", args.qos)
+    published = 0
+    payload_bytes = 0
+    first = None
+    try:
+        publisher.connect()
+        for record in log.scan(args.start, args.end, args.sensor_id):
+            if first is None:
+                first = record.received_at
+                started = time.perf_counter()
+            elif args.speed:
+                delay = started + (record.received_at - first) / args.speed - time.perf_counter()
+                if delay > 0:
+                    time.sleep(delay)
+            # Copy out of the mapped segment; paho may keep the payload for retransmission
+            publisher.publish_encoded(args.topic or record.topic, bytes(record.payload))
+            published += 1
+            payload_bytes += len(record.payload)
+    except KeyboardInterrupt:
+        print("\n⚠ Interrupted")
+    except Exception as e:
+        print(f"\n✗ Error: {e}")
+    finally:
+        publisher.disconnect()
+        log.close()
+
+    if published:
+        elapsed = time.perf_counter() - started
+        rate = published / elapsed if elapsed > 0 else 0.0
+        print(f"\n✓ Replayed {published} messages ({payload_bytes} bytes) in {elapsed:.2f}s ({rate:.0f} msg/s)")
+    else:
+        print("\n⚠ No messages matched")
+
+
+if __name__ == "__main__":
+    main()
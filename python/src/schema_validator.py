@@ -0,0 +1,221 @@
+#!/usr/bin/env python3
+"""
+Compiled JSON Schema validation for decoded messages.
+
+The schema is translated once into the source of a Python function that
+checks each field inline (straight-line lookups and type tests, no walk over
+the schema per message) and compiled with exec(). Only the draft-07 subset
+used by schemas/ is supported; any other validation keyword is rejected at
+compile time rather than silently ignored.
+"""
+
+import json
+from collections.abc import Mapping
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+# JSON Schema type -> Python types; bool is excluded from number/integer explicitly
+TYPES = {
+    "object": (Mapping,),
+    "string": (str,),
+    "number": (int, float),
+    "integer": (int,),
+    "boolean": (bool,),
+    "array": (list, tuple),
+    "null": (type(None),),
+}
+ANNOTATIONS = {"$schema", "$id", "title", "description", "examples", "default", "$comment"}
+KEYWORDS = {"type", "properties", "required", "additionalProperties", "enum",
+            "minimum", "maximum", "minLength", "maxLength"}
+
+Validator = Callable[[Any], Optional[str]]
+
+
+def default_schema_path() -> Optional[Path]:
+    """schemas/sensor_data.json in the repository or the container image layout."""
+    here = Path(__file__).resolve().parent
+    for root in (here.parent.parent, here.parent):
+        path = root / "schemas" / "sensor_data.json"
+        if path.exists():
+            return path
+    return None
+
+
+class _Compiler:
+    """Emits the body of a validate(value) function for one schema."""
+
+    def __init__(self):
+        self.lines: List[str] = []
+        self.constants: Dict[str, Any] = {}
+        self._names = 0
+
+    def name(self, prefix: str) -> str:
+        self._names += 1
+        return f"{prefix}{self._names}"
+
+    def constant(self, value: Any) -> str:
+        name = self.name("_c")
+        self.constants[name] = value
+        return name
+
+    def emit(self, indent: int, line: str):
+        self.lines.append("    " * indent + line)
+
+    def type_check(self, var: str, types: List[str]) -> str:
+        """Expression that is true when var does NOT have one of the JSON types."""
+        python_types = tuple(t for name in types for t in TYPES[name])
+        test = f"not isinstance({var}, {self.constant(python_types)})"
+        if ("number" in types or "integer" in types) and "boolean" not in types:
+            test = f"({test} or {var}.__class__ is bool)"
+        return test
+
+    def node(self, schema: Dict[str, Any], var: str, path: str, indent: int):
+        unknown = set(schema) - KEYWORDS - ANNOTATIONS
+        if unknown:
+            raise ValueError(f"{path or '<root>'}: unsupported schema keyword(s) {sorted(unknown)}")
+        where = path or "message"
+
+        if "type" in schema:
+            types = schema["type"] if isinstance(schema["type"], list) else [schema["type"]]
+            for name in types:
+                if name not in TYPES:
+                    raise ValueError(f"{where}: unsupported type {name!r}")
+            self.emit(indent, f"if {self.type_check(var, types)}:")
+            self.emit(indent + 1, f"return {where!r} + ' must be {'/'.join(types)}, got ' + type({var}).__name__")
+
+        if "enum" in schema:
+            allowed = self.constant(list(schema["enum"]))
+            self.emit(indent, f"if {var} not in {allowed}:")
+            self.emit(indent + 1, f"return {where!r} + ' is not one of ' + repr({allowed})")
+
+        # Range keywords only apply to numbers and length keywords to strings; the
+        # guard is left out when the type check above already ensures it
+        declared = schema.get("type")
+        declared = set(declared if isinstance(declared, list) else [declared] if declared else [])
+        number_guard = "" if declared and declared <= {"number", "integer"} else \
+            f"isinstance({var}, (int, float)) and {var}.__class__ is not bool and "
+        string_guard = "" if declared == {"string"} else f"isinstance({var}, str) and "
+        for keyword, op in (("minimum", "<"), ("maximum", ">")):
+            if keyword in schema:
+                self.emit(indent, f"if {number_guard}{var} {op} {schema[keyword]!r}:")
+                self.emit(indent + 1, f"return {where!r} + ' is out of range (' + repr({var}) + ')'")
+        for keyword, op in (("minLength", "<"), ("maxLength", ">")):
+            if keyword in schema:
+                self.emit(indent, f"if {string_guard}len({var}) {op} {schema[keyword]!r}:")
+                self.emit(indent + 1, f"return {where!r} + ' has invalid length ' + str(len({var}))")
+
+        properties = schema.get("properties", {})
+        required = schema.get("required", [])
+        if not (properties or required or schema.get("additionalProperties", True) is not True):
+            return
+        if schema.get("type") != "object":
+            # Object keywords only apply to objects
+            self.emit(indent, f"if isinstance({var}, Mapping):")
+            indent += 1
+        for field in required:
+            value = self.name("_v")
+            field_path = f"{path}.{field}" if path else field
+            self.emit(indent, f"{value} = {var}.get({field!r}, _MISSING)")
+            self.emit(indent, f"if {value} is _MISSING:")
+            self.emit(indent + 1, f"return {'missing required field ' + field_path!r}")
+            if field in properties:
+                self.node(properties[field], value, field_path, indent)
+        for field, subschema in properties.items():
+            if field in required:
+                continue
+            value = self.name("_v")
+            self.emit(indent, f"{value} = {var}.get({field!r}, _MISSING)")
+            self.emit(indent, f"if {value} is not _MISSING:")
+            self.emit(indent + 1, "pass")  # keeps the block valid if the subschema emits no checks
+            self.node(subschema, value, f"{path}.{field}" if path else field, indent + 1)
+        additional = schema.get("additionalProperties", True)
+        if additional is False:
+            known = self.constant(frozenset(properties))
+            self.emit(indent, f"for _key in {var}:")
+            self.emit(indent + 1, f"if _key not in {known}:")
+            self.emit(indent + 2, "return 'unexpected field ' + repr(_key)")
+        elif additional is not True:
+            raise ValueError(f"{where}: only boolean additionalProperties is supported")
+
+
+def compile_validator(schema: Dict[str, Any]) -> Validator:
+    """
+    Compile a schema into a check function.
+
+    Args:
+        schema: JSON Schema (draft-07 subset: type, properties, required,
+            additionalProperties, enum, minimum/maximum, minLength/maxLength)
+
+    Returns:
+        validate(value) returning None when valid, else a short error message
+
+    Raises:
+        ValueError: If the schema uses an unsupported keyword
+    """
+    compiler = _Compiler()
+    compiler.node(schema, "value", "", 1)
+    source = "\n".join(["def validate(value):"] + compiler.lines + ["    return None"])
+    namespace = {"Mapping": Mapping, "_MISSING": object(), **compiler.constants}
+    exec(compile(source, f"<schema {schema.get('title', 'validator')}>", "exec"), namespace)
+    validate = namespace["validate"]
+    validate.source = source
+    return validate
+
+
+def load_validator(path: Optional[str] = None) -> Validator:
+    """
+    Compile the validator for a schema file.
+
+    Args:
+        path: Schema file (default: schemas/sensor_data.json)
+
+    Returns:
+        Compiled check function (see compile_validator())
+    """
+    schema_path = Path(path) if path else default_schema_path()
+    if schema_path is None:
+        raise FileNotFoundError("schemas/sensor_data.json not found; pass the schema path explicitly")
+    with open(schema_path) as f:
+        return compile_validator(json.load(f))
+
+
+class SampledValidator:
+    """Validates every Nth message and counts the outcomes."""
+
+    def __init__(self, validate: Validator, rate: float = 1.0):
+        """
+        Initialize the sampler.
+
+        Args:
+            validate: Compiled check function
+            rate: Fraction of messages to validate (0 < rate <= 1); sampling is
+                deterministic, every round(1 / rate)-th message
+        """
+        if not 0 < rate <= 1:
+            raise ValueError(f"validation sample rate must be in (0, 1], got {rate}")
+        self.validate = validate
+        self.rate = rate
+        self.stride = max(1, round(1 / rate))
+        self.seen = 0
+        self.checked = 0
+        self.invalid = 0
+
+    def check(self, value: Any) -> Optional[str]:
+        """
+        Validate value if it falls in the sample.
+
+        Returns:
+            The validation error, or None if valid or not sampled
+        """
+        self.seen += 1
+        if self.seen % self.stride:
+            return None
+        self.checked += 1
+        error = self.validate(value)
+        if error is not None:
+            self.invalid += 1
+        return error
+
+    def summary(self) -> str:
+        """One-line summary of the counters."""
+        return f"Validated {self.checked}/{self.seen} messages (rate {self.rate:g}), {self.invalid} invalid"
@@ -0,0 +1,19 @@
+from google.protobuf import descriptor as _descriptor
+from google.protobuf import message as _message
+from typing import ClassVar as _ClassVar, Optional as _Optional
+
+DESCRIPTOR: _descriptor.FileDescriptor
+
+class SensorData(_message.Message):
+    __slots__ = ["humidity", "pressure", "sensor_id", "temperature", "timestamp"]
+    HUMIDITY_FIELD_NUMBER: _ClassVar[int]
+    PRESSURE_FIELD_NUMBER: _ClassVar[int]
+    SENSOR_ID_FIELD_NUMBER: _ClassVar[int]
+    TEMPERATURE_FIELD_NUMBER: _ClassVar[int]
+    TIMESTAMP_FIELD_NUMBER: _ClassVar[int]
+    humidity: float
+    pressure: float
+    sensor_id: str
+    temperature: float
+    timestamp: float
+    def __init__(self, timestamp: _Optional[float] = ..., sensor_id: _Optional[str] = ..., temperature: _Optional[float] = ..., humidity: _Optional[float] = ..., pressure: _Optional[float] = ...) -> None: ...
@@ -0,0 +1,276 @@
+#!/usr/bin/env python3
+"""
+Soak-test sampling and drift detection for long-running clients.
+
+A SoakMonitor samples the process every interval from a background thread:
+messages completed and throughput, latency percentiles of that interval,
+RSS, live GC-tracked objects and collections per generation, plus any
+gauges the client supplies (e.g. in-flight messages, queue depth). Each
+sample is kept and, optionally, appended to a JSON-lines time series as it
+is taken, so a run can be watched with `tail -f`.
+
+analyze() judges a finished series after a warm-up:
+
+- growth: a quantity whose quarter medians rise strictly from quarter to
+  quarter and whose least-squares slope exceeds a threshold (memory, GC
+  objects, queue depth) is flagged as monotonic growth;
+- drift: throughput or latency whose last-quarter median differs from the
+  first-quarter median by more than a fraction is flagged as drift.
+
+Latency samples are held for one interval only, and publishes left
+unacknowledged for several intervals (e.g. lost across a reconnect) are
+counted as expired and forgotten, so the monitor's own memory use does not
+grow with the length of the run.
+"""
+
+import argparse
+import gc
+import json
+import re
+import statistics
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+from ack_tracker import AckTracker
+
+DURATION_UNITS = {"": 1, "s": 1, "m": 60, "h": 3600, "d": 86400}
+LATENCY_KEYS = ["p50_ms", "p90_ms", "p99_ms", "max_ms"]
+
+GROWTH_CHECKS = {
+    # key: (label, unit, minimum slope per hour that counts as growth; rss_mb uses memory_growth)
+    "rss_mb": ("memory", "MB", None),
+    "gc_objects": ("GC-tracked objects", "objects", 1000.0),
+    "queue_depth": ("queue depth", "messages", 10.0),
+    "inflight": ("in-flight messages", "messages", 10.0),
+}
+DRIFT_CHECKS = {
+    # key: (label, unit, True when a rise is bad)
+    "rate": ("throughput", "msg/s", False),
+    "p50_ms": ("p50 latency", "ms", True),
+    "p99_ms": ("p99 latency", "ms", True),
+}
+
+
+def parse_duration(value: str) -> float:
+    """
+    Parse a duration such as '90', '45s', '30m', '6h' or '1.5h'.
+
+    Returns:
+        Seconds
+    """
+    match = re.fullmatch(r"(\d+(?:\.\d+)?)\s*([smhd]?)", value.strip().lower())
+    if not match:
+        raise argparse.ArgumentTypeError(f"invalid duration {value!r}: expected e.g. 90, 45s, 30m, 6h")
+    return float(match.group(1)) * DURATION_UNITS[match.group(2)]
+
+
+def current_rss_kb(pid: Optional[int] = None) -> Optional[int]:
+    """
+    Current resident set size (VmRSS) of a process in KB, from /proc.
+
+    Args:
+        pid: Process ID (default: this process)
+
+    Returns:
+        RSS in KB, or None if it cannot be read (not Linux, or the process is gone)
+    """
+    try:
+        with open(f"/proc/{pid or 'self'}/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1])
+    except (OSError, ValueError, IndexError):
+        return None
+    return None
+
+
+def latency_percentiles(latencies: List[float]) -> Dict[str, Optional[float]]:
+    """p50/p90/p99/max in milliseconds of latencies in seconds (None when empty)."""
+    if not latencies:
+        return {key: None for key in LATENCY_KEYS}
+    ordered = sorted(latencies)
+    last = len(ordered) - 1
+    values = [ordered[int(q * last)] for q in (0.5, 0.9, 0.99)] + [ordered[-1]]
+    return {key: round(value * 1000, 4) for key, value in zip(LATENCY_KEYS, values)}
+
+
+class SoakMonitor:
+    """Samples throughput, latency, memory and GC state of this process at a fixed interval."""
+
+    def __init__(self, interval: float = 10.0, output: Optional[str] = None,
+                 gauges: Optional[Dict[str, Callable[[], float]]] = None, expire_intervals: float = 5.0):
+        """
+        Initialize the monitor (call start() to begin sampling).
+
+        Args:
+            interval: Seconds between samples
+            output: If set, write each sample to this file as a JSON line when it is taken
+            gauges: Extra values to sample, by name (e.g. {'queue_depth': fn})
+            expire_intervals: Publishes unacknowledged for this many intervals are counted
+                as expired and forgotten (e.g. lost across a reconnect)
+        """
+        self.interval = interval
+        self.expire_after = interval * expire_intervals
+        self.gauges = gauges or {}
+        self.samples: List[Dict[str, Any]] = []
+        self._output = open(output, "w", buffering=1) if output else None
+        self._lock = threading.Lock()
+        self._latencies: List[float] = []
+        self._completed = 0
+        self._acks = AckTracker()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._start = 0.0
+        self._last = (0.0, 0)
+
+    def record(self, latency: float):
+        """Count one completed message with its latency in seconds (callable from any thread)."""
+        with self._lock:
+            self._latencies.append(latency)
+            self._completed += 1
+
+    def sent(self, mid: int, now: float):
+        """Record a publish (now = perf_counter() taken before publish())."""
+        latency = self._acks.sent(mid, now)
+        if latency is not None:
+            self.record(latency)
+
+    def acked(self, mid: int, now: float):
+        """Record the acknowledgement of a publish; its latency counts once sent() has run."""
+        latency = self._acks.acked(mid, now)
+        if latency is not None:
+            self.record(latency)
+
+    @property
+    def inflight(self) -> int:
+        """Publishes sent and not yet acknowledged."""
+        return self._acks.inflight
+
+    @property
+    def expired(self) -> int:
+        """Publishes forgotten after going unacknowledged for expire_after seconds."""
+        return self._acks.expired
+
+    def start(self):
+        """Start sampling in a background thread."""
+        self._start = time.perf_counter()
+        self._last = (self._start, 0)
+        self._thread = threading.Thread(target=self._run, name="soak-monitor", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """Stop sampling; a partial last interval is discarded."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+        if self._output:
+            self._output.close()
+
+    def _run(self):
+        next_sample = self._start + self.interval
+        while not self._stop.wait(max(0.0, next_sample - time.perf_counter())):
+            self.samples.append(self._sample())
+            if self._output:
+                self._output.write(json.dumps(self.samples[-1]) + "\n")
+            next_sample += self.interval
+
+    def _sample(self) -> Dict[str, Any]:
+        now = time.perf_counter()
+        with self._lock:
+            latencies, self._latencies = self._latencies, []
+            completed = self._completed
+        expired = self._acks.expire(now - self.expire_after)
+        last_time, last_completed = self._last
+        self._last = (now, completed)
+        sample: Dict[str, Any] = {
+            "t": round(now - self._start, 3),
+            "messages": completed - last_completed,
+            "rate": round((completed - last_completed) / (now - last_time), 2),
+            **latency_percentiles(latencies),
+            "expired": expired,
+            "rss_mb": round((current_rss_kb() or 0) / 1024, 2),
+            "gc_objects": len(gc.get_objects()),
+            "gc_garbage": len(gc.garbage),
+        }
+        for generation, stats in enumerate(gc.get_stats()):
+            sample[f"gc{generation}_collections"] = stats["collections"]
+        for name, read in self.gauges.items():
+            sample[name] = read()
+        return sample
+
+
+def load_series(path: str) -> List[Dict[str, Any]]:
+    """Read a JSON-lines time series written by SoakMonitor."""
+    with open(path) as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def _quarters(values: List[float]) -> List[float]:
+    size = len(values) / 4
+    return [statistics.median(values[int(i * size):int((i + 1) * size)]) for i in range(4)]
+
+
+def _slope_per_hour(times: List[float], values: List[float]) -> float:
+    mean_t = statistics.fmean(times)
+    mean_v = statistics.fmean(values)
+    spread = sum((t - mean_t) ** 2 for t in times)
+    return sum((t - mean_t) * (v - mean_v) for t, v in zip(times, values)) / spread * 3600 if spread else 0.0
+
+
+def analyze(samples: List[Dict[str, Any]], drift: float = 0.25, warmup: float = 0.1,
+            memory_growth: float = 1.0) -> List[Dict[str, Any]]:
+    """
+    Flag monotonic growth and drift in a soak time series.
+
+    Args:
+        samples: SoakMonitor samples, oldest first
+        drift: Relative change between first- and last-quarter medians that counts as drift
+        warmup: Fraction of the samples (at least one) ignored at the start
+        memory_growth: RSS slope in MB per hour above which steady growth is flagged
+
+    Returns:
+        Findings as dicts with 'check', 'flagged' and 'detail', in GROWTH_CHECKS
+        then DRIFT_CHECKS order; a single unflagged finding if the series is too short
+    """
+    samples = samples[max(1, int(len(samples) * warmup)):]
+    if len(samples) < 8:
+        return [{"check": "length", "flagged": False,
+                 "detail": f"only {len(samples)} samples after warm-up; need 8 to judge drift"}]
+    findings = []
+    times = [s["t"] for s in samples]
+    for key, (label, unit, threshold) in GROWTH_CHECKS.items():
+        if samples[0].get(key) is None:
+            continue
+        values = [s[key] for s in samples]
+        quarters = _quarters(values)
+        slope = _slope_per_hour(times, values)
+        monotonic = all(b > a for a, b in zip(quarters, quarters[1:]))
+        flagged = monotonic and slope > (memory_growth if threshold is None else threshold)
+        findings.append({"check": f"{label} growth", "flagged": flagged, "slope_per_hour": slope,
+                         "detail": f"{label} {values[0]:g} → {values[-1]:g} {unit}, {slope:+.1f} {unit}/h"
+                                   + (", rising every quarter" if monotonic else "")})
+    expired = sum(s.get("expired", 0) for s in samples)
+    if expired:
+        findings.append({"check": "expired publishes", "flagged": True,
+                         "detail": f"{expired} publishes never acknowledged (expired)"})
+    garbage = samples[-1].get("gc_garbage")
+    if garbage:
+        findings.append({"check": "uncollectable objects", "flagged": True,
+                         "detail": f"{garbage} objects in gc.garbage"})
+    for key, (label, unit, rise_is_bad) in DRIFT_CHECKS.items():
+        values = [s[key] for s in samples if s.get(key) is not None]
+        if len(values) < 8:
+            continue
+        first, _, _, last = _quarters(values)
+        change = (last - first) / first if first else 0.0
+        flagged = change > drift if rise_is_bad else change < -drift
+        findings.append({"check": f"{label} drift", "flagged": flagged, "change": change,
+                         "detail": f"{label} {first:.4g} → {last:.4g} {unit} ({change:+.1%}) first to last quarter"})
+    return findings
+
+
+def print_findings(findings: List[Dict[str, Any]], title: str = "Soak"):
+    """Print one ✓/⚠ line per finding."""
+    for finding in findings:
+        print(f"{'⚠' if finding['flagged'] else '✓'} {title}: {finding['detail']}")
@@ -0,0 +1,166 @@
+#!/usr/bin/env python3
+"""
+Bounded disk-backed spool for encoded messages.
+
+The spool is a single memory-mapped ring file:
+
+    header (64 bytes)
+        8s  magic
+        Q   capacity of the ring in bytes
+        Q   head: absolute position of the oldest record
+        Q   tail: absolute position just past the newest record
+        Q   records in the ring
+        Q   records dropped because the ring was full
+    ring (capacity bytes)
+        records of <HI (topic length, payload length) + topic + payload,
+        wrapping around the end of the ring
+
+Positions only grow; a position's place in the ring is position % capacity.
+The header is updated after a record's bytes are written, so a crash never
+exposes a partial record, and an existing spool file is resumed on open.
+When a new record does not fit, the oldest records are dropped.
+"""
+
+import mmap
+import os
+import struct
+from typing import Dict, Optional, Tuple
+
+MAGIC = b"MQSPOOL1"
+HEADER = struct.Struct("<8sQQQQQ")
+HEADER_SIZE = 64
+RECORD = struct.Struct("<HI")
+DEFAULT_CAPACITY = 64 * 1024 * 1024
+
+
+class DiskSpool:
+    """FIFO of (topic, payload) records in a memory-mapped ring file. Not thread-safe."""
+
+    def __init__(self, path: str, capacity: int = DEFAULT_CAPACITY):
+        """
+        Open or create a spool file.
+
+        Args:
+            path: Spool file; an existing spool is resumed with its own capacity
+            capacity: Ring size in bytes for a new spool
+
+        Raises:
+            ValueError: If the file exists but is not a spool
+        """
+        self.path = path
+        existing = os.path.exists(path) and os.path.getsize(path) > 0
+        self._file = open(path, "r+b" if existing else "w+b")
+        if not existing:
+            self._file.truncate(HEADER_SIZE + capacity)
+        self._map = mmap.mmap(self._file.fileno(), 0)
+        if existing:
+            if len(self._map) < HEADER_SIZE:
+                self.close()
+                raise ValueError(f"{path} is not a spool file")
+            magic, self.capacity, self.head, self.tail, self.records, self.dropped = HEADER.unpack_from(self._map, 0)
+            if magic != MAGIC or len(self._map) != HEADER_SIZE + self.capacity:
+                self.close()
+                raise ValueError(f"{path} is not a spool file")
+        else:
+            self.capacity = capacity
+            self.head = self.tail = self.records = self.dropped = 0
+            self._write_header()
+        self.peak_records = self.records
+        self.peak_bytes = self.used
+
+    @property
+    def used(self) -> int:
+        """Bytes of the ring holding records."""
+        return self.tail - self.head
+
+    def __len__(self) -> int:
+        return self.records
+
+    def _write_header(self):
+        HEADER.pack_into(self._map, 0, MAGIC, self.capacity, self.head, self.tail, self.records, self.dropped)
+
+    def _write(self, position: int, data: bytes):
+        offset = position % self.capacity
+        first = min(len(data), self.capacity - offset)
+        self._map[HEADER_SIZE + offset:HEADER_SIZE + offset + first] = data[:first]
+        if first < len(data):
+            self._map[HEADER_SIZE:HEADER_SIZE + len(data) - first] = data[first:]
+
+    def _read(self, position: int, size: int) -> bytes:
+        offset = position % self.capacity
+        first = min(size, self.capacity - offset)
+        data = self._map[HEADER_SIZE + offset:HEADER_SIZE + offset + first]
+        if first < size:
+            data += self._map[HEADER_SIZE:HEADER_SIZE + size - first]
+        return data
+
+    def _record_size(self, position: int) -> Tuple[int, int, int]:
+        topic_len, payload_len = RECORD.unpack(self._read(position, RECORD.size))
+        return topic_len, payload_len, RECORD.size + topic_len + payload_len
+
+    def push(self, topic: str, payload: bytes):
+        """
+        Append a record, dropping the oldest ones if the ring is full.
+
+        Args:
+            topic: MQTT topic
+            payload: Encoded message
+
+        Raises:
+            ValueError: If the record is larger than the whole ring
+        """
+        topic_bytes = topic.encode("utf-8")
+        size = RECORD.size + len(topic_bytes) + len(payload)
+        if size > self.capacity:
+            raise ValueError(f"record of {size} bytes exceeds spool capacity of {self.capacity} bytes")
+        while self.used + size > self.capacity:
+            self.head += self._record_size(self.head)[2]
+            self.records -= 1
+            self.dropped += 1
+        self._write(self.tail, RECORD.pack(len(topic_bytes), len(payload)) + topic_bytes + payload)
+        self.tail += size
+        self.records += 1
+        self._write_header()
+        self.peak_records = max(self.peak_records, self.records)
+        self.peak_bytes = max(self.peak_bytes, self.used)
+
+    def peek(self) -> Optional[Tuple[str, bytes]]:
+        """Oldest record as (topic, payload), or None if the spool is empty."""
+        if not self.records:
+            return None
+        topic_len, payload_len, _ = self._record_size(self.head)
+        body = self._read(self.head + RECORD.size, topic_len + payload_len)
+        return body[:topic_len].decode("utf-8"), body[topic_len:]
+
+    def pop(self, head: Optional[int] = None) -> bool:
+        """
+        Remove the oldest record (after it has been delivered).
+
+        Args:
+            head: The head position read with peek(); if the record there has
+                since been dropped by push(), nothing is removed
+
+        Returns:
+            True if a record was removed
+        """
+        if not self.records or (head is not None and head != self.head):
+            return False
+        self.head += self._record_size(self.head)[2]
+        self.records -= 1
+        if not self.records:
+            # Restart at the beginning of the ring so small backlogs stay contiguous
+            self.head = self.tail = 0
+        self._write_header()
+        return True
+
+    def stats(self) -> Dict[str, int]:
+        """Depth and drop counters."""
+        return {"records": self.records, "bytes": self.used, "capacity": self.capacity,
+                "dropped": self.dropped, "peak_records": self.peak_records, "peak_bytes": self.peak_bytes}
+
+    def close(self):
+        """Flush the map and close the file; undelivered records stay for the next open."""
+        if not self._map.closed:
+            self._map.flush()
+            self._map.close()
+        self._file.close()
@@ -0,0 +1,179 @@
+#!/usr/bin/env python3
+"""
+Batched SQLite sink for decoded sensor readings.
+
+Readings are queued by the MQTT network thread and written by a dedicated
+writer thread: one prepared INSERT, executemany() per batch, one transaction
+per batch, WAL journal with synchronous=NORMAL. A batch is flushed when it
+reaches the batch size or the flush interval expires, whichever comes first.
+The queue is bounded; when the writer falls behind, add() blocks, which
+pushes back on the MQTT client instead of growing memory.
+"""
+
+import sqlite3
+import threading
+import time
+from collections.abc import Mapping
+from typing import Any, Dict, List, Optional, Tuple
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS readings (
+    received_at REAL NOT NULL,
+    timestamp   REAL,
+    sensor_id   TEXT,
+    temperature REAL,
+    humidity    REAL,
+    pressure    REAL,
+    topic       TEXT
+);
+CREATE INDEX IF NOT EXISTS readings_sensor_time ON readings (sensor_id, timestamp);
+"""
+INSERT = ("INSERT INTO readings (received_at, timestamp, sensor_id, temperature, humidity, pressure, topic) "
+          "VALUES (?, ?, ?, ?, ?, ?, ?)")
+
+Row = Tuple[float, Any, Any, Any, Any, Any, str]
+
+
+class SQLiteSink:
+    """Bounded queue plus writer thread that ingests readings into SQLite."""
+
+    def __init__(self, path: str, batch_size: int = 500, flush_interval: float = 0.25,
+                 max_pending: int = 100000):
+        """
+        Open (or create) the database and start the writer thread.
+
+        Args:
+            path: SQLite database file
+            batch_size: Rows per executemany()/transaction
+            flush_interval: Seconds after which a partial batch is written anyway
+            max_pending: Queued rows at which add() blocks until the writer catches up
+        """
+        if batch_size < 1 or max_pending < batch_size:
+            raise ValueError("batch_size must be >= 1 and max_pending >= batch_size")
+        self.path = path
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_pending = max_pending
+        self.rows = 0
+        self.batches = 0
+        self.busy = 0.0
+        self.blocked = 0.0
+        self.first_add: Optional[float] = None
+        self.last_commit: Optional[float] = None
+        self.error: Optional[BaseException] = None
+        self._pending: List[Row] = []
+        self._lock = threading.Lock()
+        self._ready = threading.Condition(self._lock)
+        self._room = threading.Condition(self._lock)
+        self._closing = False
+        # Create the schema up front so configuration errors surface in the caller
+        connection = self._connect()
+        connection.executescript(SCHEMA)
+        connection.close()
+        self._thread = threading.Thread(target=self._run, name="sqlite-sink", daemon=True)
+        self._thread.start()
+
+    @property
+    def pending(self) -> int:
+        """Rows queued and not yet handed to the writer."""
+        return len(self._pending)
+
+    def _connect(self) -> sqlite3.Connection:
+        # Autocommit mode: transactions are opened explicitly per batch
+        connection = sqlite3.connect(self.path, isolation_level=None, check_same_thread=False)
+        connection.execute("PRAGMA journal_mode=WAL")
+        connection.execute("PRAGMA synchronous=NORMAL")
+        return connection
+
+    def add(self, topic: str, received_at: float, data: Mapping):
+        """
+        Queue one decoded reading.
+
+        Args:
+            topic: Topic the message arrived on
+            received_at: Receive time (Unix seconds)
+            data: Decoded sensor data mapping
+
+        Raises:
+            RuntimeError: If the writer thread has stopped on a database error
+        """
+        if self.error is not None:
+            raise RuntimeError(f"SQLite sink stopped: {self.error}")
+        get = data.get
+        row = (received_at, get("timestamp"), get("sensor_id"), get("temperature"),
+               get("humidity"), get("pressure"), topic)
+        with self._lock:
+            if self.first_add is None:
+                self.first_add = time.perf_counter()
+            if len(self._pending) >= self.max_pending:
+                start = time.perf_counter()
+                while len(self._pending) >= self.max_pending and not self._closing:
+                    self._room.wait()
+                self.blocked += time.perf_counter() - start
+            self._pending.append(row)
+            if len(self._pending) >= self.batch_size:
+                self._ready.notify()
+
+    def _run(self):
+        """Writer loop: wait for a full batch or the flush interval, then write."""
+        connection = self._connect()
+        try:
+            while True:
+                with self._lock:
+                    if len(self._pending) < self.batch_size and not self._closing:
+                        self._ready.wait(self.flush_interval)
+                    batch = self._pending[:self.batch_size]
+                    del self._pending[:self.batch_size]
+                    self._room.notify_all()
+                    done = self._closing and not self._pending
+                if batch:
+                    start = time.perf_counter()
+                    connection.execute("BEGIN")
+                    # sqlite3 caches the prepared INSERT across calls
+                    connection.executemany(INSERT, batch)
+                    connection.execute("COMMIT")
+                    self.last_commit = time.perf_counter()
+                    self.busy += self.last_commit - start
+                    self.rows += len(batch)
+                    self.batches += 1
+                if done:
+                    return
+        except sqlite3.Error as e:
+            self.error = e
+            with self._lock:
+                self._closing = True
+                self._pending.clear()
+                self._room.notify_all()
+        finally:
+            connection.close()
+
+    def close(self, timeout: float = 30.0):
+        """Flush everything queued and stop the writer thread."""
+        with self._lock:
+            self._closing = True
+            self._ready.notify()
+        self._thread.join(timeout)
+
+    def stats(self) -> Dict[str, float]:
+        """
+        Ingest counters.
+
+        Returns:
+            rows, batches, rows_per_second (first add to last commit),
+            writer_busy (fraction of that span spent in SQLite) and
+            blocked_seconds (producer time spent waiting for queue room)
+        """
+        span = (self.last_commit - self.first_add) if self.last_commit and self.first_add else 0.0
+        return {
+            "rows": self.rows,
+            "batches": self.batches,
+            "rows_per_second": self.rows / span if span > 0 else 0.0,
+            "writer_busy": self.busy / span if span > 0 else 0.0,
+            "blocked_seconds": self.blocked,
+        }
+
+    def summary(self) -> str:
+        """One-line summary of the ingest counters."""
+        s = self.stats()
+        return (f"SQLite ingest: {s['rows']} rows in {s['batches']} batches, {s['rows_per_second']:.0f} rows/s "
+                f"(writer busy {s['writer_busy']:.0%}, producer blocked {s['blocked_seconds']:.2f}s)")
@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+"""
+Fixed-layout binary codec for SensorData.
+
+A precompiled little-endian ``struct.Struct`` header followed by the sensor
+id bytes; see schemas/sensor_data.struct.md. There are no field names, tags
+or type markers, which makes this a lower bound on serialization cost for
+the self-describing codecs.
+"""
+
+import struct
+from typing import Any, Dict
+
+STRUCT_VERSION = 1
+
+# version, timestamp, temperature, humidity, pressure, sensor_id length
+HEADER = struct.Struct("<BddddH")
+
+
+class StructCodec:
+    """Encoder/decoder for the fixed SensorData layout."""
+
+    def __init__(self):
+        """Initialize the codec with an empty layout cache."""
+        # Precompiled header+sensor_id layout per sensor_id length
+        self._layouts: Dict[int, struct.Struct] = {}
+
+    def encode(self, data: Dict[str, Any]) -> bytes:
+        """
+        Encode sensor data.
+
+        The header and sensor id are packed in one call into a fresh bytes
+        object. A reused pack_into buffer would need a copy-out anyway, since
+        the MQTT client keeps QoS 1/2 payloads for retransmission. A 'padding'
+        string, if present, is appended as opaque trailing bytes.
+
+        Args:
+            data: Sensor data dictionary
+
+        Returns:
+            Encoded message
+        """
+        sensor_id = data.get('sensor_id', '').encode('utf-8')
+        length = len(sensor_id)
+        layout = self._layouts.get(length)
+        if layout is None:
+            if length > 0xFFFF:
+                raise ValueError(f"sensor_id too long for struct encoding ({length} bytes)")
+            layout = self._layouts[length] = struct.Struct(f"{HEADER.format}{length}s")
+        encoded = layout.pack(STRUCT_VERSION, data.get('timestamp', 0.0), data.get('temperature', 0.0),
+                              data.get('humidity', 0.0), data.get('pressure', 0.0), length, sensor_id)
+        padding = data.get('padding')
+        return encoded + padding.encode('utf-8') if padding else encoded
+
+    @staticmethod
+    def decode(payload: bytes) -> Dict[str, Any]:
+        """
+        Decode a message; trailing padding is skipped.
+
+        unpack_from reads the header in place and slicing copies only the
+        sensor id, so large padded payloads are never copied.
+
+        Args:
+            payload: Encoded message
+
+        Returns:
+            Sensor data dictionary
+        """
+        try:
+            version, timestamp, temperature, humidity, pressure, id_length = HEADER.unpack_from(payload)
+        except struct.error:
+            raise ValueError(f"struct message truncated ({len(payload)} bytes)") from None
+        if version != STRUCT_VERSION:
+            raise ValueError(f"unsupported struct message version {version}")
+        sensor_id = payload[HEADER.size:HEADER.size + id_length]
+        if len(sensor_id) != id_length:
+            raise ValueError(f"struct message truncated ({len(payload)} bytes, sensor_id needs {id_length})")
+        return {
+            'timestamp': timestamp,
+            'sensor_id': sensor_id.decode('utf-8'),
+            'temperature': temperature,
+            'humidity': humidity,
+            'pressure': pressure
+        }
@@ -9,69 +9,191 @@ import json
 import argparse
 import time
 import os
-from typing import Any
+from collections import deque
+from typing import Any, Callable, Dict, Optional
 import paho.mqtt.client as mqtt
+from paho.mqtt.packettypes import PacketTypes
+from paho.mqtt.properties import Properties
+from codec_loader import load_codec
+from topic_router import TopicRouter, patterns_overlap, subscription_cover
+from profiling import PROFILE_MODES, WindowProfiler
+import tracing
 
-try:
-    import msgpack
-    MSGPACK_AVAILABLE = True
-except ImportError:
-    MSGPACK_AVAILABLE = False
-
-try:
-    import cbor2
-    CBOR_AVAILABLE = True
-except ImportError:
-    CBOR_AVAILABLE = False
-
-try:
-    import sensor_data_pb2
-    PROTOBUF_AVAILABLE = True
-except (ImportError, TypeError):
-    PROTOBUF_AVAILABLE = False
+PROTOCOLS = {"3.1.1": mqtt.MQTTv311, "5": mqtt.MQTTv5}
+# Most recent receive latencies kept for percentiles; the mean covers every message
+RECEIVE_WINDOW = 100000
 
 
 class SensorDataSubscriber:
     """Subscriber for sensor data messages."""
 
-    def __init__(self, broker: str = "localhost", port: int = 1883, encoding: str = "json", qos: int = 1):
+    def __init__(self, broker: str = "localhost", port: int = 1883, encoding: str = "json", qos: int = 1,
+                 trace_path: Optional[str] = None, echo_topic: Optional[str] = None,
+                 validator: Optional[Any] = None, sink: Optional[Any] = None, quiet: bool = False,
+                 message_log: Optional[Any] = None, client_id: str = "", session_expiry: Optional[int] = None,
+                 protocol: Optional[int] = None, metrics: Optional[Any] = None):
         """
         Initialize the subscriber.
 
         Args:
             broker: MQTT broker hostname
             port: MQTT broker port
-            encoding: Encoding format ('json' or 'msgpack')
+            encoding: Encoding format ('json', 'msgpack', 'cbor', 'protobuf', 'struct')
             qos: Quality of Service level (0, 1, or 2)
+            trace_path: If set, trace receive/decode stages to this file (uses MQTT 5)
+            echo_topic: If set, republish every message unchanged to this topic (ping-pong responder)
+            validator: If set, a schema_validator.SampledValidator applied to decoded messages
+            sink: If set, a sqlite_sink.SQLiteSink that stores every decoded reading
+            quiet: Do not print each received message
+            message_log: If set, a message_log.MessageLogWriter that captures every raw payload
+            client_id: MQTT client id (empty for a random one); a persistent session is keyed by it
+            session_expiry: If set, keep a persistent session: resume any queued messages on connect
+                (clean start off) and have the broker keep the session this many seconds after
+                disconnecting (MQTT 5 Session Expiry Interval)
+            protocol: mqtt.MQTTv311 or mqtt.MQTTv5; defaults to MQTT 5 when tracing or keeping a
+                session, else 3.1.1. Under 3.1.1 a kept session never expires on the broker side
+            metrics: If set, a metrics.MetricsRegistry to record message, byte, error and timing
+                metrics in
+
+        Raises:
+            ImportError: If the library for the selected encoding is not installed
         """
         self.broker = broker
         self.port = port
         self.encoding = encoding.lower()
+        # Only the selected codec is imported (see codec_loader)
+        self._codec = load_codec(self.encoding)
         self.qos = qos
         self.message_count = 0
-        self.receive_times = []
-        self.client = mqtt.Client(mqtt.CallbackAPIVersion.VERSION2)
+        self.decode_errors = 0
+        self.sink_errors = 0
+        self.receive_times = deque(maxlen=RECEIVE_WINDOW)
+        self.latency_total = 0.0
+        self.latency_count = 0
+        # Called as on_latency(seconds) for each message carrying a timestamp (soak mode)
+        self.on_latency: Optional[Callable[[float], None]] = None
+        self.validator = validator
+        self.sink = sink
+        self.quiet = quiet
+        self.message_log = message_log
+        self.echo_topic = echo_topic
+        self.router = TopicRouter()
+        # Subscribed filters by subscription identifier, when overlapping filters need deduplicating
+        self._filters: Optional[TopicRouter] = None
+        self.tracer = None
+        self.client_id = client_id
+        self.session_expiry = session_expiry
+        self.session_present = False
+        if trace_path:
+            self.tracer = tracing.TraceWriter(trace_path, role="sub", enc=self.encoding, qos=qos)
+        if protocol is None:
+            protocol = mqtt.MQTTv5 if trace_path or session_expiry is not None else mqtt.MQTTv311
+        self.protocol = protocol
+        self._connect_args = {}
+        if protocol == mqtt.MQTTv5:
+            self.client = mqtt.Client(mqtt.CallbackAPIVersion.VERSION2, client_id=client_id, protocol=protocol)
+            if session_expiry is not None:
+                properties = Properties(PacketTypes.CONNECT)
+                properties.SessionExpiryInterval = session_expiry
+                self._connect_args = {"clean_start": False, "properties": properties}
+        else:
+            self.client = mqtt.Client(mqtt.CallbackAPIVersion.VERSION2, client_id=client_id, protocol=protocol,
+                                      clean_session=session_expiry is None)
         self.client.on_connect = self._on_connect
         self.client.on_message = self._on_message
+        self.metrics = metrics
+        if metrics is not None:
+            self._register_metrics(metrics)
+
+    def _register_metrics(self, registry):
+        self._m_messages = registry.counter("mqtt_subscriber_messages", "Messages received")
+        self._m_bytes = registry.counter("mqtt_subscriber_payload_bytes", "Payload bytes received")
+        self._m_errors = registry.counter("mqtt_subscriber_errors", "Messages that failed to decode or validate")
+        self._m_sink_errors = registry.counter("mqtt_subscriber_sink_errors", "Decoded messages the sink failed to store")
+        self._m_decode = registry.histogram("mqtt_subscriber_decode_seconds", "Time to decode one payload")
+        self._m_latency = registry.histogram("mqtt_subscriber_latency_seconds",
+                                             "Receive time minus the publisher's timestamp")
+        if hasattr(self.sink, "pending"):
+            registry.gauge("mqtt_subscriber_queue_depth", "Readings queued in the sink and not yet stored",
+                           lambda: self.sink.pending)
 
     def _on_connect(self, client, userdata, flags, reason_code, properties):
         """Callback for when the client connects to the broker."""
         if reason_code == 0:
             print(f"✓ Connected to {self.broker}:{self.port}")
+            self.session_present = flags.session_present
+            if self.session_expiry is not None:
+                state = "Resumed" if flags.session_present else "Started"
+                print(f"✓ {state} persistent session {self.client_id or '(random id)'}")
         else:
             print(f"✗ Connection failed with code: {reason_code}")
 
+    def _duplicate(self, msg) -> bool:
+        """Whether msg is a copy the broker sent for a second overlapping subscription."""
+        ids = getattr(msg.properties, "SubscriptionIdentifier", None) if msg.properties else None
+        if not ids:
+            return False
+        # Of the filters matching the topic, only the copy for the first one is handled
+        matched = self._filters.match(msg.topic)
+        return bool(matched) and min(matched) not in ids
+
     def _on_message(self, client, userdata, msg):
         """Callback for when a message is received."""
+        if self._filters is not None and self._duplicate(msg):
+            return
+        metrics = self.metrics
+        if metrics is not None:
+            self._m_messages.inc()
+            self._m_bytes.inc(len(msg.payload))
+        if self.echo_topic:
+            # Responder mode: bounce the raw payload back before doing anything else
+            client.publish(self.echo_topic, msg.payload, qos=self.qos)
+            self.message_count += 1
+            return
+        logged = False
         try:
+            t_received = tracing.now_ns() if self.tracer else 0
             receive_time = time.time()
-            data = self.decode_message(msg.payload)
+            if metrics is not None:
+                start = time.perf_counter()
+                data = self.decode_message(msg.payload)
+                self._m_decode.observe(time.perf_counter() - start)
+            else:
+                data = self.decode_message(msg.payload)
             self.message_count += 1
+            if self.message_log:
+                self.message_log.append(msg.topic, msg.payload, receive_time, self.encoding, data.get('sensor_id'))
+                logged = True
+            if self.validator:
+                error = self.validator.check(data)
+                if error is not None:
+                    if metrics is not None:
+                        self._m_errors.inc()
+                    print(f"✗ Invalid message on {msg.topic}: {error}")
+                    return
+            if self.tracer:
+                trace = tracing.from_properties(getattr(msg, "properties", None))
+                if trace is not None:
+                    trace.update(t_received=t_received, t_decoded=tracing.now_ns())
+                    self.tracer.write(trace)
             
             # Calculate receive latency if timestamp is available
             if 'timestamp' in data:
                 latency = receive_time - data['timestamp']
                 self.receive_times.append(latency)
+                self.latency_total += latency
+                self.latency_count += 1
+                if self.on_latency is not None:
+                    self.on_latency(latency)
+                if metrics is not None:
+                    # Clock skew between hosts can make it negative
+                    self._m_latency.observe(max(latency, 0.0))
+            if self.sink is not None:
+                self._store(msg.topic, receive_time, data)
+            if self.router:
+                self._dispatch(msg.topic, data)
+            if self.quiet:
+                return
             
             print(f"\n[Message {self.message_count}] Topic: {msg.topic}")
             print(f"  Sensor ID: {data.get('sensor_id', 'N/A')}")
@@ -82,7 +204,46 @@ class SensorDataSubscriber:
             if 'timestamp' in data:
                 print(f"  Receive latency: {latency*1000:.2f}ms")
         except Exception as e:
+            self.decode_errors += 1
+            if metrics is not None:
+                self._m_errors.inc()
             print(f"✗ Error decoding message: {e}")
+            if self.message_log and not logged:
+                # Undecodable payloads are captured too, without a sensor id
+                self.message_log.append(msg.topic, msg.payload, time.time(), self.encoding)
+
+    def _store(self, topic: str, receive_time: float, data: Any):
+        # A storage failure is not a decode error, and the payload is already logged
+        try:
+            self.sink.add(topic, receive_time, data)
+        except Exception as e:
+            self.sink_errors += 1
+            if self.metrics is not None:
+                self._m_sink_errors.inc()
+            print(f"✗ Error storing message from {topic}: {e}")
+
+    def route(self, pattern: str, handler: Callable[[str, Any], None]):
+        """
+        Subscribe to a pattern and hand every decoded message on a matching topic to handler.
+
+        Patterns may use the + and # wildcards. connect() subscribes to all routed
+        patterns; messages matching several patterns go to each of their handlers.
+
+        Args:
+            pattern: Topic filter
+            handler: Called as handler(topic, data)
+
+        Raises:
+            ValueError: If the pattern is malformed
+        """
+        self.router.add(pattern, handler)
+
+    def _dispatch(self, topic: str, data: Any):
+        for handler in self.router.match(topic):
+            try:
+                handler(topic, data)
+            except Exception as e:
+                print(f"✗ Handler for {topic} failed: {e}")
 
     def decode_message(self, payload: bytes) -> Any:
         """
@@ -97,41 +258,48 @@ class SensorDataSubscriber:
         if self.encoding == "json":
             return json.loads(payload.decode('utf-8'))
         elif self.encoding == "msgpack":
-            if not MSGPACK_AVAILABLE:
-                raise ImportError("msgpack is not installed")
-            return msgpack.unpackb(payload, raw=False)
+            return self._codec.unpackb(payload, raw=False)
         elif self.encoding == "cbor":
-            if not CBOR_AVAILABLE:
-                raise ImportError("cbor2 is not installed")
-            return cbor2.loads(payload)
+            return self._codec.loads(payload)
         elif self.encoding == "protobuf":
-            if not PROTOBUF_AVAILABLE:
-                raise ImportError("protobuf is not installed")
-            # Parse protobuf message
-            pb_message = sensor_data_pb2.SensorData()
-            pb_message.ParseFromString(payload)
-            # Convert to dict
-            return {
-                'timestamp': pb_message.timestamp,
-                'sensor_id': pb_message.sensor_id,
-                'temperature': pb_message.temperature,
-                'humidity': pb_message.humidity,
-                'pressure': pb_message.pressure
-            }
+            # Mapping view over the parsed message; fields are read only when accessed
+            return self._codec.ProtobufCodec.decode(payload)
+        elif self.encoding == "struct":
+            return self._codec.StructCodec.decode(payload)
         else:
             raise ValueError(f"Unsupported encoding: {self.encoding}")
 
-    def connect(self, topic: str):
+    def connect(self, topic: Optional[str] = None):
         """
-        Connect to the MQTT broker and subscribe to topic.
+        Connect to the MQTT broker and subscribe to topic and every routed pattern.
 
         Args:
-            topic: MQTT topic to subscribe to
+            topic: MQTT topic to subscribe to, or None to subscribe only to routed patterns
         """
         print(f"Connecting to MQTT broker at {self.broker}:{self.port}...")
-        self.client.connect(self.broker, self.port, 60)
-        self.client.subscribe(topic, qos=self.qos)
-        print(f"✓ Subscribed to topic: {topic} (QoS: {self.qos})")
+        self.client.connect(self.broker, self.port, 60, **self._connect_args)
+        # Brokers deliver a message once per matching subscription, so filters covered by
+        # another one are not subscribed; _dispatch still finds every matching route
+        filters = subscription_cover(([topic] if topic else []) + self.router.patterns())
+        overlapping = [(a, b) for i, a in enumerate(filters) for b in filters[i + 1:] if patterns_overlap(a, b)]
+        if overlapping and self.protocol == mqtt.MQTTv5:
+            # One SUBSCRIBE per filter, tagged with a subscription identifier, so copies can be told apart
+            self._filters = TopicRouter()
+            for identifier, pattern in enumerate(filters, 1):
+                self._filters.add(pattern, identifier)
+                properties = Properties(PacketTypes.SUBSCRIBE)
+                properties.SubscriptionIdentifier = identifier
+                self.client.subscribe(pattern, self.qos, properties=properties)
+        else:
+            if overlapping:
+                a, b = overlapping[0]
+                print(f"⚠ {a} and {b} overlap; the broker may deliver their common topics twice "
+                      f"(--protocol 5 deduplicates)")
+            self.client.subscribe([(t, self.qos) for t in filters])
+        if topic:
+            print(f"✓ Subscribed to topic: {topic} (QoS: {self.qos})")
+        if self.router:
+            print(f"✓ Subscribed to {len(self.router)} routed patterns (QoS: {self.qos})")
         print("\nWaiting for messages (Ctrl+C to exit)...\n")
 
     def loop(self):
@@ -141,6 +309,49 @@ class SensorDataSubscriber:
     def disconnect(self):
         """Disconnect from the MQTT broker."""
         self.client.disconnect()
+        if self.tracer:
+            self.tracer.close()
+
+
+def run_soak(subscriber: SensorDataSubscriber, args, duration: float, profiler: Optional[WindowProfiler] = None):
+    """
+    Receive for a fixed duration while sampling throughput, latency, memory and GC, then report drift.
+
+    Args:
+        subscriber: Subscriber (not yet connected)
+        args: Parsed command-line arguments (topic and --soak-* options)
+        duration: Seconds to run; Ctrl+C ends the run early and still reports
+        profiler: Optional profiler, started once connected
+    """
+    from soak import SoakMonitor, analyze, print_findings
+
+    gauges = {}
+    if hasattr(subscriber.sink, "pending"):
+        gauges["queue_depth"] = lambda: subscriber.sink.pending
+    monitor = SoakMonitor(args.soak_interval, args.soak_output, gauges)
+    subscriber.on_latency = monitor.record
+    try:
+        subscriber.connect(args.topic)
+        subscriber.client.loop_start()
+        monitor.start()
+        if profiler:
+            profiler.start()
+        deadline = time.time() + duration
+        while time.time() < deadline:
+            time.sleep(min(1.0, deadline - time.time()))
+    except KeyboardInterrupt:
+        print("\n✗ Soak interrupted")
+    finally:
+        monitor.stop()
+        # Disconnecting first sends DISCONNECT and lets the network thread exit at once
+        subscriber.client.disconnect()
+        subscriber.client.loop_stop()
+    print(f"\n✓ Received {subscriber.message_count} messages in {len(monitor.samples)} intervals")
+    if subscriber.decode_errors:
+        print(f"✗ {subscriber.decode_errors} messages failed to decode")
+    if subscriber.sink_errors:
+        print(f"✗ {subscriber.sink_errors} messages failed to store")
+    print_findings(analyze(monitor.samples, args.soak_drift, memory_growth=args.soak_max_growth))
 
 
 def main():
@@ -148,35 +359,181 @@ def main():
     parser = argparse.ArgumentParser(description="MQTT Sensor Data Subscriber")
     parser.add_argument("--broker", default=os.getenv("MQTT_BROKER", "localhost"), help="MQTT broker hostname")
     parser.add_argument("--port", type=int, default=int(os.getenv("MQTT_PORT", "1883")), help="MQTT broker port")
-    parser.add_argument("--encoding", choices=["json", "msgpack", "cbor", "protobuf"], default="json",
+    parser.add_argument("--encoding", choices=["json", "msgpack", "cbor", "protobuf", "struct"], default="json",
                         help="Encoding format")
-    parser.add_argument("--topic", default="mqtt-demo/all", help="MQTT topic")
+    parser.add_argument("--topic", default=None, help="MQTT topic (default: mqtt-demo/all unless --route is given)")
+    parser.add_argument("--route", action="append", default=[], metavar="PATTERN",
+                        help="Also subscribe to PATTERN (+/# wildcards) and count its messages; repeatable")
     parser.add_argument("--qos", type=int, choices=[0, 1, 2], default=1,
                         help="Quality of Service level")
+    parser.add_argument("--echo", default=None, metavar="REPLY_TOPIC",
+                        help="Echo every message unchanged to REPLY_TOPIC (ping-pong responder)")
+    parser.add_argument("--trace", default=None,
+                        help="Append per-stage trace records to this file (switches to MQTT 5)")
+    parser.add_argument("--validate", action="store_true",
+                        help="Validate decoded messages against the SensorData JSON schema")
+    parser.add_argument("--validate-rate", type=float, default=1.0, metavar="RATE",
+                        help="Fraction of messages to validate (e.g. 0.01 checks every 100th)")
+    parser.add_argument("--schema", default=None,
+                        help="Schema file for --validate (default: schemas/sensor_data.json)")
+    parser.add_argument("--sqlite", default=None, metavar="PATH",
+                        help="Store decoded readings in this SQLite database (WAL, batched writer thread)")
+    parser.add_argument("--sqlite-batch", type=int, default=500,
+                        help="Rows per SQLite transaction")
+    parser.add_argument("--sqlite-flush", type=float, default=0.25,
+                        help="Seconds after which a partial SQLite batch is written")
+    parser.add_argument("--log", default=None, metavar="DIR",
+                        help="Append raw payloads to a segmented message log in DIR (see replay.py)")
+    parser.add_argument("--log-segment-mb", type=int, default=64,
+                        help="Message log segment size in MB before rotating")
+    parser.add_argument("--client-id", default="", help="MQTT client id (default: random)")
+    parser.add_argument("--session-expiry", type=int, default=None, metavar="SECONDS",
+                        help="Keep a persistent session (clean start off) that the broker holds SECONDS "
+                             "after disconnecting; messages queued while offline arrive on reconnect")
+    parser.add_argument("--protocol", choices=["3.1.1", "5"], default=None,
+                        help="MQTT protocol version (default: 5 with --trace or --session-expiry, else 3.1.1)")
+    parser.add_argument("--quiet", action="store_true",
+                        help="Do not print each received message")
+    parser.add_argument("--metrics-port", type=int, default=None, metavar="PORT",
+                        help="Serve live OpenMetrics at http://HOST:PORT/metrics")
+    parser.add_argument("--metrics-host", default="127.0.0.1", help="Address for --metrics-port")
+    parser.add_argument("--soak", default=None, metavar="DURATION",
+                        help="Soak mode: run for DURATION (e.g. 30m, 6h), sample throughput, latency, "
+                             "memory and GC every --soak-interval, and report drift at the end")
+    parser.add_argument("--soak-interval", type=float, default=10.0, help="Soak mode: seconds between samples")
+    parser.add_argument("--soak-output", default=None, metavar="PATH",
+                        help="Soak mode: write the samples to PATH as JSON lines")
+    parser.add_argument("--soak-drift", type=float, default=0.25,
+                        help="Soak mode: first- to last-quarter change flagged as drift")
+    parser.add_argument("--soak-max-growth", type=float, default=1.0, metavar="MB_PER_HOUR",
+                        help="Soak mode: steady RSS growth above this is flagged")
+    parser.add_argument("--profile", choices=PROFILE_MODES, default=None,
+                        help="Profile message handling with cProfile or a sampling profiler")
+    parser.add_argument("--profile-output", default="profile_subscriber",
+                        help="Base path for profile output files")
 
     args = parser.parse_args()
+    if args.topic is None and not args.route:
+        args.topic = "mqtt-demo/all"
+    validator = None
+    if args.validate:
+        from schema_validator import SampledValidator, load_validator
+        try:
+            validator = SampledValidator(load_validator(args.schema), args.validate_rate)
+        except (OSError, ValueError) as e:
+            parser.error(f"--validate: {e}")
+    sink = None
+    if args.sqlite:
+        import sqlite3
+        from sqlite_sink import SQLiteSink
+        try:
+            sink = SQLiteSink(args.sqlite, args.sqlite_batch, args.sqlite_flush)
+        except (OSError, ValueError, sqlite3.Error) as e:
+            parser.error(f"--sqlite: {e}")
+    soak_duration = None
+    if args.soak is not None:
+        from soak import parse_duration
+        try:
+            soak_duration = parse_duration(args.soak)
+        except argparse.ArgumentTypeError as e:
+            parser.error(f"--soak: {e}")
+    message_log = None
+    if args.log:
+        from message_log import MessageLogWriter
+        try:
+            message_log = MessageLogWriter(args.log, args.log_segment_mb * 1024 * 1024)
+        except (OSError, ValueError) as e:
+            parser.error(f"--log: {e}")
 
     print(f"=== MQTT Subscriber (Python) ===")
     print(f"Encoding: {args.encoding}")
-    print(f"Topic: {args.topic}")
+    if args.topic:
+        print(f"Topic: {args.topic}")
+    if args.route:
+        print(f"Routes: {', '.join(args.route)}")
     print(f"QoS: {args.qos}")
+    if args.session_expiry is not None:
+        print(f"Session: {args.client_id or '(random id)'}, expiry {args.session_expiry}s")
+    if args.encoding == "protobuf":
+        print(f"Protobuf backend: {load_codec('protobuf').protobuf_backend()}")
+    if args.echo:
+        print(f"Echo to: {args.echo}")
+    if validator:
+        print(f"Validation: every {validator.stride} message(s)")
+    if sink is not None:
+        print(f"SQLite: {args.sqlite} (batch {args.sqlite_batch}, flush {args.sqlite_flush}s)")
+    if message_log:
+        print(f"Message log: {args.log} ({args.log_segment_mb} MB segments)")
+    if soak_duration is not None:
+        print(f"Soak: {soak_duration:g}s, sampled every {args.soak_interval:g}s"
+              + (f" to {args.soak_output}" if args.soak_output else ""))
     print()
 
-    subscriber = SensorDataSubscriber(args.broker, args.port, args.encoding, args.qos)
+    registry = metrics_server = None
+    if args.metrics_port is not None:
+        from metrics import MetricsRegistry, MetricsServer
+        registry = MetricsRegistry(role="subscriber", encoding=args.encoding, qos=args.qos)
+        metrics_server = MetricsServer(registry, args.metrics_host, args.metrics_port)
+        try:
+            metrics_server.start()
+        except OSError as e:
+            parser.error(f"--metrics-port: {e}")
+        print(f"✓ Metrics at {metrics_server.url}")
+
+    subscriber = SensorDataSubscriber(args.broker, args.port, args.encoding, args.qos, args.trace, args.echo,
+                                      validator, sink, args.quiet, message_log, args.client_id,
+                                      args.session_expiry, PROTOCOLS.get(args.protocol), registry)
+    profiler = WindowProfiler(args.profile, args.profile_output) if args.profile else None
+    route_counts: Dict[str, int] = {}
+    for pattern in args.route:
+        def count(topic, data, pattern=pattern):
+            route_counts[pattern] = route_counts.get(pattern, 0) + 1
+        try:
+            subscriber.route(pattern, count)
+        except ValueError as e:
+            parser.error(f"--route: {e}")
 
     try:
+        if soak_duration is not None:
+            run_soak(subscriber, args, soak_duration, profiler)
+            return
         subscriber.connect(args.topic)
+        if profiler:
+            profiler.start()
         subscriber.loop()
     except KeyboardInterrupt:
         print(f"\n\n✓ Received {subscriber.message_count} messages")
-        if subscriber.receive_times:
-            avg_latency = sum(subscriber.receive_times) / len(subscriber.receive_times)
+        if subscriber.decode_errors:
+            print(f"✗ {subscriber.decode_errors} messages failed to decode")
+        if subscriber.sink_errors:
+            print(f"✗ {subscriber.sink_errors} messages failed to store")
+        if validator:
+            print(f"{'✗' if validator.invalid else '✓'} {validator.summary()}")
+        if subscriber.latency_count:
+            avg_latency = subscriber.latency_total / subscriber.latency_count
             print(f"✓ Average receive latency: {avg_latency*1000:.2f}ms")
+        for pattern in args.route:
+            print(f"✓ Route {pattern}: {route_counts.get(pattern, 0)} messages")
         print("✓ Disconnected")
     except Exception as e:
         print(f"\n✗ Error: {e}")
     finally:
         subscriber.disconnect()
+        if metrics_server:
+            metrics_server.stop()
+        if sink is not None:
+            sink.close()
+            if sink.error:
+                print(f"✗ SQLite sink failed: {sink.error}")
+            print(f"✓ {sink.summary()}")
+        if message_log:
+            message_log.close()
+            print(f"✓ Message log: {message_log.records} records, {message_log.bytes} bytes in {args.log}")
+        if profiler and profiler.running:
+            profiler.stop()
+        if profiler and profiler.snapshot is not None:
+            for path in profiler.save():
+                print(f"✓ Profile written: {path}")
 
 
 if __name__ == "__main__":
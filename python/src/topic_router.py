@@ -0,0 +1,197 @@
+#!/usr/bin/env python3
+"""
+Topic-filter trie for dispatching messages to per-pattern handlers.
+
+Subscription patterns (with MQTT `+` and `#` wildcards) are split into
+levels once, when added, and stored in a trie. Each node holds its exact
+children, its `+` child, the handlers of a `#` ending at it and the
+handlers of patterns that end there exactly. Matching a topic walks the
+trie level by level, following the exact and `+` branches at once, so the
+cost grows with the topic depth and the number of live wildcard branches,
+not with the number of patterns.
+
+Wildcards at the first level do not match topics starting with `$`
+(MQTT 3.1.1 section 4.7.2).
+"""
+
+from typing import Any, Dict, List, Optional
+
+
+class _Node:
+    __slots__ = ("children", "plus", "hash", "handlers")
+
+    def __init__(self):
+        self.children: Dict[str, "_Node"] = {}
+        self.plus: Optional["_Node"] = None
+        self.hash: List[Any] = []
+        self.handlers: List[Any] = []
+
+    def empty(self) -> bool:
+        return not (self.children or self.plus or self.hash or self.handlers)
+
+
+def validate_pattern(pattern: str) -> List[str]:
+    """
+    Split a subscription pattern into levels.
+
+    Raises:
+        ValueError: If a wildcard does not fill its level or `#` is not last
+    """
+    if not pattern:
+        raise ValueError("empty topic pattern")
+    levels = pattern.split("/")
+    for i, level in enumerate(levels):
+        if ("#" in level and (level != "#" or i != len(levels) - 1)) or ("+" in level and level != "+"):
+            raise ValueError(f"invalid topic pattern {pattern!r}: wildcards must fill a level and # must be last")
+    return levels
+
+
+def pattern_covers(general: str, specific: str) -> bool:
+    """
+    Whether every topic matched by the specific pattern is also matched by the general one.
+
+    Both patterns must be valid (see validate_pattern()).
+    """
+    g, s = general.split("/"), specific.split("/")
+    for i, level in enumerate(g):
+        # A first-level wildcard does not match $-topics, so it does not cover a literal $ level
+        dollar = i == 0 and i < len(s) and s[0].startswith("$")
+        if level == "#":
+            return not dollar
+        if i >= len(s) or s[i] == "#":
+            return False
+        if level == "+":
+            if dollar:
+                return False
+        elif level != s[i]:
+            return False
+    return len(s) == len(g)
+
+
+def patterns_overlap(a: str, b: str) -> bool:
+    """Whether some topic is matched by both patterns."""
+    x, y = a.split("/"), b.split("/")
+    for i in range(max(len(x), len(y))):
+        if i < len(x) and x[i] == "#":
+            return not (i == 0 and i < len(y) and y[0].startswith("$"))
+        if i < len(y) and y[i] == "#":
+            return not (i == 0 and i < len(x) and x[0].startswith("$"))
+        if i >= len(x) or i >= len(y):
+            return False
+        if x[i] == "+" or y[i] == "+":
+            if i == 0 and (x[0].startswith("$") or y[0].startswith("$")):
+                return False
+        elif x[i] != y[i]:
+            return False
+    return True
+
+
+def subscription_cover(patterns: List[str]) -> List[str]:
+    """
+    The patterns that are not covered by another one, in their original order.
+
+    Subscribing to these instead of all patterns receives the same topics, but
+    a topic matched by a subsumed pattern is not delivered a second time.
+    """
+    unique = list(dict.fromkeys(patterns))
+    return [p for p in unique if not any(q != p and pattern_covers(q, p) for q in unique)]
+
+
+class TopicRouter:
+    """Maps subscription patterns to handlers and finds the handlers for a topic."""
+
+    def __init__(self):
+        self._root = _Node()
+        self._patterns: Dict[str, List[Any]] = {}
+
+    def __len__(self) -> int:
+        return len(self._patterns)
+
+    def patterns(self) -> List[str]:
+        """Registered patterns, in the order they were first added."""
+        return list(self._patterns)
+
+    def add(self, pattern: str, handler: Any):
+        """
+        Register a handler for a pattern (a pattern may have several handlers).
+
+        Raises:
+            ValueError: If the pattern is malformed
+        """
+        levels = validate_pattern(pattern)
+        node = self._root
+        for level in levels[:-1] if levels[-1] == "#" else levels:
+            if level == "+":
+                node.plus = node.plus or _Node()
+                node = node.plus
+            else:
+                node = node.children.setdefault(level, _Node())
+        (node.hash if levels[-1] == "#" else node.handlers).append(handler)
+        self._patterns.setdefault(pattern, []).append(handler)
+
+    def remove(self, pattern: str, handler: Optional[Any] = None):
+        """
+        Unregister one handler of a pattern, or all of them if handler is None.
+
+        Raises:
+            KeyError: If the pattern (or handler) is not registered
+        """
+        handlers = self._patterns[pattern]
+        removed = list(handlers) if handler is None else [handler]
+        if handler is not None and handler not in handlers:
+            raise KeyError(pattern)
+        levels = validate_pattern(pattern)
+        path = []
+        node = self._root
+        for level in levels[:-1] if levels[-1] == "#" else levels:
+            path.append((node, level))
+            node = node.plus if level == "+" else node.children[level]
+        target = node.hash if levels[-1] == "#" else node.handlers
+        for h in removed:
+            target.remove(h)
+            handlers.remove(h)
+        if not handlers:
+            del self._patterns[pattern]
+        # Prune branches left empty
+        for parent, level in reversed(path):
+            child = parent.plus if level == "+" else parent.children[level]
+            if not child.empty():
+                break
+            if level == "+":
+                parent.plus = None
+            else:
+                del parent.children[level]
+
+    def match(self, topic: str) -> List[Any]:
+        """
+        Handlers of every pattern matching a topic.
+
+        Args:
+            topic: Concrete topic name (no wildcards)
+
+        Returns:
+            Matching handlers; one entry per (pattern, handler) registration
+        """
+        matched: List[Any] = []
+        nodes = [self._root]
+        # Wildcards at the first level never match $-topics ($SYS/...)
+        wild = not topic.startswith("$")
+        for level in topic.split("/"):
+            following = []
+            for node in nodes:
+                if node.hash and wild:
+                    matched.extend(node.hash)
+                child = node.children.get(level)
+                if child is not None:
+                    following.append(child)
+                if node.plus is not None and wild:
+                    following.append(node.plus)
+            if not following:
+                return matched
+            nodes = following
+            wild = True
+        for node in nodes:
+            matched.extend(node.handlers)
+            # "a/#" also matches "a" itself
+            matched.extend(node.hash)
+        return matched
@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+"""
+Stage-level latency tracing for the Python MQTT clients.
+
+The publisher stamps CLOCK_MONOTONIC nanoseconds at each stage of a
+message's lifetime and carries the stamps taken before the PUBLISH is built
+to the subscriber in MQTT 5 user properties (one per field, or all in one
+compact property with t_encoded as an offset from t_create). t_enqueued is
+taken once paho's publish() has returned, so it stays in the publisher's
+record. Both sides append one JSON record per message to a trace file;
+benchmarks/trace_report.py joins them by (run, seq).
+
+CLOCK_MONOTONIC is shared by all processes on a host (including containers
+without a time namespace), so cross-process stage durations are only valid
+when publisher and subscriber run on the same machine.
+"""
+
+import json
+import time
+from typing import Any, Dict, Optional
+
+from paho.mqtt.packettypes import PacketTypes
+from paho.mqtt.properties import Properties
+
+TRACE_PREFIX = "trace."
+# Compact form: "run seq t_create t_encoded-t_create"
+COMPACT_KEY = "trace"
+
+# Stamps in lifetime order; the first two travel with the message
+CARRIED_STAMPS = ["t_create", "t_encoded"]
+PUBLISHER_STAMPS = CARRIED_STAMPS + ["t_enqueued", "t_written", "t_acked"]
+SUBSCRIBER_STAMPS = ["t_received", "t_decoded"]
+
+
+def now_ns() -> int:
+    """Current CLOCK_MONOTONIC time in nanoseconds."""
+    return time.monotonic_ns()
+
+
+def to_properties(trace: Dict[str, Any], compact: bool = False) -> Properties:
+    """
+    Build PUBLISH properties carrying the run id, sequence and pre-send stamps.
+
+    Args:
+        trace: Trace record with 'run', 'seq' and CARRIED_STAMPS
+        compact: Pack all fields into one user property (about a third of the bytes)
+
+    Returns:
+        MQTT 5 PUBLISH properties
+    """
+    properties = Properties(PacketTypes.PUBLISH)
+    if compact:
+        base = trace[CARRIED_STAMPS[0]]
+        fields = [trace["run"], trace["seq"], base] + [trace[key] - base for key in CARRIED_STAMPS[1:]]
+        properties.UserProperty = [(COMPACT_KEY, " ".join(str(field) for field in fields))]
+    else:
+        properties.UserProperty = [(TRACE_PREFIX + key, str(trace[key]))
+                                   for key in ["run", "seq"] + CARRIED_STAMPS if key in trace]
+    return properties
+
+
+def from_properties(properties: Optional[Properties]) -> Optional[Dict[str, Any]]:
+    """
+    Extract trace fields from received PUBLISH properties.
+
+    Returns:
+        Trace record, or None if the message was not traced
+    """
+    user_properties = getattr(properties, "UserProperty", None) if properties else None
+    if not user_properties:
+        return None
+    trace: Dict[str, Any] = {}
+    for key, value in user_properties:
+        if key == COMPACT_KEY:
+            run, seq, base, *offsets = value.split()
+            stamps = [int(base)] + [int(base) + int(offset) for offset in offsets]
+            trace.update(zip(CARRIED_STAMPS, stamps), run=run, seq=int(seq))
+            continue
+        if not key.startswith(TRACE_PREFIX):
+            continue
+        key = key[len(TRACE_PREFIX):]
+        trace[key] = value if key == "run" else int(value)
+    return trace or None
+
+
+class TraceWriter:
+    """Appends trace records as JSON lines."""
+
+    def __init__(self, path: str, **context):
+        """
+        Initialize the writer.
+
+        Args:
+            path: Output file path
+            **context: Fields added to every record (role, enc, qos, ...)
+        """
+        self.context = context
+        self.file = open(path, "a", buffering=1)
+
+    def write(self, record: Dict[str, Any]):
+        """Write one record."""
+        self.file.write(json.dumps({**self.context, **record}) + "\n")
+
+    def close(self):
+        """Close the trace file."""
+        self.file.close()
@@ -0,0 +1,21 @@
+from ack_tracker import AckTracker
+
+
+def test_ack_before_send_is_matched():
+    tracker = AckTracker()
+    assert tracker.acked(1, 1.5) is None
+    assert tracker.sent(1, 1.0) == 0.5
+    assert tracker.inflight == 0
+
+
+def test_expire_forgets_lost_publishes():
+    tracker = AckTracker()
+    tracker.sent(1, 0.0)
+    tracker.sent(2, 5.0)
+    tracker.acked(3, 0.0)
+    assert tracker.expire(1.0) == 1
+    assert tracker.inflight == 1
+    assert tracker.expired == 1
+    # The held ack for mid 3 went too, so a late send of 3 is now in flight
+    assert tracker.sent(3, 6.0) is None
+    assert tracker.acked(2, 6.0) == 1.0
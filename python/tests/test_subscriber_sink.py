@@ -0,0 +1,36 @@
+"""Messages handed to SensorDataSubscriber._on_message reach the SQLite sink."""
+
+import json
+import sqlite3
+import time
+
+import paho.mqtt.client as mqtt
+
+from sqlite_sink import SQLiteSink
+from subscriber import SensorDataSubscriber
+
+
+def message(topic: str, payload: dict) -> mqtt.MQTTMessage:
+    msg = mqtt.MQTTMessage(topic=topic.encode("utf-8"))
+    msg.payload = json.dumps(payload).encode("utf-8")
+    return msg
+
+
+def test_on_message_stores_every_reading(tmp_path):
+    path = tmp_path / "readings.db"
+    sink = SQLiteSink(str(path), batch_size=4, flush_interval=0.05)
+    # An empty sink must still count as attached
+    assert sink.pending == 0
+    subscriber = SensorDataSubscriber(sink=sink, quiet=True)
+    for i in range(10):
+        subscriber._on_message(None, None, message(f"sensors/s{i}", {
+            "sensor_id": f"s{i}", "timestamp": time.time(), "temperature": 20.0 + i,
+            "humidity": 50.0, "pressure": 1013.0}))
+    sink.close()
+
+    assert subscriber.message_count == 10
+    assert subscriber.decode_errors == 0
+    assert subscriber.sink_errors == 0
+    with sqlite3.connect(path) as connection:
+        rows = connection.execute("SELECT sensor_id, topic FROM readings ORDER BY temperature").fetchall()
+    assert rows == [(f"s{i}", f"sensors/s{i}") for i in range(10)]
@@ -0,0 +1,53 @@
+import socket
+
+from paho.mqtt.packettypes import PacketTypes
+from paho.mqtt.properties import Properties
+
+from publisher import SensorDataPublisher
+
+
+def _publish_topics(data: bytes):
+    """Topic and property bytes of each PUBLISH in a QoS 1 packet stream."""
+    packets = []
+    while data:
+        length, shift, pos = 0, 0, 1
+        while True:
+            byte = data[pos]
+            length |= (byte & 0x7F) << shift
+            shift += 7
+            pos += 1
+            if not byte & 0x80:
+                break
+        body, data = data[pos:pos + length], data[pos + length:]
+        topic_length = int.from_bytes(body[:2], "big")
+        topic = body[2:2 + topic_length].decode("utf-8")
+        properties_length = body[4 + topic_length]
+        packets.append((topic, body[5 + topic_length:5 + topic_length + properties_length]))
+    return packets
+
+
+def test_reconnect_resends_full_topics():
+    publisher = SensorDataPublisher(qos=1, topic_alias=True)
+    # As after a CONNACK allowing aliases; the broker then goes away before any PUBACK
+    publisher.alias_maximum = 10
+    for i in range(3):
+        publisher._send("sensors/a", b"%d" % i)
+    assert publisher.aliased_topics == 1
+
+    # Reconnect: paho's own CONNACK handling runs on_connect, then resends the unacknowledged messages
+    ours, broker = socket.socketpair()
+    publisher.client._sock = ours
+    connack = Properties(PacketTypes.CONNACK)
+    connack.TopicAliasMaximum = 10
+    body = b"\x00\x00" + connack.pack()
+    publisher.client._in_packet = {"remaining_length": len(body), "packet": body}
+    try:
+        assert publisher.client._handle_connack() == 0
+        broker.settimeout(1)
+        resent = _publish_topics(broker.recv(4096))
+    finally:
+        ours.close()
+        broker.close()
+
+    assert resent == [("sensors/a", b"")] * 3
+    assert publisher.aliased_topics == 0
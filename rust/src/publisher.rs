@@ -9,6 +9,8 @@ use std::time::{SystemTime, UNIX_EPOCH};
 use std::thread;
 use std::time::Duration;
 use rand::Rng;
+use std::fs::File;
+use std::io::{LineWriter, Write};
 
 #[derive(Parser)]
 #[command(name = "mqtt-publisher")]
@@ -40,6 +42,10 @@ struct Args {
     
     #[arg(long, default_value = "1")]
     qos: u8,
+    
+    /// Write one JSON record per message to this path (file or FIFO)
+    #[arg(long)]
+    records: Option<String>,
 }
 
 #[derive(Serialize, Deserialize, Debug)]
@@ -193,15 +199,16 @@ impl SensorDataPublisher {
         }
     }
     
-    fn publish(&self, topic: &str, data: &SensorData) -> Result<f64, Box<dyn std::error::Error>> {
+    fn publish(&self, topic: &str, data: &SensorData) -> Result<(f64, usize), Box<dyn std::error::Error>> {
         let start = std::time::Instant::now();
         
         let payload = self.encode_message(data)?;
+        let payload_len = payload.len();
         let publish = Publish::new(topic, self.qos, payload);
         
         self.client.publish(publish)?;
         
-        Ok(start.elapsed().as_secs_f64())
+        Ok((start.elapsed().as_secs_f64(), payload_len))
     }
 }
 
@@ -224,6 +231,10 @@ async fn main() -> Result<(), Box<dyn std::error::Error>> {
     );
     
     let mut publish_times = Vec::new();
+    let mut records = match &args.records {
+        Some(path) => Some(LineWriter::new(File::create(path)?)),
+        None => None,
+    };
     
     // Give the client time to connect
     thread::sleep(Duration::from_secs(1));
@@ -233,9 +244,13 @@ async fn main() -> Result<(), Box<dyn std::error::Error>> {
         println!("Publishing message {}/{}...", i + 1, args.count);
         
         match publisher.publish(&args.topic, &data) {
-            Ok(publish_time) => {
+            Ok((publish_time, payload_len)) => {
                 publish_times.push(publish_time);
                 println!("  Publish time: {:.2}ms", publish_time * 1000.0);
+                if let Some(writer) = records.as_mut() {
+                    writeln!(writer, "{{\"seq\": {}, \"pub_ms\": {:.4}, \"bytes\": {}}}",
+                             i + 1, publish_time * 1000.0, payload_len)?;
+                }
             },
             Err(e) => {
                 eprintln!("Error publishing message: {}", e);
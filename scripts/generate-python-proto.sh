@@ -0,0 +1,15 @@
+#!/bin/bash
+# Regenerate the Python protobuf bindings from schemas/sensor_data.proto
+#
+# Requires protoc >= 3.20 (for --pyi_out); the generated code needs the
+# protobuf runtime pinned in python/requirements.txt.
+set -euo pipefail
+
+cd "$(dirname "$0")/.."
+
+protoc --proto_path=schemas \
+    --python_out=python/src \
+    --pyi_out=python/src \
+    schemas/sensor_data.proto
+
+echo "✓ Generated python/src/sensor_data_pb2.py and sensor_data_pb2.pyi ($(protoc --version))"
@@ -1,75 +1,166 @@
 #!/usr/bin/env python3
-import os, json, csv, statistics as stats, glob, datetime, pathlib
+import os, sys, json, csv, datetime, pathlib, pickle, hashlib, argparse
+from array import array
 from collections import defaultdict
 
 DOCS = pathlib.Path("docs")
 ASSETS = DOCS / "assets" / "charts"
 REPORTS = DOCS / "reports"
+RESULTS = pathlib.Path("results")
+CACHE = pathlib.Path(".cache") / "render_reports"
+
+# Normalized row layout; cached rows are plain tuples in this order
+FIELDS = ("lang", "role", "enc", "variant", "qos", "bytes", "pub_ms", "recv_ms", "tps", "ts")
+CHUNK = 10000  # rows per pickle frame, bounds memory while (re)building a cache entry
+CACHE_VERSION = 1
+
+def warn(msg):
+    print(f"⚠ {msg}", file=sys.stderr)
 
 def rows_from_file(p):
-    try:
-        if p.suffix.lower()==".json":
-            payload = json.loads(p.read_text())
-            if isinstance(payload, dict): yield payload
-            elif isinstance(payload, list):
-                for row in payload: yield row
-        elif p.suffix.lower()==".csv":
-            with p.open() as f:
-                for row in csv.DictReader(f):
-                    yield row
-        else:
-            # allow .jsonl (one json per line)
-            with p.open() as f:
-                for line in f:
-                    line=line.strip()
-                    if not line: continue
-                    try: yield json.loads(line)
-                    except: pass
-    except Exception as e:
-        yield {"_error": f"Failed to parse {p}: {e}"}
-
-def normalize(r):
-    if "_error" in r: return r
+    """Yield (location, raw row) pairs without materializing the file; bad lines yield the error instead."""
+    suffix = p.suffix.lower()
+    if suffix == ".json":
+        payload = json.loads(p.read_text())
+        if isinstance(payload, dict): yield f"{p}", payload
+        elif isinstance(payload, list):
+            for i, row in enumerate(payload): yield f"{p}[{i}]", row
+    elif suffix == ".csv":
+        with p.open(newline="") as f:
+            for i, row in enumerate(csv.DictReader(f), 2):
+                yield f"{p}:{i}", row
+    else:
+        # allow .jsonl (one json per line)
+        with p.open() as f:
+            for i, line in enumerate(f, 1):
+                line = line.strip()
+                if not line: continue
+                try: yield f"{p}:{i}", json.loads(line)
+                except ValueError as e: yield f"{p}:{i}", e
+
+def normalize(r, default_ts):
     def get(k, d=None): return r.get(k, d)
-    return {
-        "lang": get("lang") or "unknown",
-        "role": get("role") or "pub",
-        "enc":  get("enc")  or "json",
-        "variant": str(get("variant") or "small"),
-        "qos": int(get("qos") or 1),
-        "bytes": int(get("bytes") or get("payload_bytes") or 0),
-        "pub_ms": float(get("pub_ms") or 0),
-        "recv_ms": float(get("recv_ms") or 0),
-        "tps": float(get("tps") or 0),
-        "ts": get("ts") or datetime.datetime.utcnow().isoformat()
-    }
-
-def load_all():
-    records=[]
-    for p in glob.glob("results/**/*", recursive=True):
-        p=pathlib.Path(p)
-        if not p.is_file(): continue
-        for r in rows_from_file(p):
-            records.append(normalize(r))
-    return [r for r in records if "_error" not in r]
-
-def agg(records):
-    by_lang = defaultdict(list)
-    for r in records:
-        by_lang[r["lang"]].append(r)
+    return (
+        get("lang") or "unknown",
+        get("role") or "pub",
+        get("enc") or "json",
+        str(get("variant") or "small"),
+        int(get("qos") or 1),
+        int(get("bytes") or get("payload_bytes") or 0),
+        float(get("pub_ms") or 0),
+        float(get("recv_ms") or 0),
+        float(get("tps") or 0),
+        get("ts") or default_ts,
+    )
+
+def parse_file(p, stat, tally):
+    """Stream normalized rows from one file; bad rows are warned about and counted in tally["bad"]."""
+    # rows without a timestamp are dated by their file, so cached and fresh parses agree
+    default_ts = datetime.datetime.fromtimestamp(stat.st_mtime, datetime.timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
+    try:
+        for where, r in rows_from_file(p):
+            try:
+                if isinstance(r, Exception): raise r
+                if not isinstance(r, dict): raise TypeError(f"expected an object, got {type(r).__name__}")
+                yield normalize(r, default_ts)
+            except (ValueError, TypeError) as e:
+                warn(f"{where}: skipping bad row ({e})")
+                tally["bad"] += 1
+    except (OSError, ValueError, csv.Error) as e:
+        warn(f"{p}: skipping unreadable file ({e})")
+        tally["bad"] += 1
+
+def cache_key(p):
+    return hashlib.sha1(str(p).encode()).hexdigest() + ".pickle"
+
+def load_index(cache):
+    try:
+        index = json.loads((cache / "index.json").read_text())
+        return index if index.get("version") == CACHE_VERSION else {"version": CACHE_VERSION, "files": {}}
+    except (OSError, ValueError):
+        return {"version": CACHE_VERSION, "files": {}}
+
+def read_cached(path):
+    with path.open("rb") as f:
+        while True:
+            try: chunk = pickle.load(f)
+            except EOFError: return
+            yield from chunk
+
+def ingest(p, stat, cache, index):
+    """Yield rows for p from the cache if size+mtime match, else parse it and refresh the cache entry."""
+    entry = index["files"].get(str(p))
+    if entry and entry["size"] == stat.st_size and entry["mtime_ns"] == stat.st_mtime_ns and (cache / entry["rows"]).exists():
+        if entry["bad"]: warn(f"{p}: {entry['bad']} bad row(s) skipped (cached)")
+        yield from read_cached(cache / entry["rows"])
+        return
+    target = cache / cache_key(p)
+    tmp = target.with_suffix(".tmp")
+    tally = {"bad": 0}
+    with tmp.open("wb") as f:
+        chunk = []
+        for row in parse_file(p, stat, tally):
+            chunk.append(row)
+            yield row
+            if len(chunk) >= CHUNK:
+                pickle.dump(chunk, f, pickle.HIGHEST_PROTOCOL)
+                chunk = []
+        if chunk: pickle.dump(chunk, f, pickle.HIGHEST_PROTOCOL)
+    os.replace(tmp, target)
+    index["files"][str(p)] = {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns, "rows": target.name, "bad": tally["bad"]}
+
+def source_files(root):
+    for p in sorted(root.rglob("*")):
+        if p.is_file() and not p.name.startswith(".") and p.suffix.lower() in (".json", ".jsonl", ".csv"):
+            yield p
+
+def load_all(root=RESULTS, cache=CACHE, use_cache=True):
+    """Stream every normalized row under root, reusing cached rows for unchanged files."""
+    if not use_cache:
+        for p in source_files(root):
+            yield from parse_file(p, p.stat(), {"bad": 0})
+        return
+    cache.mkdir(parents=True, exist_ok=True)
+    index = load_index(cache)
+    seen = set()
+    for p in source_files(root):
+        seen.add(str(p))
+        yield from ingest(p, p.stat(), cache, index)
+    # forget files that disappeared from results/
+    for stale in set(index["files"]) - seen:
+        (cache / index["files"].pop(stale)["rows"]).unlink(missing_ok=True)
+    (cache / "index.json").write_text(json.dumps(index))
+
+class Group:
+    """Running aggregate for one (enc, variant, qos) cell; only metric columns are kept."""
+    __slots__ = ("count", "bytes", "pub_ms", "recv_ms", "tps")
+
+    def __init__(self):
+        self.count = 0
+        self.bytes = 0
+        self.pub_ms, self.recv_ms, self.tps = array("d"), array("d"), array("d")
+
+def agg(rows):
+    by_lang = defaultdict(lambda: {"latest": None, "groups": defaultdict(Group)})
+    for lang, role, enc, variant, qos, nbytes, pub_ms, recv_ms, tps, ts in rows:
+        entry = by_lang[lang]
+        if entry["latest"] is None or ts > entry["latest"]: entry["latest"] = ts
+        g = entry["groups"][(enc, variant, qos)]
+        g.count += 1
+        g.bytes += nbytes
+        g.pub_ms.append(pub_ms); g.recv_ms.append(recv_ms); g.tps.append(tps)
     return by_lang
 
 def mk(parent, name):
     parent.mkdir(parents=True, exist_ok=True)
     return parent / name
 
-def stat_block(rows, key):
-    xs=[float(r.get(key,0)) for r in rows if r.get(key) not in (None,"")]
+def stat_block(xs):
     if not xs: return "n=0"
-    def p(q): 
-        i=int(q*(len(xs)-1))
-        return f"{sorted(xs)[i]:.2f}"
-    return f"n={len(xs)} min={min(xs):.2f} p50={p(.5)} p95={p(.95)} max={max(xs):.2f} avg={sum(xs)/len(xs):.2f}"
+    xs = sorted(xs)  # one sort serves every percentile
+    n = len(xs)
+    def p(q): return f"{xs[int(q*(n-1))]:.2f}"
+    return f"n={n} min={xs[0]:.2f} p50={p(.5)} p95={p(.95)} max={xs[-1]:.2f} avg={sum(xs)/n:.2f}"
 
 def write_index(by_lang):
     idx = mk(REPORTS, "index.md")
@@ -80,55 +171,78 @@ def write_index(by_lang):
     # summary table
     lines += ["| Language | Encodings | Latest Samples |",
               "|---|---|---|"]
-    for lang, rows in sorted(by_lang.items()):
-        encs = sorted({r["enc"] for r in rows})
-        latest = max(rows, key=lambda r: r["ts"]) if rows else None
-        lines += [f"| **{lang}** | {', '.join(encs)} | {latest['ts'] if latest else '—'} |"]
+    for lang, entry in sorted(by_lang.items()):
+        encs = sorted({enc for enc, _, _ in entry["groups"]})
+        lines += [f"| **{lang}** | {', '.join(encs)} | {entry['latest'] or '—'} |"]
     idx.write_text("\n".join(lines))
 
-def write_lang_pages(lang, rows):
+def charting():
+    """benchmarks/charts.py if matplotlib is available, else None (pages render without charts)."""
+    sys.path.insert(0, str(pathlib.Path(__file__).resolve().parent.parent / "benchmarks"))
+    try:
+        import charts
+        return charts
+    except ImportError as e:
+        warn(f"skipping charts ({e}); install matplotlib to enable them")
+        return None
+
+def write_cdf_chart(charts, lang, groups):
+    """Per-encoding pub_ms CDF for one language; returns the image path relative to its index page."""
+    series = defaultdict(lambda: array("d"))
+    for (enc, _, _), g in groups.items():
+        series[enc].extend(g.pub_ms)
+    name = f"{lang}_pub_ms_cdf"
+    charts.plot_cdfs(series, ASSETS, name, f"{lang} publish latency CDF", xlabel="pub_ms")
+    return f"../../assets/charts/{name}.svg"
+
+def write_lang_pages(lang, entry, charts=None):
     LDIR = mk(REPORTS, lang)
+    groups = entry["groups"]
     # language index
     lines=["# " + lang.upper(), "",
            "| enc | variant | qos | count | bytes(avg) | pub_ms | recv_ms | tps |",
            "|---|---|---:|---:|---:|---|---|---|"]
-    from collections import Counter, defaultdict
-    key=lambda r:(r["enc"], r["variant"], r["qos"])
-    buckets=defaultdict(list)
-    for r in rows: buckets[key(r)].append(r)
-    for (enc,variant,qos), xs in sorted(buckets.items()):
-        avg_bytes = sum(x["bytes"] for x in xs)/len(xs)
-        lines.append(f"| {enc} | {variant} | {qos} | {len(xs)} | {avg_bytes:.0f} | {stat_block(xs,'pub_ms')} | {stat_block(xs,'recv_ms')} | {stat_block(xs,'tps')} |")
+    for (enc,variant,qos), g in sorted(groups.items()):
+        lines.append(f"| {enc} | {variant} | {qos} | {g.count} | {g.bytes/g.count:.0f} | {stat_block(g.pub_ms)} | {stat_block(g.recv_ms)} | {stat_block(g.tps)} |")
+    if charts:
+        lines += ["", f"![{lang} publish latency CDF]({write_cdf_chart(charts, lang, groups)})"]
     mk(LDIR, "index.md").write_text("\n".join(lines))
     # per-encoding pages
-    for enc in sorted({r["enc"] for r in rows}):
-        enc_rows=[r for r in rows if r["enc"]==enc]
+    for enc in sorted({enc for enc, _, _ in groups}):
+        cells = [g for (e, _, _), g in groups.items() if e == enc]
+        pub_ms, recv_ms = array("d"), array("d")
+        for g in cells:
+            pub_ms.extend(g.pub_ms); recv_ms.extend(g.recv_ms)
         page=["# " + f"{lang.upper()} — {enc.upper()}",
               "",
-              f"_Samples: {len(enc_rows)}_",
+              f"_Samples: {sum(g.count for g in cells)}_",
               "",
               "## Distribution (pub_ms)",
               "",
               "```text",
-              stat_block(enc_rows,"pub_ms"),
+              stat_block(pub_ms),
               "```",
               "",
               "## Distribution (recv_ms)",
               "",
               "```text",
-              stat_block(enc_rows,"recv_ms"),
+              stat_block(recv_ms),
               "```"]
         mk(LDIR, f"{enc}.md").write_text("\n".join(page))
 
 def main():
-    records = load_all()
-    if not records:
+    ap = argparse.ArgumentParser(description="Render docs/reports from results/")
+    ap.add_argument("--no-cache", action="store_true", help="Re-parse every results file and leave the cache untouched")
+    ap.add_argument("--no-charts", action="store_true", help="Skip rendering latency CDFs into docs/assets/charts")
+    args = ap.parse_args()
+    by_lang = agg(load_all(use_cache=not args.no_cache))
+    if not by_lang:
         mk(REPORTS,"index.md").write_text("# Benchmark Reports\n\n_No results yet. Run the harness to populate `results/`._\n")
         return
-    by_lang = agg(records)
     write_index(by_lang)
-    for lang, rows in by_lang.items():
-        write_lang_pages(lang, rows)
+    charts = None if args.no_charts else charting()
+    for lang, entry in by_lang.items():
+        write_lang_pages(lang, entry, charts)
 
 if __name__ == "__main__":
     main()